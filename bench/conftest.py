@@ -0,0 +1,80 @@
+"""Shared fixtures for the benchmarks; run them with ``pytest bench``.
+
+Needs ``pytest-benchmark``.
+"""
+
+import importlib.util
+import os
+import random
+
+import pytest
+
+from brandeis_classes import constants
+
+
+def _load_test_conftest():
+    # not importable by name: ``test`` is the standard library's, and this
+    # module is ``conftest`` too
+    path = os.path.join(os.path.dirname(__file__), os.pardir, "test", "conftest.py")
+    spec = importlib.util.spec_from_file_location("brandeis_test_conftest", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)  # type: ignore
+    return module
+
+
+_tests = _load_test_conftest()
+read = _tests.read
+# the tests' fixtures, for the benchmarks too
+template = _tests.template
+make_course = _tests.make_course
+
+FIXTURES = _tests.FIXTURES
+# rows on a full page of search results
+PAGE_ROWS = 100
+
+
+def synthetic_page(rows=PAGE_ROWS) -> str:
+    """A full page of search results, cycling through the fixtures' rows, with
+    a pager like the registrar's.
+    """
+    fixtures = [read(fname) for fname in FIXTURES]
+    body = "".join(fixtures[i % len(fixtures)] for i in range(rows))
+    pager = "".join(f'<a class="pagenumber">{n}</a>' for n in range(1, 11))
+    return (
+        "<html><body>"
+        + '<table id="classes-list">'
+        + body
+        + "</table>"
+        + pager
+        + "</body></html>"
+    )
+
+
+def synthetic_semesters(semesters=20, courses=2000, seed=0):
+    """About a decade of ``course_science.all_courses()``-style data.
+    """
+    make_course = _tests.course_factory(_tests.parse_fixture())
+    rng = random.Random(seed)
+    subjects = list(constants.SUBJECTS) + ["MATH", "PHYS", "MUS", "PHIL"]
+    return {
+        f"{2000 + i // 2}-{1 + 2 * (i % 2)}": [
+            make_course(
+                class_number=rng.randrange(1000, 30000),
+                subject=rng.choice(subjects),
+                number=rng.randrange(1, 300),
+                enrolled=rng.choice([0, rng.randrange(1, 200)]),
+            )
+            for _ in range(courses)
+        ]
+        for i in range(semesters)
+    }
+
+
+@pytest.fixture(scope="session")
+def semesters():
+    return synthetic_semesters()
+
+
+@pytest.fixture(scope="session")
+def page():
+    return synthetic_page()
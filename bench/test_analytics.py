@@ -0,0 +1,40 @@
+"""``course_science``'s loops vs. ``analytics.CourseFrame``.
+"""
+
+import pytest
+
+import course_science
+
+np = pytest.importorskip("numpy")
+from brandeis_classes import analytics  # isort:skip
+
+FUNCTIONS = [
+    "courses_per_subject",
+    "students_per_semester",
+    "students_per_class",
+    "student_enrollments",
+]
+
+
+@pytest.fixture
+def loaded(semesters, monkeypatch):
+    monkeypatch.setattr(course_science, "COURSES", semesters)
+    return semesters
+
+
+@pytest.mark.parametrize("name", FUNCTIONS)
+def test_loops(benchmark, loaded, name):
+    benchmark.group = name
+    benchmark(getattr(course_science, name))
+
+
+@pytest.mark.parametrize("name", FUNCTIONS)
+def test_frame(benchmark, loaded, name):
+    benchmark.group = name
+    frame = analytics.CourseFrame.from_courses(loaded)
+    assert getattr(frame, name)() == getattr(course_science, name)()
+    benchmark(getattr(frame, name))
+
+
+def test_build_frame(benchmark, loaded):
+    benchmark(analytics.CourseFrame.from_courses, loaded)
@@ -0,0 +1,50 @@
+"""``bulk.bulk_reparse``'s scaling with processes, on an archive of a few
+semesters of full synthetic pages.
+
+Compare the runs with ``pytest bench/test_bulk.py --benchmark-group-by=group``;
+each run's ``pages_per_second`` is in its extra info. On N cores, throughput
+should grow nearly N-fold up to ``jobs == N``, and flatten after.
+"""
+
+import os
+
+import pytest
+
+from brandeis_classes import scrape_courses
+
+archive = pytest.importorskip("brandeis_classes.archive")
+pytest.importorskip("zstandard")
+from brandeis_classes import bulk  # noqa: E402
+
+SEMESTERS = [(2017, "Spring"), (2017, "Fall")]
+# the synthetic pager goes up to 10
+PAGES = 10
+JOBS = sorted({1, 2, 4, os.cpu_count() or 1})
+
+
+@pytest.fixture(scope="module")
+def stored(page, tmp_path_factory):
+    a = archive.ResponseArchive(str(tmp_path_factory.mktemp("archive")))
+    for year, semester in SEMESTERS:
+        for pg in range(1, PAGES + 1):
+            a.record(
+                scrape_courses.SEARCH_URL,
+                scrape_courses.req_params(pg, year, semester),
+                page,
+            )
+    return a
+
+
+@pytest.mark.parametrize("jobs", JOBS)
+def test_bulk_reparse(benchmark, stored, jobs, tmp_path):
+    benchmark.group = "bulk_reparse"
+    results = benchmark.pedantic(
+        bulk.bulk_reparse,
+        args=(stored,),
+        kwargs=dict(jobs=jobs, outdir=str(tmp_path)),
+        rounds=3,
+    )
+    assert len(results) == len(SEMESTERS)
+    if benchmark.stats is not None:
+        pages = len(SEMESTERS) * PAGES
+        benchmark.extra_info["pages_per_second"] = pages / benchmark.stats["mean"]
@@ -0,0 +1,75 @@
+"""Memory used by slotted, interned ``Course``s vs. the old ``__dict__`` ones.
+"""
+
+import dataclasses
+import gc
+import io
+import json
+import tracemalloc
+
+import pytest
+
+from brandeis_classes import brandeis
+
+COURSES = 20000
+
+
+def legacy_class(cls):
+    """``cls``' fields as a plain ``@dataclass``, like they used to be.
+    """
+    return dataclasses.make_dataclass(
+        "Legacy" + cls.__name__, [(f.name, f.type) for f in dataclasses.fields(cls)],
+    )
+
+
+LegacyCourse = legacy_class(brandeis.Course)
+LegacyCourseTime = legacy_class(brandeis.CourseTime)
+LegacyInstructor = legacy_class(brandeis.Instructor)
+
+
+def legacy_from_dict(d):
+    ret = LegacyCourse(**d)
+    ret.schedule = [LegacyCourseTime(**s) for s in ret.schedule]
+    ret.instructors = [LegacyInstructor(**i) for i in ret.instructors]
+    return ret
+
+
+def legacy_load(text):
+    return [legacy_from_dict(d) for d in json.loads(text)]
+
+
+def slotted_load(text):
+    return brandeis.load_courses(io.StringIO(text))
+
+
+@pytest.fixture(scope="module")
+def semester_json(semesters):
+    courses = [c for crss in semesters.values() for c in crss][:COURSES]
+    return json.dumps([c.dict() for c in courses])
+
+
+def retained(load, text) -> int:
+    """Bytes still allocated once ``load(text)`` returns.
+    """
+    gc.collect()
+    tracemalloc.start()
+    courses = load(text)
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del courses
+    return size
+
+
+@pytest.mark.parametrize(
+    "name, load", [("legacy", legacy_load), ("slotted", slotted_load)],
+)
+def test_memory(benchmark, semester_json, name, load):
+    benchmark.group = "load"
+    size = retained(load, semester_json)
+    benchmark.extra_info["bytes_per_course"] = size / COURSES
+    benchmark(load, semester_json)
+
+
+def test_slotted_is_smaller(semester_json):
+    assert retained(slotted_load, semester_json) < retained(legacy_load, semester_json)
@@ -0,0 +1,162 @@
+"""The parse pipeline, on a full synthetic page of search results.
+
+Parser-backed benchmarks are parametrized by bs4 tree builder, and grouped by
+function, so ``pytest bench --benchmark-group-by=group`` compares them.
+"""
+
+import importlib.util
+import io
+import json
+
+import pytest
+
+from brandeis_classes import brandeis, serialize
+
+PARSERS = [
+    pytest.param(
+        parser,
+        marks=pytest.mark.skipif(
+            parser == "lxml" and importlib.util.find_spec("lxml") is None,
+            reason="lxml not installed",
+        ),
+    )
+    for parser in brandeis.PARSERS
+]
+
+
+@pytest.fixture(scope="module")
+def courses(page):
+    return brandeis.page_to_courses(page, request_description=False)
+
+
+def course_tds(page, parser):
+    soup = brandeis.make_soup(page, parser)
+    return [
+        tds
+        for tds in map(brandeis.tr_is_course, soup.find_all("tr"))
+        if tds is not None
+    ]
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_page_to_courses(benchmark, page, parser):
+    benchmark.group = "page_to_courses"
+    courses = benchmark(
+        brandeis.page_to_courses, page, request_description=False, parser=parser
+    )
+    assert len(courses) == 100
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_iter_courses(benchmark, page, parser):
+    benchmark.group = "iter_courses"
+    benchmark(
+        lambda: list(
+            brandeis.iter_courses(page, request_description=False, parser=parser)
+        )
+    )
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_make_soup(benchmark, page, parser):
+    benchmark.group = "make_soup"
+    benchmark(brandeis.make_soup, page, parser)
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_tr_to_course(benchmark, page, parser):
+    soup = brandeis.make_soup(page, parser)
+    trs = [tr for tr in soup.find_all("tr") if brandeis.tr_is_course(tr)]
+    benchmark.group = "tr_to_course"
+    benchmark(
+        lambda: [brandeis.tr_to_course(tr, request_description=False) for tr in trs]
+    )
+
+
+def field_by_field(tds):
+    """A row decoded with a separate search per field, as ``tds_to_course``
+    used to; the baseline for ``decode_row``.
+    """
+    class_number, course_id, title_reqs, time_location, enrollment, instructor = tds[:6]
+    subject, number, group, section = brandeis.course_ids(course_id)
+    enrolled, limit, waiting = brandeis.enrollment_info(enrollment)
+    course = brandeis.Course(
+        name=title_reqs.find("strong").text.strip(),
+        class_number=int(class_number.text),
+        subject=subject,
+        number=number,
+        group=group,
+        section=section,
+        schedule=brandeis.parse_times(time_location),
+        enrollment_status=brandeis.enrollment_status(enrollment),
+        enrolled=enrolled,
+        limit=limit,
+        waiting=waiting,
+        syllabus=brandeis.syllabus(course_id),
+        instructors=brandeis.instructor_info(instructor),
+        description=None,
+        notes=brandeis.course_notes(title_reqs),
+        uni_reqs=brandeis.uni_reqs(title_reqs),
+        semester=None,
+        year=None,
+    )
+    return course, brandeis.description_url(course_id)
+
+
+DECODERS = {"single_pass": brandeis.decode_row, "field_by_field": field_by_field}
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+@pytest.mark.parametrize("decoder", list(DECODERS))
+def test_decode_row(benchmark, page, parser, decoder):
+    rows = course_tds(page, parser)
+    decode = DECODERS[decoder]
+    benchmark.group = f"decode_row-{parser}"
+    decoded = benchmark(lambda: [decode(tds) for tds in rows])
+    assert decoded == [field_by_field(tds) for tds in rows]
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_parse_times(benchmark, page, parser):
+    time_locations = [tds[3] for tds in course_tds(page, parser)]
+    benchmark.group = "parse_times"
+    benchmark(lambda: [brandeis.parse_times(td) for td in time_locations])
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_course_notes(benchmark, page, parser):
+    title_reqs = [tds[2] for tds in course_tds(page, parser)]
+    benchmark.group = "course_notes"
+    benchmark(lambda: [brandeis.course_notes(td) for td in title_reqs])
+
+
+def test_dict(benchmark, courses):
+    benchmark.group = "Course.dict"
+    benchmark(lambda: [c.dict() for c in courses])
+
+
+def test_from_dict(benchmark, courses):
+    dicts = [c.dict() for c in courses]
+    benchmark.group = "Course.from_dict"
+    benchmark(lambda: [brandeis.Course.from_dict(d) for d in dicts])
+
+
+@pytest.mark.parametrize("encoder", list(serialize.ENCODERS))
+def test_dumps(benchmark, courses, encoder):
+    dumps = serialize.encoder(encoder).dumps
+    benchmark.group = "serialize.dumps"
+    benchmark(lambda: [dumps(c) for c in courses])
+
+
+@pytest.mark.parametrize("encoder", list(serialize.ENCODERS))
+@pytest.mark.parametrize("fmt", ["json", "jsonl"])
+def test_load_courses(benchmark, courses, fmt, encoder):
+    # a semester's worth
+    dicts = [c.dict() for c in courses] * 20
+    if fmt == "json":
+        text = json.dumps(dicts, indent=2)
+    else:
+        text = "".join(json.dumps(d) + "\n" for d in dicts)
+    benchmark.group = "load_courses"
+    loaded = benchmark(lambda: brandeis.load_courses(io.StringIO(text), encoder))
+    assert len(loaded) == len(dicts)
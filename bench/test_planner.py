@@ -0,0 +1,59 @@
+"""``planner.ScheduleBuilder`` at the size students actually ask for: up to ten
+courses with several sections each, in the registrar's usual time blocks.
+"""
+
+import itertools
+import random
+
+import pytest
+
+from brandeis_classes import planner
+from brandeis_classes.brandeis import CourseTime
+
+BLOCKS = [
+    "M,W,Th 9:00 AM–9:50 AM",
+    "M,W,Th 10:00 AM–10:50 AM",
+    "M,W,Th 11:00 AM–11:50 AM",
+    "M,W,Th 12:00 PM–12:50 PM",
+    "M,W 2:00 PM–3:20 PM",
+    "M,W 3:30 PM–4:50 PM",
+    "M,W 5:00 PM–6:20 PM",
+    "T,F 9:30 AM–10:50 AM",
+    "T,F 11:00 AM–12:20 PM",
+    "T,Th 2:00 PM–3:20 PM",
+    "T,Th 3:30 PM–4:50 PM",
+    "T,Th 5:00 PM–6:20 PM",
+    "W 2:00 PM–4:50 PM",
+    "F 2:00 PM–4:50 PM",
+]
+
+
+def candidates(make_course, courses=10, sections=6, seed=0):
+    rng = random.Random(seed)
+    return [
+        make_course(
+            number=number,
+            section=str(section + 1),
+            schedule=[CourseTime(None, rng.choice(BLOCKS), None, None)],
+        )
+        for number in range(courses)
+        for section in range(sections)
+    ]
+
+
+@pytest.mark.parametrize("courses", [4, 8, 10])
+def test_count(benchmark, make_course, courses):
+    sections = candidates(make_course, courses=courses)
+    benchmark.group = "planner count"
+    benchmark(lambda: planner.ScheduleBuilder(sections).count())
+
+
+@pytest.mark.parametrize("courses", [4, 8, 10])
+def test_first_thousand(benchmark, make_course, courses):
+    sections = candidates(make_course, courses=courses)
+    benchmark.group = "planner schedules"
+    benchmark(
+        lambda: list(
+            itertools.islice(planner.ScheduleBuilder(sections).schedules(), 1000)
+        )
+    )
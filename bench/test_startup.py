@@ -0,0 +1,30 @@
+"""How long a fresh interpreter takes to import each entry point.
+
+``python -X importtime -c 'import brandeis_classes.model'`` breaks any of
+these down by module.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+MODULES = [
+    "brandeis_classes",
+    "brandeis_classes.model",
+    "brandeis_classes.dataset",
+    "brandeis_classes.search",
+    "brandeis_classes.brandeis",
+    "brandeis_classes.scrape_courses",
+]
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_import(benchmark, module):
+    benchmark.group = "startup"
+    benchmark.pedantic(
+        subprocess.run,
+        args=([sys.executable, "-c", f"import {module}"],),
+        kwargs=dict(check=True),
+        rounds=10,
+    )
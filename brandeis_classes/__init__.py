@@ -1,6 +1,47 @@
 """Scrapes Brandeis University course data.
+
+Submodules are imported the first time they're used (``brandeis_classes.brandeis``
+imports bs4 and requests, ``analytics`` numpy, and so on), so importing the
+package, or just the data model in ``model``, stays quick.
 """
 
-from . import brandeis, constants
+import importlib
 
 __version__ = "1.0.0"
+
+SUBMODULES = frozenset(
+    [
+        "analytics",
+        "archive",
+        "brandeis",
+        "bulk",
+        "client",
+        "columnar",
+        "constants",
+        "dataset",
+        "descriptions",
+        "index",
+        "meta_scrape",
+        "metrics",
+        "model",
+        "output",
+        "planner",
+        "ratelimit",
+        "refresh",
+        "schedule",
+        "scrape_courses",
+        "search",
+        "serialize",
+        "timeseries",
+    ]
+)
+
+
+def __getattr__(name):
+    if name in SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | SUBMODULES)
@@ -0,0 +1,186 @@
+"""Vectorized aggregations over many semesters of courses.
+
+``CourseFrame`` keeps the handful of columns ``course_science`` aggregates over
+as NumPy arrays, with semesters and subjects as integer category codes. Each
+of its methods mirrors the ``course_science`` function of the same name (and
+returns the same thing), but as a single grouped pass (``np.bincount``) rather
+than a loop over every course per subject.
+
+Requires ``numpy``.
+"""
+
+from collections import Counter
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from . import columnar, constants
+from .model import Course
+
+
+class CourseFrame:
+    """A few columns of many semesters of courses.
+    """
+
+    def __init__(
+        self,
+        semesters: List[str],
+        subjects: List[str],
+        semester: np.ndarray,
+        subject: np.ndarray,
+        number: np.ndarray,
+        enrolled: np.ndarray,
+        limit: np.ndarray,
+        waiting: np.ndarray,
+    ):
+        # categories; ``semester`` and ``subject`` are codes into these
+        self.semesters = semesters
+        self.subjects = subjects
+        self.subject_codes = {subj: i for i, subj in enumerate(subjects)}
+
+        self.semester = semester
+        self.subject = subject
+        self.number = number
+        self.enrolled = enrolled
+        self.limit = limit
+        self.waiting = waiting
+
+    @staticmethod
+    def from_courses(courses: Mapping[str, Sequence[Course]]) -> "CourseFrame":
+        """Builds a frame from ``course_science.all_courses()``-style data.
+        """
+        subject_codes: Dict[str, int] = {}
+        semester = []
+        subject = []
+        number = []
+        enrolled = []
+        limit = []
+        waiting = []
+        for i, crss in enumerate(courses.values()):
+            semester.extend([i] * len(crss))
+            for c in crss:
+                subject.append(subject_codes.setdefault(c.subject, len(subject_codes)))
+                number.append(c.number)
+                enrolled.append(c.enrolled)
+                limit.append(c.limit)
+                waiting.append(c.waiting)
+
+        return CourseFrame(
+            semesters=list(courses),
+            subjects=list(subject_codes),
+            semester=np.array(semester, dtype=np.int32),
+            subject=np.array(subject, dtype=np.int32),
+            number=np.array(number, dtype=np.int32),
+            enrolled=np.array(enrolled, dtype=np.int64),
+            limit=np.array(limit, dtype=np.int64),
+            waiting=np.array(waiting, dtype=np.int64),
+        )
+
+    @staticmethod
+    def from_tables(tables: Mapping[str, columnar.CourseTable]) -> "CourseFrame":
+        """Builds a frame from columnar tables, without any ``Course`` objects.
+        """
+        subject_codes: Dict[str, int] = {}
+        semester = []
+        subject = []
+        for i, table in enumerate(tables.values()):
+            semester.append(np.full(len(table), i, dtype=np.int32))
+            codes, dictionary = table.categorical("subject")
+            # translate the table's codes into ours
+            ours = np.array(
+                [subject_codes.setdefault(s, len(subject_codes)) for s in dictionary],
+                dtype=np.int32,
+            )
+            subject.append(ours[codes] if len(ours) else codes.astype(np.int32))
+
+        def column(name, dtype):
+            return np.concatenate(
+                [np.asarray(t.ints(name), dtype=dtype) for t in tables.values()]
+                or [np.zeros(0, dtype=dtype)]
+            )
+
+        return CourseFrame(
+            semesters=list(tables),
+            subjects=list(subject_codes),
+            semester=np.concatenate(semester or [np.zeros(0, dtype=np.int32)]),
+            subject=np.concatenate(subject or [np.zeros(0, dtype=np.int32)]),
+            number=column("number", np.int32),
+            enrolled=column("enrolled", np.int64),
+            limit=column("limit", np.int64),
+            waiting=column("waiting", np.int64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.semester)
+
+    def _subject_mask(self, subj: Optional[str]) -> Optional[np.ndarray]:
+        if subj is None:
+            return None
+        code = self.subject_codes.get(subj, -1)
+        return self.subject == code
+
+    def _by_semester(self, mask=None, weights=None) -> np.ndarray:
+        semester = self.semester if mask is None else self.semester[mask]
+        if weights is not None and mask is not None:
+            weights = weights[mask]
+        return np.bincount(semester, weights=weights, minlength=len(self.semesters))
+
+    def _by_semester_subject(self, weights=None) -> np.ndarray:
+        """A (semester, subject) table of counts or sums.
+        """
+        n = len(self.subjects)
+        return np.bincount(
+            self.semester.astype(np.int64) * n + self.subject,
+            weights=weights,
+            minlength=len(self.semesters) * n,
+        ).reshape(len(self.semesters), n)
+
+    def total_courses_per_subject(self) -> Dict[str, int]:
+        counts = np.bincount(self.subject, minlength=len(self.subjects))
+        return {subj: int(count) for subj, count in zip(self.subjects, counts.tolist())}
+
+    def courses_per_subject(self) -> Dict[str, Counter]:
+        table = self._by_semester_subject()
+        return {
+            sem: Counter(
+                {self.subjects[j]: int(row[j]) for j in np.flatnonzero(row).tolist()}
+            )
+            for sem, row in zip(self.semesters, table)
+        }
+
+    def courses_per_semester(self, subj=None) -> Dict[str, int]:
+        counts = self._by_semester(self._subject_mask(subj))
+        return dict(zip(self.semesters, map(int, counts.tolist())))
+
+    def students_per_semester(self, subj=None) -> Dict[str, int]:
+        sums = self._by_semester(self._subject_mask(subj), self.enrolled)
+        return dict(zip(self.semesters, map(int, sums.tolist())))
+
+    def students_per_class(self) -> Dict[str, float]:
+        positive = self.enrolled > 0
+        subject = self.subject[positive]
+        counts = np.bincount(subject, minlength=len(self.subjects)).tolist()
+        sums = np.bincount(
+            subject, weights=self.enrolled[positive], minlength=len(self.subjects)
+        ).tolist()
+        ret = {}
+        for subj in constants.SUBJECTS:
+            code = self.subject_codes.get(subj)
+            if code is not None and counts[code]:
+                ret[subj] = int(sums[code]) / counts[code]
+        return ret
+
+    def students_per_class_total(self) -> float:
+        positive = self.enrolled[self.enrolled > 0]
+        return int(positive.sum()) / len(positive)
+
+    def student_enrollments(self) -> Dict[str, Dict[str, int]]:
+        sums = self._by_semester_subject(self.enrolled).tolist()
+        codes = [self.subject_codes.get(subj) for subj in constants.SUBJECTS]
+        return {
+            sem: {
+                subj: int(row[code]) if code is not None else 0
+                for subj, code in zip(constants.SUBJECTS, codes)
+            }
+            for sem, row in zip(self.semesters, sums)
+        }
@@ -0,0 +1,301 @@
+"""A compressed archive of the registrar's responses, for re-parsing offline.
+
+Scraping the registrar is the slowest, most rate-limited part of the pipeline,
+and a parser fix (or a new field) used to mean scraping it all over again. A
+client with an archive (``brandeis_scrape_courses --archive DIR``) keeps every
+search page and description page it downloads, and ``brandeis_reparse``
+rebuilds ``out/{year}-{semester}.json`` from them without any network access.
+
+Response bodies are stored once each, zstd-compressed and named by their
+SHA-256, in ``objects/ab/cdef....zst``; ``index.jsonl`` records each response
+(when, the URL, its query parameters, and the body's hash), one per line.
+
+Needs ``zstandard``.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from termcolor import colored
+
+from . import brandeis, bulk, constants, descriptions, scrape_courses, serialize
+from .descriptions import DescriptionCache, DescriptionFetcher
+from .output import FORMATS, SemesterOutput
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # type: ignore
+
+DEFAULT_DIR = os.path.join("out", "archive")
+INDEX = "index.jsonl"
+# zstd's default; the pages are mostly the same boilerplate, so higher levels
+# don't buy much
+LEVEL = 3
+
+
+def strm_semester(strm: int) -> Tuple[int, str]:
+    """The inverse of ``brandeis.strm``, for years from 2000 on.
+    """
+    return 2000 + (strm // 10) % 100, constants.SEMESTERS[strm % 10 - 1]
+
+
+def object_path(directory: str, digest: str) -> str:
+    return os.path.join(directory, "objects", digest[:2], digest[2:] + ".zst")
+
+
+def read_object(directory: str, digest: str) -> bytes:
+    """An archived body, without loading the archive's index.
+    """
+    with open(object_path(directory, digest), "rb") as f:
+        return zstandard.ZstdDecompressor().decompress(f.read())
+
+
+class ResponseArchive:
+    """A directory of archived responses; safe to share between threads.
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIR, level: int = LEVEL):
+        if zstandard is None:
+            raise ImportError("The response archive needs zstandard installed")
+        self.directory = directory
+        self.level = level
+        self.index_path = os.path.join(directory, INDEX)
+        self._lock = threading.Lock()
+        self.entries: List[dict] = []
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self.entries.append(json.loads(line))
+                    except ValueError:
+                        # cut off by a crash
+                        pass
+
+    def object_path(self, digest: str) -> str:
+        return object_path(self.directory, digest)
+
+    def put(self, data: bytes) -> str:
+        """Stores ``data`` (if it isn't already); returns its hash.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            compressed = zstandard.ZstdCompressor(level=self.level).compress(data)
+            # another thread might be writing the same object
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(compressed)
+            os.replace(tmp, path)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        return read_object(self.directory, digest)
+
+    def text(self, digest: str) -> str:
+        return self.get(digest).decode("utf-8")
+
+    def record(self, url: str, params: Optional[dict], text: str) -> str:
+        """Archives a response's body; returns its hash.
+        """
+        data = text.encode("utf-8")
+        entry = {
+            "time": time.time(),
+            "url": url,
+            "params": params,
+            "sha256": self.put(data),
+            "size": len(data),
+        }
+        with self._lock:
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            self.entries.append(entry)
+        return entry["sha256"]
+
+    def _search_entries(self):
+        for entry in self.entries:
+            params = entry["params"]
+            if params and "strm" in params and "page" in params:
+                yield int(params["strm"]), int(params["page"]), entry["sha256"]
+
+    def semesters(self) -> List[Tuple[int, str]]:
+        """The semesters with archived search pages, in order.
+        """
+        strms = sorted({strm for strm, _, _ in self._search_entries()})
+        return [strm_semester(strm) for strm in strms]
+
+    def search_pages(self, year: int, semester: str) -> Dict[int, str]:
+        """The latest archived copy of each of a semester's search pages: page
+        number -> hash.
+
+        Pages past the last one in the first page's pager (left over from an
+        older scrape) are dropped.
+        """
+        strm = brandeis.strm(year, semester)
+        pages = {}
+        for entry_strm, pg, digest in self._search_entries():
+            if entry_strm == strm:
+                pages[pg] = digest
+        if 1 in pages:
+            high = max(brandeis.page_numbers(self.text(pages[1])), default=1)
+            pages = {pg: digest for pg, digest in pages.items() if pg <= high}
+        return pages
+
+    def descriptions(self) -> Dict[str, str]:
+        """The latest archived copy of each description page: URL -> hash.
+        """
+        return {
+            entry["url"]: entry["sha256"]
+            for entry in self.entries
+            if not entry["params"]
+        }
+
+
+class ArchivedDescriptions(DescriptionFetcher):
+    """A ``DescriptionFetcher`` that never touches the network.
+
+    Descriptions are parsed from their archived pages, or else looked up in
+    ``cache`` (a description that was cached when the semester was scraped was
+    never downloaded, so it's not in the archive); if neither has one, it's
+    None, and counted in ``missing``.
+    """
+
+    def __init__(
+        self, archive: ResponseArchive, cache: Optional[DescriptionCache] = None
+    ):
+        # parsing is CPU-bound; more threads wouldn't help
+        super().__init__(None, jobs=1)
+        self.archive = archive
+        self.fallback = cache
+        self.urls = archive.descriptions()
+        self.missing = 0
+
+    def _fetch(self, url: str) -> Optional[str]:
+        digest = self.urls.get(url)
+        if digest is not None:
+            return brandeis.parse_description(self.archive.text(digest))
+        found = self.fallback.get(url) if self.fallback is not None else None
+        if found is None:
+            self.missing += 1
+        return found
+
+
+def reparse(
+    year: int,
+    semester: str,
+    archive: ResponseArchive,
+    cache: Optional[DescriptionCache] = None,
+    outdir: str = "out",
+    fmt: str = "json",
+    pretty: bool = False,
+    encoder: Optional[str] = None,
+) -> Tuple[int, int]:
+    """Rebuilds ``{outdir}/{year}-{semester}.{fmt}`` from the archive.
+
+    Returns the number of courses written, and the number of descriptions
+    that were neither archived nor cached (those courses' are None).
+    """
+    pages = archive.search_pages(year, semester)
+    if not pages:
+        raise KeyError(f"No search pages archived for {year} {semester}")
+    out = SemesterOutput(year, semester, fmt, outdir, pretty=pretty, encoder=encoder)
+    with ArchivedDescriptions(archive, cache) as fetcher:
+        for pg, digest in sorted(pages.items()):
+            courses = scrape_courses.page_courses(
+                archive.text(digest), year, semester, fetcher
+            )
+            out.write_page(pg, courses)
+    return out.finish(), fetcher.missing
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="""Rebuilds scraped semesters from the archived registrar
+        responses, without any network access"""
+    )
+    parser.add_argument(
+        "--archive",
+        default=DEFAULT_DIR,
+        help=f"""The archive directory (default {DEFAULT_DIR})""",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="""Number of processes to parse with; 0 for one per core""",
+    )
+    parser.add_argument(
+        "--description-cache",
+        default=descriptions.DEFAULT_CACHE,
+        help=f"""Cache file for descriptions that weren't archived (default
+        {descriptions.DEFAULT_CACHE}); pass an empty string to disable""",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=FORMATS,
+        default="json",
+        help="""Output format; a JSON array, or JSON Lines (default json)""",
+    )
+    parser.add_argument(
+        "--pretty", action="store_true", help="""Indent the JSON array""",
+    )
+    parser.add_argument(
+        "--encoder", choices=list(serialize.ENCODERS), help="""JSON encoder""",
+    )
+    parser.add_argument(
+        "year",
+        type=int,
+        nargs="?",
+        help="""Only this year (default every archived semester)""",
+    )
+    parser.add_argument("semester", nargs="?", choices=constants.SEMESTERS)
+    args = parser.parse_args()
+
+    if (args.year is None) != (args.semester is None):
+        parser.error("Give both a year and a semester, or neither")
+    if args.jobs < 0:
+        parser.error("--jobs can't be negative")
+
+    archive = ResponseArchive(args.archive)
+    if args.year is None:
+        semesters = archive.semesters()
+    else:
+        semesters = [(args.year, args.semester)]
+    cache = (
+        DescriptionCache(args.description_cache)
+        if args.description_cache and os.path.exists(args.description_cache)
+        else None
+    )
+
+    os.makedirs("out", exist_ok=True)
+    options = dict(fmt=args.format, pretty=args.pretty, encoder=args.encoder)
+    if args.jobs == 1:
+        results = (
+            ((year, semester), reparse(year, semester, archive, cache, **options))
+            for year, semester in semesters
+        )
+    else:
+        results = bulk.bulk_reparse(
+            archive, semesters, args.jobs or None, cache, **options
+        ).items()
+    for (year, semester), (rows, missing) in results:
+        print(
+            colored(f"{year} {semester}", attrs=["bold"]),
+            f"{rows} courses",
+            colored(f"({missing} descriptions missing)", "yellow") if missing else "",
+        )
+    if cache is not None:
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,43 @@
+import codecs
 import functools
+import html
+import io
 import itertools
-import json
+import os
 import re
-from collections import namedtuple
-from dataclasses import dataclass
-from typing import Iterable, List, Optional, Tuple, cast
+from collections import deque
+from concurrent.futures import Future
+from html.parser import HTMLParser
+from typing import Deque, Iterable, List, Optional, Set, Tuple, cast
 
 import bs4
-import requests
 
-from . import constants
+from . import constants, descriptions, metrics
+from .client import HTTPClient, default_client
+
+# the data model lives in model, so it can be used without bs4 and requests
+from .model import (  # noqa: F401
+    Course,
+    CourseTime,
+    Instructor,
+    intern_str,
+    load_courses,
+)
+
+# bs4 tree builders we know give identical results; lxml is much faster, but
+# not installed everywhere
+PARSERS = ("html.parser", "lxml")
+DEFAULT_PARSER = "html.parser"
+PARSER_ENV = "BRANDEIS_PARSER"
+# characters of HTML to read at a time in iter_courses
+CHUNK_SIZE = 1 << 16
+
+# e.g. 119A -> 119, A
+COURSE_NUMBER_RE = re.compile(r"(\d+)([^0-9]*)")
+# watch the single quotes!
+DESCRIPTION_RE = re.compile(r"'(course?[^']+)'")
+DESCRIPTION_BASE = "http://registrar-prod.unet.brandeis.edu/registrar/schedule/"
+EMPLID_RE = re.compile(r"emplid=([0-9a-f]+)")
 
 
 class Unreachable(RuntimeError):
@@ -19,131 +47,22 @@ class Unreachable(RuntimeError):
     """
 
 
-@dataclass
-class CourseTime:
-    block: str
-    times: str
-    location: str
-    info: str
-
-    def dict(self):
-        # useful for encoding as JSON
-        return self.__dict__.copy()
-
-
-@dataclass
-class Instructor:
-    name: str
-    # actually a hash, i think; but a unique identifier of some sort
-    id: str
-
-    def __str__(self):
-        return self.name
-
-    def dict(self):
-        # useful for encoding as JSON
-        return self.__dict__.copy()
-
-
-@dataclass
-class Course:
-    # e.g. Modal, Temporal, and Spatial Logic for Language
-    name: str
-    # e.g. 16903; registration number for sage
-    class_number: int
-
-    # subject, number, and group form parts of the course's "display name"
-    # an example is COSI 118A_1, where the trailing "1" is a section number
-    # e.g. COSI
-    subject: str
-    # e.g. 118
-    number: int
-    # e.g. a, b, c, ...
-    group: str
-    # 1, 2, 3...
-    # SOMETIMES (ED 285 1DL) something weird like '1DL'
-    section: str
-
-    # weirdly formatted; maybe consistent? parsing this is a job for later
-    schedule: List[CourseTime]
-
-    # enrollment
-    enrolled: int
-    limit: int
-    waiting: int
-    # open, closed, consent req., etc. that kinda thing
-    enrollment_status: str
-
-    # syllabus link
-    syllabus: str
-    # instructor(s); a list
-    instructors: List[Instructor]
-    # fulfills which requirements?
-    uni_reqs: List[str]
-    # long description; might include frequencies and prerequisites
-    description: Optional[str]
-    # notes below course title, might include notes on prereqs, etc.
-    notes: str
-
-    semester: Optional[str]
-    year: Optional[int]
-
-    @property
-    def title(self) -> str:
-        """An alias for ``self.name``
-        """
-        return self.name
-
-    @property
-    def instructor_links(self) -> Iterable[str]:
-        """URLs linking to each instructor.
-        """
-        return (
-            "https://www.brandeis.edu/facguide/person.html?emplid={instructor.id}"
-            for instructor in self.instructors
-        )
+def html_parser(parser: Optional[str] = None) -> str:
+    """Picks the HTML parser backend.
 
-    @property
-    def friendly_number(self) -> str:
-        """User-friendly course number.
-        """
-        return f"{self.subject} {self.number}{self.group}" + (
-            f"_{self.section}" if self.section else ""
+    ``parser`` if given, else the ``BRANDEIS_PARSER`` environment variable,
+    else ``DEFAULT_PARSER``; one of ``PARSERS``.
+    """
+    parser = parser or os.environ.get(PARSER_ENV) or DEFAULT_PARSER
+    if parser not in PARSERS:
+        raise ValueError(
+            f"Unknown HTML parser {parser!r}; expected one of {', '.join(PARSERS)}"
         )
+    return parser
 
-    @property
-    def uni_reqs_str(self) -> str:
-        """Requirements-description string.
-        """
-        return ("[" + ", ".join(self.uni_reqs) + "]") if self.uni_reqs else ""
-
-    @property
-    def instructor_str(self) -> str:
-        """Instructor string.
-        """
-        return "; ".join(map(str, self.instructors)) if self.instructors else ""
-
-    def dict(self):
-        ret = self.__dict__.copy()
-        if ret["schedule"]:
-            ret["schedule"] = [ct.dict() for ct in ret["schedule"]]
-        if ret["instructors"]:
-            ret["instructors"] = [i.dict() for i in ret["instructors"]]
-        return ret
-
-    @staticmethod
-    def from_dict(d):
-        ret = Course(**d)
-        if ret.schedule:
-            ret.schedule = [CourseTime(**s) for s in ret.schedule]
-        if ret.instructors:
-            ret.instructors = [Instructor(**i) for i in ret.instructors]
-        return ret
-
-    def __str__(self):
-        return f"{self.friendly_number} {self.name} ({self.instructor_str})" + (
-            f" {self.uni_reqs_str}" if self.uni_reqs else ""
-        )
+
+def make_soup(html, parser: Optional[str] = None) -> bs4.BeautifulSoup:
+    return bs4.BeautifulSoup(html, html_parser(parser))
 
 
 def parse_times(time_location: bs4.element.Tag) -> List[CourseTime]:
@@ -227,33 +146,51 @@ def multiline_text(els: Iterable) -> str:
     return "".join(ret).strip()
 
 
-def course_description(td: bs4.element.Tag) -> str:
-    href = td.find("a")["href"]
+def description_url(td: bs4.element.Tag) -> Optional[str]:
+    a = td.find("a")
+    return _description_url(a["href"] if a is not None else None)
+
+
+def _description_url(href: Optional[str]) -> Optional[str]:
+    """The description page a course's link opens, or None if it has none.
+    """
+    match = DESCRIPTION_RE.search(href) if href is not None else None
+    if match is None:
+        return None
     # we know what the slashes are gonna look like, so no need for urljoin
-    url = (
-        "http://registrar-prod.unet.brandeis.edu/registrar/schedule/"
-        # watch the single quotes!
-        + cast(re.Match, re.search(r"'(course?[^']+)'", href)).group(1)
-    )
-    req = requests.get(url)
-    if not req.ok:
-        raise requests.exceptions.HTTPError
-    soup = bs4.BeautifulSoup(req.text, "html.parser")
+    return DESCRIPTION_BASE + match.group(1)
 
+
+def parse_description(html: str, parser: Optional[str] = None) -> str:
+    """The description on a course's description page.
+    """
+    soup = make_soup(html, parser)
     return multiline_text(soup.find("p").children)
 
 
-def syllabus(td: bs4.element.Tag) -> str:
+def fetch_description(
+    url: str, parser: Optional[str] = None, client: Optional[HTTPClient] = None
+) -> str:
+    client = client if client is not None else default_client()
+    return parse_description(client.get_text(url), parser)
+
+
+def syllabus(td: bs4.element.Tag) -> Optional[str]:
     for a in td.find_all("a"):
         if "Syllabus" in a.text:
             return a["href"]
 
-    raise Unreachable
+    # plenty of courses don't post one
+    return None
 
 
 def course_ids(td: bs4.element.Tag) -> Tuple[str, int, str, str]:
-    subject, number, section, *_ = td.text.split()
-    number, group = cast(re.Match, re.match(r"(\d+)([^0-9]*)", number)).groups()
+    return _course_ids(td.text)
+
+
+def _course_ids(text: str) -> Tuple[str, int, str, str]:
+    subject, number, section, *_ = text.split()
+    number, group = cast(re.Match, COURSE_NUMBER_RE.match(number)).groups()
     return subject, int(number), group, section
 
 
@@ -302,17 +239,13 @@ def enrollment_status(td: bs4.element.Tag):
 def instructor_info(td: bs4.element.Tag) -> List[Instructor]:
     """returns name, id tuple"""
 
-    def instructor_id(a):
-        return re.search(r"emplid=([0-9a-f]+)", a["href"]).group(1)
+    return [_instructor(a) for a in td.find_all("a")]
 
-    instructors = td.find_all("a")
-    if not instructors:
-        return []
-    else:
-        return [
-            Instructor(name=" ".join(a.text.split()), id=instructor_id(a))
-            for a in instructors
-        ]
+
+def _instructor(a: bs4.element.Tag) -> Instructor:
+    return Instructor(
+        name=" ".join(a.text.split()), id=EMPLID_RE.search(a["href"]).group(1)
+    )
 
 
 def tr_is_course(tr: bs4.element.Tag) -> List[bs4.element.Tag]:
@@ -337,7 +270,92 @@ def tr_to_course(tr: bs4.element.Tag, request_description=True) -> Optional[Cour
     tds = tr_is_course(tr)
     if not tds:
         return None
+    return tds_to_course(tds, request_description)
+
+
+def tds_to_course(tds: List[bs4.element.Tag], request_description=True) -> Course:
+    """builds a course from the tds returned by ``tr_is_course``"""
+    course, url = decode_row(tds)
+    if request_description and url is not None:
+        course.description = fetch_description(url)
+    return course
+
+
+# the strings Tag.text joins
+_TEXT_TYPES = (bs4.element.NavigableString, bs4.element.CData)
+
+
+def _decode_course_id(td: bs4.element.Tag):
+    """``course_ids``, ``syllabus``, and ``description_url``, in one walk.
+    """
+    strings = []
+    href = None
+    syllabus_href = None
+    for el in td.descendants:
+        if type(el) in _TEXT_TYPES:
+            strings.append(el)
+        elif el.name == "a":
+            if href is None:
+                href = el["href"]
+            if syllabus_href is None and "Syllabus" in el.text:
+                syllabus_href = el["href"]
+    return _course_ids("".join(strings)), syllabus_href, _description_url(href)
+
+
+def _decode_title(td: bs4.element.Tag):
+    """The title, ``uni_reqs``, and ``course_notes``, in one walk.
+    """
+    name = None
+    reqs = []
+    # positions among td's children of the first "]" and the first <strong>;
+    # the notes come after the first, or the second if there aren't any reqs
+    close = strong = None
+    i = -1
+    for el in td.descendants:
+        child = el.parent is td
+        if child:
+            i += 1
+        if isinstance(el, str):
+            if child and close is None and el.strip() == "]":
+                close = i
+        elif el.name == "strong":
+            if name is None:
+                name = el.text.strip()
+            if child and strong is None:
+                strong = i
+        elif el.name == "span" and "requirement" in el.get("class", ()):
+            reqs.append(el.text.strip())
+
+    start = close if reqs else strong
+    notes = None
+    if start is not None:
+        notes = multiline_text(td.contents[start + 1 :])
+        if not notes.strip():
+            notes = None
+    return name, reqs, notes
+
+
+def _decode_enrollment(td: bs4.element.Tag):
+    """``enrollment_info`` and ``enrollment_status``.
+    """
+    # last string in enrollment is like '4 / 10 / 0'
+    # underscores ignore the slashes
+    enrolled, _, limit, _, waiting = td.contents[-1].split()
+    status = None
+    for el in td.descendants:
+        if el.name == "span":
+            status = el
+            break
+    return int(enrolled), int(limit), int(waiting), " ".join(status.text.split())
+
+
+def decode_row(tds: List[bs4.element.Tag]) -> Tuple[Course, Optional[str]]:
+    """Builds a course (without its description) from the tds returned by
+    ``tr_is_course``; returns it and its description URL, or None if the row
+    doesn't link to one.
 
+    Each td is walked once, rather than searched once per field.
+    """
     # GHHFHJHFGHJDHBKLDHJKGSDFGKJ
     (
         class_number,
@@ -346,22 +364,15 @@ def tr_to_course(tr: bs4.element.Tag, request_description=True) -> Optional[Cour
         time_location,
         enrollment,
         instructor,
-        *rest,
+        *_books,
     ) = tds
 
-    if rest:
-        _books, *_ = rest
-
-    subject, number, group, section = course_ids(course_id)
-
-    name = title_reqs.find("strong").text.strip()
-    reqs = uni_reqs(title_reqs)
-
-    enrolled, limit, waiting = enrollment_info(enrollment)
-
-    instructors = instructor_info(instructor)
+    (subject, number, group, section), syllabus_href, url = _decode_course_id(course_id)
+    name, reqs, notes = _decode_title(title_reqs)
+    enrolled, limit, waiting, status = _decode_enrollment(enrollment)
+    instructors = [_instructor(el) for el in instructor.descendants if el.name == "a"]
 
-    return Course(
+    course = Course(
         name=name,
         class_number=int(class_number.text),
         subject=subject,
@@ -369,18 +380,19 @@ def tr_to_course(tr: bs4.element.Tag, request_description=True) -> Optional[Cour
         group=group,
         section=section,
         schedule=parse_times(time_location),
-        enrollment_status=enrollment_status(enrollment),
+        enrollment_status=status,
         enrolled=enrolled,
         limit=limit,
         waiting=waiting,
-        syllabus=syllabus(course_id),
+        syllabus=syllabus_href,
         instructors=instructors,
-        description=course_description(course_id) if request_description else None,
-        notes=course_notes(title_reqs),
+        description=None,
+        notes=notes,
         uni_reqs=reqs,
         semester=None,  # TODO this shouldn't be None
         year=None,  # TODO this shouldn't be None
     )
+    return course, url
 
 
 def is_tag(tag, name=None):
@@ -391,18 +403,257 @@ def tag_filter(name):
     return functools.partial(is_tag, name=name)
 
 
-def page_to_courses(html, request_description=True):
-    soup = bs4.BeautifulSoup(html, "html.parser")
-    table = soup.find("table", id="classes-list")
-    if not table:
-        # couldnt find a good table, try anyways
-        table = soup
-    trs = filter(tag_filter("tr"), table.children)
-    # return list(trs)
-    tr_fn = tr_to_course
-    if not request_description:
-        tr_fn = functools.partial(tr_to_course, request_description=False)
-    return list(filter(None, map(tr_fn, trs)))
+def page_rows(
+    html, parser=None, pages: Optional[Set[int]] = None
+) -> Tuple[List[Course], List[Optional[str]]]:
+    """A page's courses, without descriptions, and their description URLs (None
+    for rows without one).
+
+    pages: a set; the page numbers linked from the page's pager are added to
+    it
+    """
+    with metrics.timer("parse_page"):
+        soup = make_soup(html, parser)
+        if pages is not None:
+            for a in soup.find_all("a", class_="pagenumber"):
+                text = a.text.strip()
+                if text.isdigit():
+                    pages.add(int(text))
+        table = soup.find("table", id="classes-list")
+        if not table:
+            # couldnt find a good table, try anyways
+            table = soup
+        trs = filter(tag_filter("tr"), table.children)
+
+        courses = []
+        urls = []
+        for tds in filter(None, map(tr_is_course, trs)):
+            course, url = decode_row(tds)
+            courses.append(course)
+            urls.append(url)
+    metrics.inc("rows_parsed", len(courses))
+    return courses, urls
+
+
+def page_to_courses(html, request_description=True, fetcher=None, parser=None):
+    """
+    fetcher: a ``descriptions.DescriptionFetcher``; if
+    ``request_description`` is true, all the page's descriptions are fetched
+    through it once the rows are parsed
+    parser: the HTML parser backend; see ``html_parser``
+    """
+    courses, urls = page_rows(html, parser)
+    if request_description:
+        if fetcher is None:
+            with descriptions.DescriptionFetcher() as fetcher:
+                descriptions.fill_descriptions(zip(courses, urls), fetcher)
+        else:
+            descriptions.fill_descriptions(zip(courses, urls), fetcher)
+
+    return courses
+
+
+class RowScanner(HTMLParser):
+    """Incrementally picks the ``<tr>``s out of a page of courses.
+
+    Feed it a page a chunk at a time; every row that's been closed so far is
+    appended to ``rows`` as a standalone HTML string. Rows are taken from the
+    ``#classes-list`` table, or, failing that, from outside of any table (like
+    ``page_to_courses``, we try anyways).
+
+    The numbers of the ``a.pagenumber`` pager links are collected into
+    ``pages`` along the way.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.rows: Deque[str] = deque()
+        self.pages: Set[int] = set()
+        # text of the pager link we're in the middle of
+        self._pagenumber: Optional[List[str]] = None
+        # how many tables deep we are, and how deep #classes-list starts
+        self._tables = 0
+        self._classes_list: Optional[int] = None
+        # the row we're in the middle of
+        self._row: Optional[List[str]] = None
+        self._row_trs = 0
+
+    def _row_level(self) -> bool:
+        if self._classes_list is not None:
+            return self._tables == self._classes_list
+        return self._tables == 0
+
+    def _end_row(self):
+        self._row.append("</tr>")
+        self.rows.append("".join(self._row))
+        self._row = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a" and "pagenumber" in (dict(attrs).get("class") or "").split():
+            self._pagenumber = []
+        if tag == "table":
+            self._tables += 1
+            if self._classes_list is None and ("id", "classes-list") in attrs:
+                self._classes_list = self._tables
+                # anything we found outside of the table doesn't count
+                self.rows.clear()
+                self._row = None
+        elif tag == "tr" and self._row_level():
+            if self._row is not None and self._row_trs == 0:
+                # the last row's </tr> was left off
+                self._end_row()
+            if self._row is None:
+                self._row = []
+                self._row_trs = -1
+        if self._row is not None:
+            if tag == "tr":
+                self._row_trs += 1
+            self._row.append(self.get_starttag_text())
+
+    def handle_startendtag(self, tag, attrs):
+        if self._row is not None:
+            self._row.append(self.get_starttag_text())
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self._pagenumber is not None:
+            text = "".join(self._pagenumber).strip()
+            if text.isdigit():
+                self.pages.add(int(text))
+            self._pagenumber = None
+        if tag == "table" and self._row_level() and self._row is not None:
+            # the table closed with a row still open
+            self._end_row()
+        if self._row is not None:
+            if tag == "tr" and self._row_trs == 0:
+                self._end_row()
+                return
+            if tag == "tr":
+                self._row_trs -= 1
+            self._row.append(f"</{tag}>")
+        if tag == "table":
+            if self._tables == self._classes_list:
+                self._classes_list = -1  # done; ignore any later tables
+            self._tables -= 1
+
+    def handle_data(self, data):
+        if self._pagenumber is not None:
+            self._pagenumber.append(data)
+        if self._row is not None:
+            self._row.append(html.escape(data, quote=False))
+
+    def close(self):
+        super().close()
+        if self._row is not None:
+            self._end_row()
+
+
+def _read_chunks(f):
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _chunks(source) -> Iterable[str]:
+    if isinstance(source, str):
+        source = io.StringIO(source)
+    elif isinstance(source, bytes):
+        source = io.BytesIO(source)
+    # otherwise an iterable of chunks already, like requests' iter_content
+    chunks = _read_chunks(source) if hasattr(source, "read") else source
+    # bytes chunks can end partway through a character
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+        if chunk:
+            yield chunk
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def row_to_course(row: str, parser=None) -> Optional[Tuple[Course, str]]:
+    """Parses a single ``<tr>`` of HTML; see ``RowScanner``.
+
+    Returns the course (without a description) and its description URL.
+    """
+    # lxml drops <tr>s that aren't in a table
+    tr = make_soup("<table>" + row + "</table>", parser).find("tr")
+    tds = tr_is_course(tr)
+    if not tds:
+        return None
+    return decode_row(tds)
+
+
+def iter_courses(
+    source, request_description=True, fetcher=None, parser=None, pages=None
+):
+    """Yields the courses on a page one at a time, as their rows are parsed.
+
+    Each row is parsed on its own, which costs more than ``page_rows`` on the
+    whole page; this only pays off for a page that's still arriving.
+
+    source: the page's HTML; a string, a file-like object, or an iterable of
+    chunks (e.g. ``requests``' ``iter_content``); bytes are decoded as UTF-8
+    fetcher, parser: as in ``page_to_courses``; each course is yielded as soon
+    as its description arrives, in page order
+    pages: a set; the page numbers linked from the page's pager are added to
+    it (all of them, once the generator's exhausted)
+    """
+    if request_description and fetcher is None:
+        with descriptions.DescriptionFetcher() as fetcher:
+            yield from iter_courses(source, True, fetcher, parser, pages)
+        return
+
+    scanner = RowScanner()
+    if pages is not None:
+        scanner.pages = pages
+    # courses waiting on their description
+    pending: Deque[Tuple[Course, Future]] = deque()
+
+    def parsed_rows():
+        while scanner.rows:
+            with metrics.timer("parse_row"):
+                parsed = row_to_course(scanner.rows.popleft(), parser)
+            if parsed is not None:
+                metrics.inc("rows_parsed")
+                yield parsed
+
+    def ready(block=False):
+        while pending and (block or pending[0][1].done()):
+            course, future = pending.popleft()
+            course.description = future.result()
+            yield course
+
+    for chunk in itertools.chain(_chunks(source), [None]):
+        with metrics.timer("scan_rows"):
+            if chunk is None:
+                scanner.close()
+            else:
+                scanner.feed(chunk)
+
+        for course, url in parsed_rows():
+            if request_description:
+                pending.append((course, fetcher.submit(url)))
+            else:
+                yield course
+        yield from ready()
+
+    yield from ready(block=True)
+
+
+def page_numbers(source) -> Set[int]:
+    """The page numbers linked from a page of courses' pager.
+    """
+    scanner = RowScanner()
+    for chunk in _chunks(source):
+        scanner.feed(chunk)
+        # don't bother parsing them
+        scanner.rows.clear()
+    scanner.close()
+    return scanner.pages
 
 
 def schedule_url(year, semester, subject, kind="all"):
@@ -421,8 +672,3 @@ def strm(year, semester):
     return int(
         1000 + (10 * (year % 100)) + constants.SEMESTERS.index(semester) + 1  # ????
     )
-
-
-def load_courses(file_obj):
-    course_dicts = json.load(file_obj)
-    return [Course.from_dict(c) for c in course_dicts]
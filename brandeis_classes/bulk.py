@@ -0,0 +1,136 @@
+"""Re-parses archived semesters on every core.
+
+Parsing is CPU-bound, so ``archive.reparse`` uses one core however many the
+machine has. ``bulk_reparse`` spreads each semester's search pages, and then
+the description pages they link to, over a process pool in chunks; the workers
+read and decompress the pages themselves (only the digests and the parsed
+courses are sent between processes). Each description is parsed once, the
+first time a semester needs it, and archived descriptions no page links to
+aren't parsed at all. A semester's output is written as soon as its
+descriptions are parsed, while the next semester's pages are.
+
+``brandeis_reparse --jobs N`` uses this.
+"""
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from . import archive, brandeis
+from .descriptions import DescriptionCache
+from .output import SemesterOutput
+
+# pages per task; each is ~100 rows, so this is plenty to amortize the
+# round trip to a worker
+CHUNK_PAGES = 4
+# description pages are tiny
+CHUNK_DESCRIPTIONS = 64
+
+# (archive directory, year, semester, page number, digest, parser)
+PageTask = Tuple[str, int, str, int, str, Optional[str]]
+
+
+def parse_page(task: PageTask) -> List[Tuple[brandeis.Course, Optional[str]]]:
+    """A page's courses, without descriptions, with their description URLs.
+    """
+    directory, year, semester, _, digest, parser = task
+    html = archive.read_object(directory, digest).decode("utf-8")
+    courses, urls = brandeis.page_rows(html, parser)
+    for course in courses:
+        course.year = year
+        course.semester = semester
+    return list(zip(courses, urls))
+
+
+def parse_description(task: Tuple[str, str, Optional[str]]) -> str:
+    directory, digest, parser = task
+    html = archive.read_object(directory, digest).decode("utf-8")
+    return brandeis.parse_description(html, parser)
+
+
+def page_tasks(
+    a: "archive.ResponseArchive",
+    semesters: Iterable[Tuple[int, str]],
+    parser: Optional[str] = None,
+) -> List[PageTask]:
+    return [
+        (a.directory, year, semester, pg, digest, parser)
+        for year, semester in semesters
+        for pg, digest in sorted(a.search_pages(year, semester).items())
+    ]
+
+
+def bulk_reparse(
+    a: "archive.ResponseArchive",
+    semesters: Optional[Sequence[Tuple[int, str]]] = None,
+    jobs: Optional[int] = None,
+    cache: Optional[DescriptionCache] = None,
+    outdir: str = "out",
+    fmt: str = "json",
+    pretty: bool = False,
+    encoder: Optional[str] = None,
+    parser: Optional[str] = None,
+    chunk_pages: int = CHUNK_PAGES,
+) -> Dict[Tuple[int, str], Tuple[int, int]]:
+    """Like ``archive.reparse``, for many semesters (by default, every one in
+    the archive) on ``jobs`` processes (by default, one per core).
+
+    Returns (courses written, descriptions missing) for each semester.
+    """
+    if semesters is None:
+        semesters = a.semesters()
+    # tasks are in semester order
+    groups = [
+        list(group)
+        for _, group in itertools.groupby(
+            page_tasks(a, semesters, parser), key=lambda task: task[1:3]
+        )
+    ]
+    if not groups:
+        return {}
+    digests = a.descriptions()
+    # URL -> description, for the ones parsed so far
+    found: Dict[str, str] = {}
+    results: Dict[Tuple[int, str], Tuple[int, int]] = {}
+
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        queued = pool.map(parse_page, groups[0], chunksize=chunk_pages)
+        for i, group in enumerate(groups):
+            pages = list(zip(group, queued))
+            # the ones its pages link to that haven't been parsed yet
+            urls = [
+                url
+                for url in dict.fromkeys(url for _, rows in pages for _, url in rows)
+                if url in digests and url not in found
+            ]
+            parsed = pool.map(
+                parse_description,
+                [(a.directory, digests[url], parser) for url in urls],
+                chunksize=CHUNK_DESCRIPTIONS,
+            )
+            # the next semester's pages, queued right behind, keep the
+            # workers busy while this one is written
+            if i + 1 < len(groups):
+                queued = pool.map(parse_page, groups[i + 1], chunksize=chunk_pages)
+            found.update(zip(urls, parsed))
+
+            year, semester = group[0][1:3]
+            out = SemesterOutput(
+                year, semester, fmt, outdir, pretty=pretty, encoder=encoder
+            )
+            missing = set()
+            for task, rows in pages:
+                for course, url in rows:
+                    if url is None:
+                        # nothing to find
+                        continue
+                    description = found.get(url)
+                    if description is None and cache is not None:
+                        description = cache.get(url)
+                    if description is None:
+                        missing.add(url)
+                    course.description = description
+                out.write_page(task[3], (course for course, _ in rows))
+            results[(year, semester)] = (out.finish(), len(missing))
+    return results
@@ -0,0 +1,163 @@
+"""The HTTP client every registrar request goes through.
+
+One ``requests.Session`` is shared, so connections are kept alive and pooled
+between requests (and threads) rather than opened per request. Requests time
+out, transient failures (connection errors, 429 and 5xx responses) are
+retried with exponential backoff, responses are gzip-compressed when the
+server supports it, and every request's timing is recorded.
+
+``default_client()`` is used unless a client is passed in; tests (or a scrape
+against a local copy of the registrar) can swap it with
+``set_default_client``. A client with an ``archive`` (see ``archive``) keeps
+every successful response's body.
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import metrics
+
+# seconds to connect, and to wait for the server to send anything
+DEFAULT_TIMEOUT = (10.0, 60.0)
+DEFAULT_RETRIES = 3
+# retries wait backoff * 2 ** (retry - 1) seconds
+DEFAULT_BACKOFF = 1.0
+# enough for a few pages and their descriptions at once
+DEFAULT_POOL_SIZE = 16
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# how many requests' timings to keep
+TIMINGS = 1000
+
+
+@dataclass
+class Timing:
+    """How one request went.
+    """
+
+    url: str
+    # None if no response came back
+    status: Optional[int]
+    seconds: float
+    # the size of the body, decompressed
+    size: int
+
+
+class HTTPClient:
+    """A pooled, retrying, timing HTTP client; safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        session: Optional[requests.Session] = None,
+        archive=None,
+    ):
+        self.timeout = timeout
+        # an archive.ResponseArchive, or anything with its record() method
+        self.archive = archive
+        self.session = session if session is not None else requests.Session()
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            # give us the last response, rather than a MaxRetryError
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Accept-Encoding"] = "gzip, deflate"
+
+        self._lock = threading.Lock()
+        self.timings: Deque[Timing] = deque(maxlen=TIMINGS)
+        self.requests = 0
+        self.seconds = 0.0
+
+    def _record(self, timing: Timing) -> None:
+        with self._lock:
+            self.timings.append(timing)
+            self.requests += 1
+            self.seconds += timing.seconds
+        metrics.REGISTRY.observe("http_request", timing.seconds)
+        metrics.inc("http_requests")
+        metrics.inc("http_bytes", timing.size)
+        if timing.status is None or timing.status >= 400:
+            metrics.inc("http_errors")
+
+    def get(self, url: str, params=None, headers=None) -> requests.Response:
+        """GETs ``url``, raising ``requests.HTTPError`` for an error status.
+        """
+        start = time.perf_counter()
+        try:
+            resp = self.session.get(
+                url, params=params, headers=headers, timeout=self.timeout
+            )
+        except requests.RequestException:
+            self._record(Timing(url, None, time.perf_counter() - start, 0))
+            raise
+        self._record(
+            Timing(
+                resp.url,
+                resp.status_code,
+                time.perf_counter() - start,
+                len(resp.content),
+            )
+        )
+        resp.raise_for_status()
+        if self.archive is not None and resp.status_code == 200:
+            self.archive.record(url, params, resp.text)
+        return resp
+
+    def get_text(self, url: str, params=None) -> str:
+        return self.get(url, params).text
+
+    def recent(self) -> List[Timing]:
+        """The latest requests' timings, oldest first.
+        """
+        with self._lock:
+            return list(self.timings)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_default: Optional[HTTPClient] = None
+_default_lock = threading.Lock()
+
+
+def default_client() -> HTTPClient:
+    """The shared client, created the first time it's needed.
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = HTTPClient()
+        return _default
+
+
+def set_default_client(client: Optional[HTTPClient]) -> Optional[HTTPClient]:
+    """Replaces the shared client (None to create a fresh one when it's next
+    needed); returns the old one.
+    """
+    global _default
+    with _default_lock:
+        old, _default = _default, client
+        return old
@@ -0,0 +1,296 @@
+"""A compact, columnar on-disk format for a semester's courses.
+
+A semester is stored as a directory of NumPy ``.npy`` files, one per column,
+which load memory-mapped; nothing is parsed or copied until it's used.
+
+* Numbers are plain integer arrays; nullable ones (``year``) get a boolean
+  ``.valid`` mask.
+* Repetitive strings (``subject``, ``enrollment_status``, ...) are
+  dictionary-encoded: ``.codes`` index into a ``.dict`` of unique values, and
+  -1 is None.
+* Other strings (``name``, ``description``, ...) are UTF-8 concatenated into
+  one ``.data`` byte array, with ``.offsets`` (length n + 1) and ``.valid``.
+* The lists (``schedule``, ``instructors``, ``uni_reqs``) are child tables:
+  ``schedule.offsets[i]:schedule.offsets[i + 1]`` are course i's rows.
+
+Requires ``numpy``.
+"""
+
+import argparse
+import json
+import os
+import shutil
+from glob import glob
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .model import Course, CourseTime, Instructor, load_courses
+
+FORMAT_VERSION = 1
+EXTENSION = ".columns"
+META = "meta.json"
+
+# (field, kind)
+COURSE_COLUMNS = [
+    ("name", "str"),
+    ("class_number", "int"),
+    ("subject", "cat"),
+    ("number", "int"),
+    ("group", "cat"),
+    ("section", "cat"),
+    ("enrolled", "int"),
+    ("limit", "int"),
+    ("waiting", "int"),
+    ("enrollment_status", "cat"),
+    ("syllabus", "str"),
+    ("description", "str"),
+    ("notes", "str"),
+    ("semester", "cat"),
+    ("year", "int?"),
+]
+SCHEDULE_COLUMNS = ["block", "times", "location", "info"]
+INSTRUCTOR_COLUMNS = ["name", "id"]
+
+
+def encode_strings(
+    values: Sequence[Optional[str]], prefix: str
+) -> Dict[str, np.ndarray]:
+    encoded = [v.encode("utf-8") if v is not None else b"" for v in values]
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return {
+        f"{prefix}.data": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        f"{prefix}.offsets": offsets,
+        f"{prefix}.valid": np.array([v is not None for v in values], dtype=bool),
+    }
+
+
+def decode_strings(
+    data: np.ndarray, offsets: np.ndarray, valid: Optional[np.ndarray] = None
+) -> List[Optional[str]]:
+    raw = data.tobytes()
+    bounds = offsets.tolist()
+    ret: List[Optional[str]] = [
+        raw[start:end].decode("utf-8") for start, end in zip(bounds, bounds[1:])
+    ]
+    if valid is not None:
+        for i in np.flatnonzero(~valid).tolist():
+            ret[i] = None
+    return ret
+
+
+def encode_categorical(
+    values: Sequence[Optional[str]], prefix: str
+) -> Dict[str, np.ndarray]:
+    dictionary: Dict[str, int] = {}
+    codes = np.array(
+        [
+            -1 if v is None else dictionary.setdefault(v, len(dictionary))
+            for v in values
+        ],
+        dtype=np.int32,
+    )
+    ret = {f"{prefix}.codes": codes}
+    dict_arrays = encode_strings(list(dictionary), f"{prefix}.dict")
+    del dict_arrays[f"{prefix}.dict.valid"]
+    ret.update(dict_arrays)
+    return ret
+
+
+def encode_ints(values: Sequence[Optional[int]], prefix: str, nullable=False):
+    if not nullable:
+        return {prefix: np.array(values, dtype=np.int64)}
+    return {
+        prefix: np.array([v if v is not None else 0 for v in values], dtype=np.int64),
+        f"{prefix}.valid": np.array([v is not None for v in values], dtype=bool),
+    }
+
+
+def encode_courses(courses: Sequence[Course]) -> Dict[str, np.ndarray]:
+    """Encodes courses as a dict of named column arrays.
+    """
+    arrays: Dict[str, np.ndarray] = {}
+    for field, kind in COURSE_COLUMNS:
+        values = [getattr(c, field) for c in courses]
+        if kind == "str":
+            arrays.update(encode_strings(values, field))
+        elif kind == "cat":
+            arrays.update(encode_categorical(values, field))
+        else:
+            arrays.update(encode_ints(values, field, nullable=kind == "int?"))
+
+    def child_offsets(lists):
+        offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+        np.cumsum([len(l) for l in lists], out=offsets[1:])
+        return offsets
+
+    schedules = [c.schedule or [] for c in courses]
+    arrays["schedule.offsets"] = child_offsets(schedules)
+    times = [t for schedule in schedules for t in schedule]
+    for field in SCHEDULE_COLUMNS:
+        arrays.update(
+            encode_categorical([getattr(t, field) for t in times], f"schedule.{field}")
+        )
+
+    instructors = [c.instructors or [] for c in courses]
+    arrays["instructors.offsets"] = child_offsets(instructors)
+    flat = [i for l in instructors for i in l]
+    for field in INSTRUCTOR_COLUMNS:
+        arrays.update(
+            encode_categorical(
+                [getattr(i, field) for i in flat], f"instructors.{field}"
+            )
+        )
+
+    reqs = [c.uni_reqs or [] for c in courses]
+    arrays["uni_reqs.offsets"] = child_offsets(reqs)
+    arrays.update(encode_categorical([r for l in reqs for r in l], "uni_reqs.value"))
+    return arrays
+
+
+class CourseTable:
+    """A semester's courses, as columns.
+
+    Individual columns are available without building any ``Course``
+    objects; see ``ints``, ``categorical``, and ``strings``.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+
+    def __len__(self) -> int:
+        return len(self.arrays["class_number"])
+
+    def ints(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def categorical(self, name: str) -> Tuple[np.ndarray, List[Optional[str]]]:
+        """Returns the codes (-1 for None) and the dictionary they index.
+        """
+        return (
+            self.arrays[f"{name}.codes"],
+            decode_strings(
+                self.arrays[f"{name}.dict.data"], self.arrays[f"{name}.dict.offsets"]
+            ),
+        )
+
+    def categorical_values(self, name: str) -> List[Optional[str]]:
+        codes, dictionary = self.categorical(name)
+        return [dictionary[c] if c >= 0 else None for c in codes.tolist()]
+
+    def strings(self, name: str) -> List[Optional[str]]:
+        return decode_strings(
+            self.arrays[f"{name}.data"],
+            self.arrays[f"{name}.offsets"],
+            self.arrays[f"{name}.valid"],
+        )
+
+    def values(self, name: str, kind: str) -> list:
+        if kind == "str":
+            return self.strings(name)
+        if kind == "cat":
+            return self.categorical_values(name)
+        ret = self.arrays[name].tolist()
+        if kind == "int?":
+            for i in np.flatnonzero(~self.arrays[f"{name}.valid"]).tolist():
+                ret[i] = None
+        return ret
+
+    def _children(self, table: str, fields: Iterable[str], cls) -> List[list]:
+        bounds = self.arrays[f"{table}.offsets"].tolist()
+        columns = [self.categorical_values(f"{table}.{field}") for field in fields]
+        rows = [cls(*values) for values in zip(*columns)]
+        return [rows[start:end] for start, end in zip(bounds, bounds[1:])]
+
+    def to_courses(self) -> List[Course]:
+        columns = {field: self.values(field, kind) for field, kind in COURSE_COLUMNS}
+        schedules = self._children("schedule", SCHEDULE_COLUMNS, CourseTime)
+        instructors = self._children("instructors", INSTRUCTOR_COLUMNS, Instructor)
+        reqs = self._children("uni_reqs", ["value"], lambda value: value)
+        return [
+            Course(
+                schedule=schedules[i],
+                instructors=instructors[i],
+                uni_reqs=reqs[i],
+                **{field: column[i] for field, column in columns.items()},
+            )
+            for i in range(len(self))
+        ]
+
+
+def columns_path(path: str) -> str:
+    """``out/2019-Fall.json`` -> ``out/2019-Fall.columns``
+    """
+    base, _ = os.path.splitext(path)
+    return base + EXTENSION
+
+
+def save_courses(courses: Sequence[Course], path: str) -> None:
+    """Writes courses to the directory ``path``, replacing it atomically.
+    """
+    tmp = path + ".tmp"
+    if os.path.exists(tmp):
+        shutil.rmtree(tmp)
+    os.makedirs(tmp)
+    arrays = encode_courses(courses)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp, name + ".npy"), array)
+    with open(os.path.join(tmp, META), "w") as f:
+        json.dump({"version": FORMAT_VERSION, "courses": len(courses)}, f)
+
+    if os.path.exists(path):
+        old = path + ".old"
+        os.replace(path, old)
+        os.replace(tmp, path)
+        shutil.rmtree(old)
+    else:
+        os.replace(tmp, path)
+
+
+def load_table(path: str, mmap: bool = True) -> CourseTable:
+    with open(os.path.join(path, META)) as f:
+        meta = json.load(f)
+    if meta["version"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported columnar format version {meta['version']}")
+    arrays = {}
+    for fname in glob(os.path.join(path, "*.npy")):
+        name = os.path.basename(fname)[: -len(".npy")]
+        arrays[name] = np.load(fname, mmap_mode="r" if mmap else None)
+    return CourseTable(arrays)
+
+
+def load_columns(path: str) -> List[Course]:
+    """Like ``brandeis.load_courses``, for a columnar directory.
+    """
+    return load_table(path).to_courses()
+
+
+def convert(path: str) -> str:
+    """Converts a JSON (or JSON Lines) semester file; returns the new path.
+    """
+    with open(path, encoding="utf-8") as f:
+        courses = load_courses(f)
+    out = columns_path(path)
+    save_courses(courses, out)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Converts scraped JSON course files to the columnar format"
+    )
+    parser.add_argument(
+        "files", nargs="*", help="""JSON files to convert (default out/*-*.json*)"""
+    )
+    args = parser.parse_args()
+
+    files = args.files or sorted(
+        glob(os.path.join("out", "*-*.json")) + glob(os.path.join("out", "*-*.jsonl"))
+    )
+    for path in files:
+        print(path, "->", convert(path))
+
+
+if __name__ == "__main__":
+    main()
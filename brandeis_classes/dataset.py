@@ -0,0 +1,171 @@
+"""Lazily-loaded semesters of scraped courses.
+
+``Dataset`` indexes an output directory by file name only, and loads each
+semester the first time it's used: from the columnar format (see ``columnar``)
+when it's there, or from JSON otherwise. Either way a loaded semester is a list
+of ``Course`` objects; the columns are only memory-mapped long enough to build
+them, so only ``table`` and ``frame`` skip that. Under a memory cap, the
+semesters used least recently are dropped again.
+"""
+
+import importlib.util
+import os
+import sys
+from collections import OrderedDict
+from glob import glob
+from typing import Callable, Dict, Iterator, List, Mapping, Optional
+
+from .model import Course, load_courses
+from .index import CourseIndex
+
+# the columnar format needs numpy, which takes a while to import; so analytics
+# and columnar are only imported once they're used. without numpy, we can
+# still read JSON
+HAVE_NUMPY = importlib.util.find_spec("numpy") is not None
+
+# in order of preference
+EXTENSIONS = [".columns", ".jsonl", ".json"]
+
+
+def object_bytes(obj) -> int:
+    """Roughly how much memory a ``Course``, ``CourseTime``, or ``Instructor``
+    takes up, not counting its children.
+
+    Interned strings are shared, but they're counted anyways.
+    """
+    return sys.getsizeof(obj) + sum(
+        sys.getsizeof(getattr(obj, field)) for field in obj.__slots__
+    )
+
+
+def course_bytes(course: Course) -> int:
+    """Roughly how much memory a course takes up.
+    """
+    return (
+        object_bytes(course)
+        + sum(map(object_bytes, course.schedule or []))
+        + sum(map(object_bytes, course.instructors or []))
+        + sum(map(sys.getsizeof, course.uni_reqs or []))
+    )
+
+
+def semester_key(base: str) -> Optional[str]:
+    """The default ``key``: every ``{year}-{semester}`` file.
+    """
+    return base if "-" in base else None
+
+
+class Dataset(Mapping[str, List[Course]]):
+    """Semesters of courses from ``outdir``, keyed like ``2019-Fall``.
+
+    key: maps a file's base name to its key, or None to skip it
+    max_bytes: roughly how much memory loaded semesters may take up, or None
+    for no limit; sizes are only estimated, and counted in ``loaded_bytes``,
+    while there is a limit
+    """
+
+    def __init__(
+        self,
+        outdir: str = "out",
+        key: Callable[[str], Optional[str]] = semester_key,
+        max_bytes: Optional[int] = None,
+    ):
+        self.outdir = outdir
+        self.max_bytes = max_bytes
+        # key -> path; cheap, since we only look at file names
+        self.index: Dict[str, str] = {}
+        for ext in reversed(EXTENSIONS):
+            if ext == ".columns" and not HAVE_NUMPY:
+                continue
+            for path in glob(os.path.join(outdir, "*-*" + ext)):
+                k = key(os.path.basename(path)[: -len(ext)])
+                if k is not None:
+                    self.index[k] = path
+        # theyre numbered so this works
+        self.index = dict(sorted(self.index.items()))
+
+        # key -> (courses, estimated bytes), least recently used first
+        self._loaded: "OrderedDict[str, tuple]" = OrderedDict()
+        self.loaded_bytes = 0
+        # key -> index of the loaded courses; evicted along with them
+        self._indexes: Dict[str, CourseIndex] = {}
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, key) -> bool:
+        return key in self.index
+
+    def is_columnar(self, key: str) -> bool:
+        return self.index[key].endswith(".columns")
+
+    def table(self, key: str) -> "columnar.CourseTable":
+        """A semester's memory-mapped columns; only for columnar semesters.
+        """
+        from . import columnar
+
+        return columnar.load_table(self.index[key])
+
+    def load(self, key: str) -> List[Course]:
+        """Loads a semester, bypassing the cache.
+
+        Columnar semesters are converted with ``CourseTable.to_courses``, so
+        this builds every ``Course`` whatever the format.
+        """
+        path = self.index[key]
+        if self.is_columnar(key):
+            return self.table(key).to_courses()
+        with open(path, encoding="utf-8") as f:
+            return load_courses(f)
+
+    def __getitem__(self, key: str) -> List[Course]:
+        if key in self._loaded:
+            self._loaded.move_to_end(key)
+            return self._loaded[key][0]
+
+        courses = self.load(key)
+        # walking every course is slow; only bother when there's a cap
+        size = 0 if self.max_bytes is None else sum(map(course_bytes, courses))
+        self._loaded[key] = (courses, size)
+        self.loaded_bytes += size
+        self._evict()
+        return courses
+
+    def _evict(self) -> None:
+        if self.max_bytes is None:
+            return
+        # always keep the one we just loaded
+        while self.loaded_bytes > self.max_bytes and len(self._loaded) > 1:
+            key, (_, size) = self._loaded.popitem(last=False)
+            self.loaded_bytes -= size
+            self._indexes.pop(key, None)
+
+    def course_index(self, key: str) -> CourseIndex:
+        """A ``CourseIndex`` of a semester, built the first time it's needed.
+        """
+        courses = self[key]
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = CourseIndex(courses)
+        return index
+
+    def loaded(self) -> List[str]:
+        """Currently-loaded semesters, least recently used first.
+        """
+        return list(self._loaded)
+
+    def frame(self) -> "analytics.CourseFrame":
+        """The whole dataset as an ``analytics.CourseFrame``.
+
+        If every semester is columnar, no ``Course`` objects are built.
+        """
+        from . import analytics
+
+        if all(map(self.is_columnar, self.index)):
+            return analytics.CourseFrame.from_tables(
+                {k: self.table(k) for k in self.index}
+            )
+        return analytics.CourseFrame.from_courses(self)
@@ -0,0 +1,153 @@
+"""Fetches course descriptions as a separate stage of the scrape.
+
+Each course's description lives on its own page, and every section of a course
+shares it. Rather than fetching it from inside ``brandeis.tr_to_course``, a
+page's rows are parsed first; then their description URLs are deduplicated,
+looked up in an (optional) on-disk cache, and the rest are fetched in
+parallel.
+"""
+
+import os
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+from . import brandeis, metrics
+from .ratelimit import TokenBucket
+
+DEFAULT_CACHE = os.path.join("out", "descriptions.sqlite3")
+DEFAULT_JOBS = 4
+
+
+class DescriptionCache:
+    """An on-disk cache of course descriptions, keyed by URL.
+
+    Safe to share between threads.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE):
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS descriptions"
+                " (url TEXT PRIMARY KEY, description TEXT NOT NULL)"
+            )
+
+    def get(self, url: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT description FROM descriptions WHERE url = ?", (url,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, url: str, description: str) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO descriptions VALUES (?, ?)", (url, description),
+            )
+
+    def __contains__(self, url: str) -> bool:
+        return self.get(url) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM descriptions").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DescriptionFetcher:
+    """Fetches each description URL at most once.
+
+    Requests for a URL that's already cached, in flight, or finished share the
+    same result. Safe to share between threads (e.g. between pages being
+    scraped at once).
+    """
+
+    def __init__(
+        self,
+        cache: Optional[DescriptionCache] = None,
+        jobs: int = DEFAULT_JOBS,
+        limiter: Optional[TokenBucket] = None,
+    ):
+        self.cache = cache
+        self.limiter = limiter
+        self._pool = ThreadPoolExecutor(max_workers=jobs)
+        self._lock = threading.Lock()
+        self._futures: Dict[str, Future] = {}
+
+    def _fetch(self, url: str) -> str:
+        if self.limiter is not None:
+            self.limiter.acquire()
+        with metrics.timer("description_fetch"):
+            description = brandeis.fetch_description(url)
+        metrics.inc("descriptions_fetched")
+        if self.cache is not None:
+            self.cache.put(url, description)
+        return description
+
+    def submit(self, url: Optional[str]) -> Future:
+        """Returns a future for the description at ``url``; if ``url`` is None
+        (a row without a description link), it's None without a request.
+        """
+        if url is None:
+            future = Future()
+            future.set_result(None)
+            return future
+        with self._lock:
+            future = self._futures.get(url)
+            if future is None:
+                cached = self.cache.get(url) if self.cache is not None else None
+                if cached is not None:
+                    metrics.inc("description_cache_hits")
+                    future = Future()
+                    future.set_result(cached)
+                else:
+                    future = self._pool.submit(self._fetch, url)
+                self._futures[url] = future
+            return future
+
+    def fetch_all(self, urls: Iterable[Optional[str]]) -> Dict[str, str]:
+        """Fetches every URL in ``urls`` in parallel, skipping Nones.
+        """
+        # dict.fromkeys deduplicates while keeping the order
+        futures = {
+            url: self.submit(url) for url in dict.fromkeys(urls) if url is not None
+        }
+        return {url: future.result() for url, future in futures.items()}
+
+    def close(self) -> None:
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def fill_descriptions(
+    courses: Iterable[Tuple["brandeis.Course", Optional[str]]],
+    fetcher: DescriptionFetcher,
+) -> None:
+    """Sets each course's description, given (course, description URL) pairs;
+    courses without a URL get None.
+    """
+    courses = list(courses)
+    found = fetcher.fetch_all(url for _, url in courses)
+    for course, url in courses:
+        course.description = found.get(url) if url is not None else None
@@ -0,0 +1,125 @@
+"""Indexes over a list of courses, for answering questions without a scan.
+
+``CourseIndex`` is built once from a semester's courses. It keeps a posting
+list (the sorted positions of every matching course) per subject, instructor
+id, university requirement, block, and enrollment status, and the courses'
+positions sorted by number. ``query`` intersects the posting lists it needs,
+smallest first.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .model import Course
+
+# posting lists are named by these
+FIELDS = ("subject", "instructor", "uni_req", "block", "enrollment_status")
+
+# a number, or an inclusive (low, high) range of numbers
+NumberQuery = Union[int, Tuple[int, int]]
+
+
+def course_values(course: Course) -> Dict[str, Iterable[Optional[str]]]:
+    """What each posting list indexes ``course`` under.
+    """
+    return {
+        "subject": [course.subject],
+        "instructor": [i.id for i in course.instructors or []],
+        "uni_req": course.uni_reqs or [],
+        "block": [ct.block for ct in course.schedule or []],
+        "enrollment_status": [course.enrollment_status],
+    }
+
+
+def intersect(postings: Sequence[List[int]]) -> List[int]:
+    """The positions in every one of ``postings`` (each sorted).
+
+    Each position of the shortest list is binary searched for in the others,
+    so a rare value narrows a common one cheaply.
+    """
+    if not postings:
+        return []
+    shortest, *rest = sorted(postings, key=len)
+    ret = []
+    for pos in shortest:
+        for other in rest:
+            i = bisect_left(other, pos)
+            if i == len(other) or other[i] != pos:
+                break
+        else:
+            ret.append(pos)
+    return ret
+
+
+class CourseIndex:
+    """Hash indexes on ``FIELDS`` and a sorted index on course number.
+    """
+
+    def __init__(self, courses: Sequence[Course]):
+        self.courses = courses
+        # field -> value -> sorted positions
+        self.postings: Dict[str, Dict[str, List[int]]] = {f: {} for f in FIELDS}
+        for pos, course in enumerate(courses):
+            for field, values in course_values(course).items():
+                postings = self.postings[field]
+                # dict.fromkeys: a course is only listed once per value
+                for value in dict.fromkeys(values):
+                    if value is not None:
+                        postings.setdefault(value, []).append(pos)
+
+        by_number = sorted(range(len(courses)), key=lambda pos: courses[pos].number)
+        self.numbers = [courses[pos].number for pos in by_number]
+        self.by_number = by_number
+
+    def __len__(self) -> int:
+        return len(self.courses)
+
+    def values(self, field: str) -> List[str]:
+        """Every value indexed under ``field``, e.g. every subject.
+        """
+        return list(self.postings[field])
+
+    def lookup(self, field: str, value: str) -> List[int]:
+        """The sorted positions of courses with ``value`` under ``field``.
+        """
+        return self.postings[field].get(value, [])
+
+    def number_range(self, low: int, high: int) -> List[int]:
+        """The sorted positions of courses numbered ``low`` to ``high``,
+        inclusive.
+        """
+        lo = bisect_left(self.numbers, low)
+        hi = bisect_right(self.numbers, high)
+        return sorted(self.by_number[lo:hi])
+
+    def positions(
+        self, number: Optional[NumberQuery] = None, **fields: Optional[str]
+    ) -> List[int]:
+        """The sorted positions of the courses matching every criterion given;
+        see ``query``.
+        """
+        postings = []
+        for field, value in fields.items():
+            if field not in self.postings:
+                raise TypeError(f"Can't query by {field!r}; expected one of {FIELDS}")
+            if value is not None:
+                postings.append(self.lookup(field, value))
+        if number is not None:
+            low, high = (number, number) if isinstance(number, int) else number
+            postings.append(self.number_range(low, high))
+        if not postings:
+            return list(range(len(self.courses)))
+        return intersect(postings)
+
+    def query(
+        self, number: Optional[NumberQuery] = None, **fields: Optional[str]
+    ) -> List[Course]:
+        """Courses matching every criterion given, in their original order.
+
+        e.g. ``query(subject="COSI", uni_req="sn", number=(100, 199))``; a
+        criterion that's None matches anything.
+        """
+        return [self.courses[pos] for pos in self.positions(number, **fields)]
+
+    def count(self, number: Optional[NumberQuery] = None, **fields: Optional[str]):
+        return len(self.positions(number, **fields))
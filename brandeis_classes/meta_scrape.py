@@ -1,27 +1,244 @@
 """Scrapes course data for the given years.
+
+Several semesters are scraped at once, on a thread pool; every request they
+make (search pages and descriptions alike) comes out of one shared rate
+limit.
 """
 
 import argparse
-import subprocess
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
 
 from termcolor import colored
 
-from . import constants, scrape_courses
+from . import constants, descriptions, output, scrape_courses
+from .client import default_client
+from .ratelimit import TokenBucket
+
+DEFAULT_SUMMARY = os.path.join("out", "summary.json")
+
+_print_lock = threading.Lock()
+
+
+@dataclass
+class JobResult:
+    year: int
+    semester: str
+    # number of courses scraped
+    rows: int
+    # wall-clock seconds
+    seconds: float
+    # None if the job succeeded
+    error: Optional[str]
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def dict(self):
+        # useful for encoding as JSON
+        return self.__dict__.copy()
+
+
+def log(*args, **kwargs):
+    # jobs print from several threads at once
+    with _print_lock:
+        print(*args, **kwargs)
+        sys.stdout.flush()
+
+
+def year_semesters(start_year: int, end_year: int) -> List[Tuple[int, str]]:
+    return [
+        (year, semester)
+        for year in range(start_year, end_year + 1)
+        for semester in constants.SEMESTERS
+    ]
+
+
+def run_job(
+    year: int,
+    semester: str,
+    limiter: TokenBucket,
+    cache: Optional[descriptions.DescriptionCache],
+    page_jobs: int = 1,
+    fmt: str = "json",
+) -> JobResult:
+    """Scrapes one semester; never raises.
+    """
+    name = f"{year} {semester}"
+
+    def progress(page, total, rows):
+        log(
+            colored(f"[{name}]", "green"),
+            f"page {page} / {total or '?'}, {rows} courses",
+        )
+
+    log(colored(f"[{name}]", "green"), "starting")
+    start = time.monotonic()
+    rows = 0
+    error = None
+    try:
+        rows = scrape_courses.scrape_courses(
+            year,
+            semester,
+            jobs=page_jobs,
+            description_cache=cache,
+            limiter=limiter,
+            progress=progress,
+            fmt=fmt,
+        )
+    except Exception as e:
+        # one semester failing shouldn't take the rest down with it
+        error = f"{type(e).__name__}: {e}"
+        log(colored(f"[{name}] failed:", "red"), traceback.format_exc())
+    seconds = time.monotonic() - start
+
+    if error is None:
+        log(colored(f"[{name}]", "green"), f"done; {rows} courses in {seconds:.1f}s")
+
+    return JobResult(year, semester, rows, seconds, error)
+
+
+def run_jobs(
+    semesters: Iterable[Tuple[int, str]],
+    jobs: int = 1,
+    rate: float = scrape_courses.DEFAULT_RATE,
+    description_cache: Optional[str] = descriptions.DEFAULT_CACHE,
+    page_jobs: int = 1,
+    fmt: str = "json",
+) -> List[JobResult]:
+    """Scrapes each (year, semester), ``jobs`` at a time.
+
+    Results are in the same order as ``semesters``.
+    """
+    limiter = TokenBucket(rate)
+    cache = (
+        descriptions.DescriptionCache(description_cache) if description_cache else None
+    )
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = [
+                pool.submit(
+                    run_job, year, semester, limiter, cache, page_jobs, fmt
+                )
+                for year, semester in semesters
+            ]
+            return [future.result() for future in futures]
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def write_summary(results: List[JobResult], path: str = DEFAULT_SUMMARY) -> None:
+    dirname = os.path.dirname(path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "rows": sum(r.rows for r in results),
+                "seconds": sum(r.seconds for r in results),
+                "failed": sum(not r.ok for r in results),
+                "jobs": [r.dict() for r in results],
+            },
+            f,
+            indent=2,
+        )
+
+
+def print_summary(results: List[JobResult]) -> None:
+    print(colored("=========Summary=========", "green"))
+    for r in results:
+        status = colored("ok", "green") if r.ok else colored("FAILED", "red")
+        print(
+            f"{r.year} {r.semester:<6}  {status:<6}  {r.rows:>6} courses"
+            f"  {r.seconds:>8.1f}s" + (f"  {r.error}" if r.error else "")
+        )
 
 
 def main():
     parser = argparse.ArgumentParser(
         description="Scrapes course data for the given years"
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="""Number of semesters to scrape at once""",
+    )
+    parser.add_argument(
+        "--page-jobs",
+        type=int,
+        default=1,
+        help="""Number of pages to fetch at once within each semester""",
+    )
+    parser.add_argument(
+        "-r",
+        "--rate",
+        type=float,
+        default=scrape_courses.DEFAULT_RATE,
+        help=f"""Maximum requests per second, across all jobs (default
+        {scrape_courses.DEFAULT_RATE})""",
+    )
+    parser.add_argument(
+        "--description-cache",
+        default=descriptions.DEFAULT_CACHE,
+        help=f"""Cache file for course descriptions (default
+        {descriptions.DEFAULT_CACHE}); pass an empty string to disable""",
+    )
+    parser.add_argument(
+        "--summary",
+        default=DEFAULT_SUMMARY,
+        help=f"""Where to write timings and course counts (default
+        {DEFAULT_SUMMARY})""",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=output.FORMATS,
+        default="json",
+        help="""Output format; a JSON array, or JSON Lines (default json)""",
+    )
+    parser.add_argument(
+        "--archive",
+        help="""Keep every search and description page downloaded in this
+        directory, zstd-compressed, for brandeis_reparse (e.g. out/archive)""",
+    )
     parser.add_argument("start_year", type=int)
     parser.add_argument("end_year", type=int)
     args = parser.parse_args()
 
-    for year in range(args.start_year, args.end_year + 1):
-        print(colored(f"========={year}=========", "green"))
-        for semester in constants.SEMESTERS:
-            print(colored(f"---------{semester}---------", "green"))
-            scrape_courses.scrape_courses(year, semester)
+    if args.jobs < 1 or args.page_jobs < 1:
+        parser.error("--jobs and --page-jobs must be at least 1")
+    if args.rate <= 0:
+        parser.error("--rate must be positive")
+
+    if args.archive:
+        from . import archive
+
+        default_client().archive = archive.ResponseArchive(args.archive)
+
+    results = run_jobs(
+        year_semesters(args.start_year, args.end_year),
+        jobs=args.jobs,
+        rate=args.rate,
+        description_cache=args.description_cache,
+        page_jobs=args.page_jobs,
+        fmt=args.format,
+    )
+    write_summary(results, args.summary)
+    print_summary(results)
+
+    if not all(r.ok for r in results):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
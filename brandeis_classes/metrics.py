@@ -0,0 +1,160 @@
+"""Counters and per-stage timers for the scraper.
+
+The scraper's hot paths report into ``REGISTRY``: how long each stage took
+(search requests, HTML parsing, description fetches, writing output) and how
+much happened (bytes downloaded, rows parsed, descriptions fetched, cache
+hits). ``brandeis_scrape_courses --metrics FILE`` writes them out, as JSON or,
+for a ``.prom`` file, Prometheus' text format; ``--profile FILE`` runs the
+scrape under cProfile.
+"""
+
+import cProfile
+import json
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# names and what they count; anything else is reported too, just undocumented
+COUNTERS = {
+    "http_requests": "HTTP requests made",
+    "http_bytes": "Bytes downloaded (decompressed)",
+    "http_errors": "HTTP requests that failed",
+    "search_pages": "Search result pages fetched",
+    "rows_parsed": "Course rows parsed",
+    "descriptions_fetched": "Course descriptions downloaded",
+    "description_cache_hits": "Course descriptions found in the cache",
+    "courses_written": "Courses written to output",
+}
+TIMERS = {
+    "http_request": "Waiting on HTTP requests",
+    "search_page": "Fetching search result pages",
+    "parse_page": "Parsing a page of courses at once",
+    "scan_rows": "Splitting pages into rows",
+    "parse_row": "Parsing a row into a course",
+    "description_fetch": "Fetching and parsing course descriptions",
+    "write_page": "Writing a finished page of courses",
+    "write_output": "Joining finished pages into the output file",
+}
+PROMETHEUS_PREFIX = "brandeis_"
+
+
+class Metrics:
+    """A set of counters and timers; safe to share between threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, float] = {}
+        # name -> [count, total seconds, max seconds]
+        self.timers: Dict[str, List[float]] = {}
+
+    def inc(self, name: str, n: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                self.timers[name] = [1, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+                timer[2] = max(timer[2], seconds)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Times the block as one ``name`` event, even if it raises.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.timers.clear()
+
+    def dict(self) -> dict:
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "timers": {
+                    name: {"count": int(count), "seconds": total, "max": longest}
+                    for name, (count, total, longest) in self.timers.items()
+                },
+            }
+
+    def prometheus(self) -> str:
+        """The metrics in Prometheus' text exposition format.
+        """
+        snapshot = self.dict()
+        lines = []
+        for name, value in sorted(snapshot["counters"].items()):
+            metric = f"{PROMETHEUS_PREFIX}{name}_total"
+            if name in COUNTERS:
+                lines.append(f"# HELP {metric} {COUNTERS[name]}")
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value:g}")
+
+        if snapshot["timers"]:
+            metric = f"{PROMETHEUS_PREFIX}stage_seconds"
+            lines.append(f"# HELP {metric} Time spent in each stage of a scrape")
+            lines.append(f"# TYPE {metric} summary")
+            for name, timer in sorted(snapshot["timers"].items()):
+                label = f'{{stage="{name}"}}'
+                lines.append(f"{metric}_count{label} {timer['count']}")
+                lines.append(f"{metric}_sum{label} {timer['seconds']:.6f}")
+            metric = f"{PROMETHEUS_PREFIX}stage_max_seconds"
+            lines.append(f"# TYPE {metric} gauge")
+            for name, timer in sorted(snapshot["timers"].items()):
+                lines.append(f'{metric}{{stage="{name}"}} {timer["max"]:.6f}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """Writes Prometheus text to a ``.prom`` file, and JSON otherwise.
+        """
+        with open(path, "w") as f:
+            if path.endswith(".prom"):
+                f.write(self.prometheus())
+            else:
+                json.dump(self.dict(), f, indent=2)
+
+
+# what the scraper reports to
+REGISTRY = Metrics()
+
+
+def inc(name: str, n: float = 1) -> None:
+    REGISTRY.inc(name, n)
+
+
+def timer(name: str):
+    return REGISTRY.timer(name)
+
+
+@contextmanager
+def profile(path: Optional[str], top: int = 25) -> Iterator[None]:
+    """Runs the block under cProfile, if ``path`` is given; the stats are
+    saved there (for ``pstats`` or snakeviz), and the top few are printed.
+
+    Only the calling thread is profiled, not thread pools.
+    """
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(
+            top
+        )
@@ -0,0 +1,247 @@
+"""The course data model, and loading it back from JSON.
+
+Kept apart from ``brandeis`` (which re-exports all of this) so that reading
+scraped courses doesn't import the HTML and HTTP stack.
+"""
+
+import operator
+import sys
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from . import serialize
+from .schedule import Interval, Meeting, meeting_intervals, parse_meeting
+
+
+def intern_str(s: Optional[str]) -> Optional[str]:
+    """``sys.intern``, but passing None through.
+
+    The same few subjects, blocks, rooms, and instructors turn up in thousands
+    of courses; interning them keeps one copy of each in memory.
+    """
+    return sys.intern(s) if isinstance(s, str) else s
+
+
+# these are slotted (no per-instance __dict__) because course_science keeps
+# hundreds of thousands of them around
+
+
+@dataclass
+class CourseTime:
+    __slots__ = ("block", "times", "location", "info")
+
+    block: str
+    times: str
+    location: str
+    info: str
+
+    def __post_init__(self):
+        self.block = intern_str(self.block)
+        self.times = intern_str(self.times)
+        self.location = intern_str(self.location)
+        self.info = intern_str(self.info)
+
+    @property
+    def meeting(self) -> Optional[Meeting]:
+        """``times``, parsed; None if it's TBD or unparseable.
+        """
+        return parse_meeting(self.times)
+
+    @property
+    def days(self) -> int:
+        """A bitmask of the days this meets; see ``schedule.DAY_BITS``.
+        """
+        meeting = self.meeting
+        return meeting.days if meeting is not None else 0
+
+    @property
+    def intervals(self) -> List[Interval]:
+        """(start, end) minutes of the week this meets, one per day.
+        """
+        return meeting_intervals(self.meeting)
+
+    def dict(self):
+        # useful for encoding as JSON
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+@dataclass
+class Instructor:
+    __slots__ = ("name", "id")
+
+    name: str
+    # actually a hash, i think; but a unique identifier of some sort
+    id: str
+
+    def __post_init__(self):
+        self.name = intern_str(self.name)
+        self.id = intern_str(self.id)
+
+    def __str__(self):
+        return self.name
+
+    def dict(self):
+        # useful for encoding as JSON
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+@dataclass
+class Course:
+    __slots__ = (
+        "name",
+        "class_number",
+        "subject",
+        "number",
+        "group",
+        "section",
+        "schedule",
+        "enrolled",
+        "limit",
+        "waiting",
+        "enrollment_status",
+        "syllabus",
+        "instructors",
+        "uni_reqs",
+        "description",
+        "notes",
+        "semester",
+        "year",
+    )
+
+    # e.g. Modal, Temporal, and Spatial Logic for Language
+    name: str
+    # e.g. 16903; registration number for sage
+    class_number: int
+
+    # subject, number, and group form parts of the course's "display name"
+    # an example is COSI 118A_1, where the trailing "1" is a section number
+    # e.g. COSI
+    subject: str
+    # e.g. 118
+    number: int
+    # e.g. a, b, c, ...
+    group: str
+    # 1, 2, 3...
+    # SOMETIMES (ED 285 1DL) something weird like '1DL'
+    section: str
+
+    # see CourseTime.meeting and CourseTime.intervals for the parsed times
+    schedule: List[CourseTime]
+
+    # enrollment
+    enrolled: int
+    limit: int
+    waiting: int
+    # open, closed, consent req., etc. that kinda thing
+    enrollment_status: str
+
+    # syllabus link
+    syllabus: Optional[str]
+    # instructor(s); a list
+    instructors: List[Instructor]
+    # fulfills which requirements?
+    uni_reqs: List[str]
+    # long description; might include frequencies and prerequisites
+    description: Optional[str]
+    # notes below course title, might include notes on prereqs, etc.
+    notes: str
+
+    semester: Optional[str]
+    year: Optional[int]
+
+    def __post_init__(self):
+        self.subject = intern_str(self.subject)
+        self.group = intern_str(self.group)
+        self.section = intern_str(self.section)
+        self.enrollment_status = intern_str(self.enrollment_status)
+        self.semester = intern_str(self.semester)
+        if self.uni_reqs:
+            self.uni_reqs = [intern_str(req) for req in self.uni_reqs]
+
+    @property
+    def title(self) -> str:
+        """An alias for ``self.name``
+        """
+        return self.name
+
+    @property
+    def instructor_links(self) -> Iterable[str]:
+        """URLs linking to each instructor.
+        """
+        return (
+            "https://www.brandeis.edu/facguide/person.html?emplid={instructor.id}"
+            for instructor in self.instructors
+        )
+
+    @property
+    def friendly_number(self) -> str:
+        """User-friendly course number.
+        """
+        return f"{self.subject} {self.number}{self.group}" + (
+            f"_{self.section}" if self.section else ""
+        )
+
+    @property
+    def uni_reqs_str(self) -> str:
+        """Requirements-description string.
+        """
+        return ("[" + ", ".join(self.uni_reqs) + "]") if self.uni_reqs else ""
+
+    @property
+    def instructor_str(self) -> str:
+        """Instructor string.
+        """
+        return "; ".join(map(str, self.instructors)) if self.instructors else ""
+
+    @property
+    def intervals(self) -> List[Interval]:
+        """(start, end) minutes of the week of every meeting in the schedule.
+        """
+        return [interval for ct in self.schedule or [] for interval in ct.intervals]
+
+    def dict(self):
+        ret = dict(zip(self.__slots__, _course_values(self)))
+        if ret["schedule"]:
+            ret["schedule"] = [ct.dict() for ct in ret["schedule"]]
+        if ret["instructors"]:
+            ret["instructors"] = [i.dict() for i in ret["instructors"]]
+        return ret
+
+    @staticmethod
+    def from_dict(d):
+        # positionally, rather than Course(**d); this is most of load_courses
+        ret = Course(*_course_items(d))
+        if ret.schedule:
+            ret.schedule = [CourseTime(*_course_time_items(s)) for s in ret.schedule]
+        if ret.instructors:
+            ret.instructors = [
+                Instructor(*_instructor_items(i)) for i in ret.instructors
+            ]
+        return ret
+
+    def __str__(self):
+        return f"{self.friendly_number} {self.name} ({self.instructor_str})" + (
+            f" {self.uni_reqs_str}" if self.uni_reqs else ""
+        )
+
+
+# field values in order, for Course.dict and Course.from_dict
+_course_values = operator.attrgetter(*Course.__slots__)
+_course_items = operator.itemgetter(*Course.__slots__)
+_course_time_items = operator.itemgetter(*CourseTime.__slots__)
+_instructor_items = operator.itemgetter(*Instructor.__slots__)
+
+
+def load_courses(file_obj, encoder: Optional[str] = None):
+    """Loads courses from a JSON array or a JSON Lines file.
+
+    encoder: which of ``serialize.ENCODERS`` to decode with; see
+        ``serialize.encoder``
+    """
+    loads = serialize.encoder(encoder).loads
+    text = file_obj.read()
+    if text.lstrip().startswith("["):
+        course_dicts = loads(text)
+    else:
+        course_dicts = [loads(line) for line in text.splitlines() if line.strip()]
+    return [Course.from_dict(c) for c in course_dicts]
@@ -0,0 +1,155 @@
+"""Crash-safe, resumable output for a semester's scrape.
+
+While a semester's being scraped, each page is written to its own JSON Lines
+file in ``out/{year}-{semester}.pages/``; a page's file only appears (by
+atomic rename) once the whole page has been written, and a checkpoint file
+records which pages are finished. A scrape that dies partway through can be
+rerun and will only fetch the missing pages. Once every page is in, they're
+joined into ``out/{year}-{semester}.json`` (or ``.jsonl``), again atomically,
+and the page directory is removed.
+
+Courses are encoded with ``serialize.encoder``, one compact line each; a
+``pretty`` JSON array is indented instead, which costs decoding and encoding
+every course again when the pages are joined.
+"""
+
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from typing import IO, Any, Iterable, Iterator, List, Optional, Set
+
+from . import metrics, serialize
+
+FORMATS = ("json", "jsonl")
+CHECKPOINT = "checkpoint.json"
+
+
+@contextmanager
+def atomic_write(
+    path: str, mode: str = "w", encoding: Optional[str] = None
+) -> Iterator[IO]:
+    """Opens a temporary file that replaces ``path`` once it's closed.
+
+    If the block raises, ``path`` is left as it was.
+    """
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, mode, encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class SemesterOutput:
+    """The output files for one semester's scrape.
+    """
+
+    def __init__(
+        self,
+        year: int,
+        semester: str,
+        fmt: str = "json",
+        outdir="out",
+        pretty: bool = False,
+        encoder: Optional[str] = None,
+    ):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format {fmt!r}; expected one of {FORMATS}")
+        self.fmt = fmt
+        # JSON Lines can't be indented
+        self.pretty = pretty and fmt == "json"
+        self.encoder = serialize.encoder(encoder)
+        base = os.path.join(outdir, f"{year}-{semester}")
+        self.path = f"{base}.{fmt}"
+        self.pages_dir = f"{base}.pages"
+        self.checkpoint_path = os.path.join(self.pages_dir, CHECKPOINT)
+
+        # finished pages
+        self.done: Set[int] = set()
+        # the last page, if we know it
+        self.high: Optional[int] = None
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+            self.done = set(checkpoint["pages"])
+            self.high = checkpoint["high"]
+
+    def page_path(self, pg: int) -> str:
+        return os.path.join(self.pages_dir, f"{pg:04}.jsonl")
+
+    def _save_checkpoint(self) -> None:
+        with atomic_write(self.checkpoint_path) as f:
+            json.dump({"pages": sorted(self.done), "high": self.high}, f)
+
+    def write_page(self, pg: int, courses: Iterable[Any]) -> int:
+        """Writes a page of courses (``Course`` objects or their dicts), each
+        as soon as it's available.
+
+        Returns the number of courses written.
+        """
+        os.makedirs(self.pages_dir, exist_ok=True)
+        dumps = self.encoder.dumps
+        rows = 0
+        # courses might still be parsing; only time the writing
+        spent = 0.0
+        with atomic_write(self.page_path(pg), encoding="utf-8") as f:
+            for course in courses:
+                start = time.perf_counter()
+                f.write(dumps(course))
+                f.write("\n")
+                spent += time.perf_counter() - start
+                rows += 1
+        self.done.add(pg)
+        self._save_checkpoint()
+        metrics.REGISTRY.observe("write_page", spent)
+        return rows
+
+    def set_high(self, high: Optional[int]) -> None:
+        if high is not None and high != self.high:
+            self.high = high
+            self._save_checkpoint()
+
+    def pages(self) -> List[int]:
+        return sorted(self.done)
+
+    def finish(self) -> int:
+        """Joins the finished pages into the final output file.
+
+        Returns the number of courses written.
+        """
+        rows = 0
+        encoder = self.encoder
+        with metrics.timer("write_output"), atomic_write(
+            self.path, encoding="utf-8"
+        ) as out:
+            if self.fmt == "json":
+                out.write("[")
+            first = True
+            for pg in self.pages():
+                with open(self.page_path(pg), encoding="utf-8") as page:
+                    for line in page:
+                        rows += 1
+                        if self.fmt == "jsonl":
+                            out.write(line)
+                            continue
+                        out.write("\n" if first else ",\n")
+                        if self.pretty:
+                            out.write(encoder.dumps(encoder.loads(line), pretty=True))
+                        else:
+                            # already encoded; just drop the newline
+                            out.write(line.rstrip("\n"))
+                        first = False
+            if self.fmt == "json":
+                out.write("\n]\n")
+        if os.path.isdir(self.pages_dir):
+            shutil.rmtree(self.pages_dir)
+        self.done = set()
+        self.high = None
+        metrics.inc("courses_written", rows)
+        return rows
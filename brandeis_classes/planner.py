@@ -0,0 +1,130 @@
+"""Builds conflict-free schedules from a list of candidate courses.
+
+Every section of a course (``COSI 119A_1``, ``COSI 119A_2``, ...) is grouped
+under the course (``COSI 119A``); a schedule is one section from each group,
+no two of which meet at the same time.
+
+Sections are numbered, and which sections conflict with each is precomputed
+as a bitset (a Python int, bit j set if section j conflicts). The search
+backtracks, always filling the group with the fewest sections left, and
+prunes as soon as any group has no section left that fits.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .model import Course
+from .schedule import IntervalIndex
+
+
+def course_key(course: Course) -> str:
+    """``friendly_number`` without the section, e.g. ``COSI 119A``.
+    """
+    return f"{course.subject} {course.number}{course.group}"
+
+
+def group_sections(courses: Iterable[Course]) -> Dict[str, List[Course]]:
+    """Groups sections by ``course_key``, keeping their order.
+    """
+    groups: Dict[str, List[Course]] = {}
+    for course in courses:
+        groups.setdefault(course_key(course), []).append(course)
+    return groups
+
+
+def popcount(n: int) -> int:
+    return bin(n).count("1")
+
+
+class ScheduleBuilder:
+    """Every conflict-free combination of sections of some courses.
+
+    courses: every candidate section
+    wanted: the ``course_key``s to schedule (default: every course in
+    ``courses``); a key with no sections means there are no schedules
+    """
+
+    def __init__(
+        self, courses: Iterable[Course], wanted: Optional[Sequence[str]] = None
+    ):
+        groups = group_sections(courses)
+        if wanted is not None:
+            groups = {key: groups.get(key, []) for key in wanted}
+        self.keys = list(groups)
+        self.sections: List[Course] = [c for group in groups.values() for c in group]
+
+        # group g's sections, as a bitset
+        self.masks: List[int] = []
+        self.group_of: List[int] = []
+        for g, group in enumerate(groups.values()):
+            first = len(self.group_of)
+            self.masks.append(((1 << len(group)) - 1) << first)
+            self.group_of.extend([g] * len(group))
+
+        # conflicts[i]: sections that can't be taken alongside section i
+        index = IntervalIndex(self.sections)
+        position = {id(c): i for i, c in enumerate(self.sections)}
+        self.conflicts: List[int] = []
+        for section in self.sections:
+            bits = 0
+            for other in index.conflicts(section):
+                bits |= 1 << position[id(other)]
+            self.conflicts.append(bits)
+
+    def _search(self, remaining: List[int], allowed: int, chosen: List[int]):
+        if not remaining:
+            yield chosen
+            return
+        # the most constrained group first
+        best = min(remaining, key=lambda g: popcount(self.masks[g] & allowed))
+        rest = [g for g in remaining if g != best]
+        candidates = self.masks[best] & allowed
+        while candidates:
+            low = candidates & -candidates
+            candidates ^= low
+            i = low.bit_length() - 1
+            narrowed = allowed & ~self.conflicts[i]
+            # forward check: every other group still needs a section that fits
+            if all(self.masks[g] & narrowed for g in rest):
+                chosen.append(i)
+                yield from self._search(rest, narrowed, chosen)
+                chosen.pop()
+
+    def schedules(self) -> Iterator[List[Course]]:
+        """Yields each conflict-free schedule, as one section per course in
+        the order of ``keys``.
+        """
+        allowed = (1 << len(self.sections)) - 1
+        for chosen in self._search(list(range(len(self.keys))), allowed, []):
+            ordered = sorted(chosen, key=self.group_of.__getitem__)
+            yield [self.sections[i] for i in ordered]
+
+    def _count(self, remaining: List[int], allowed: int) -> int:
+        if len(remaining) == 1:
+            # the last group: every section that's left fits
+            return popcount(self.masks[remaining[0]] & allowed)
+        best = min(remaining, key=lambda g: popcount(self.masks[g] & allowed))
+        rest = [g for g in remaining if g != best]
+        total = 0
+        candidates = self.masks[best] & allowed
+        while candidates:
+            low = candidates & -candidates
+            candidates ^= low
+            narrowed = allowed & ~self.conflicts[low.bit_length() - 1]
+            if all(self.masks[g] & narrowed for g in rest):
+                total += self._count(rest, narrowed)
+        return total
+
+    def count(self) -> int:
+        """The number of conflict-free schedules, without building them.
+        """
+        if not self.keys:
+            return 1
+        return self._count(list(range(len(self.keys))), (1 << len(self.sections)) - 1)
+
+
+def schedules(
+    courses: Iterable[Course], wanted: Optional[Sequence[str]] = None
+) -> Iterator[List[Course]]:
+    """Shorthand for ``ScheduleBuilder(courses, wanted).schedules()``.
+    """
+    return ScheduleBuilder(courses, wanted).schedules()
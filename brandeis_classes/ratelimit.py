@@ -0,0 +1,40 @@
+"""Token-bucket rate limiting for requests to the registrar.
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """A thread-safe token bucket.
+
+    Tokens accumulate at ``rate`` per second, up to ``burst`` tokens; each call
+    to ``acquire()`` spends one, blocking until it's available. Waiters reserve
+    their token before sleeping, so concurrent callers are spaced out evenly
+    rather than all waking at once.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._last) * self.rate
+            )
+            self._last = now
+            # may go negative; that's our place in line
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait:
+            time.sleep(wait)
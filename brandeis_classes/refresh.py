@@ -0,0 +1,380 @@
+"""Incrementally re-scrapes a semester's enrollment numbers.
+
+During registration, the live semester's enrollments change by the minute but
+almost nothing else does. A refresh fetches each search page conditionally
+(with the ETag and Last-Modified the server sent last time), skips any page
+whose content hash hasn't changed, and only parses the rest; descriptions are
+only fetched for courses it hasn't seen before. Rather than rewriting
+``out/{year}-{semester}.json``, it appends what changed to a change log,
+``out/refresh/{year}-{semester}.changes.jsonl``:
+
+* ``{"class_number": ..., "changes": {"enrolled": [old, new], ...}, ...}`` for
+  a course whose enrollment fields changed;
+* ``{"class_number": ..., "added": {...course...}, ...}`` for a new course.
+
+``replay`` applies a change log to the courses it started from. The pages'
+validators and hashes, and every course's latest enrollment fields, are kept
+in ``out/refresh/{year}-{semester}.json``. The command line tool also records
+each refresh in the semester's ``timeseries.EnrollmentStore``.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from termcolor import colored
+
+from . import brandeis, constants, descriptions, scrape_courses, timeseries
+from .client import HTTPClient, default_client
+from .descriptions import DescriptionFetcher
+from .output import FORMATS, atomic_write
+from .ratelimit import TokenBucket
+from .timeseries import EnrollmentStore
+
+REFRESH_DIR = os.path.join("out", "refresh")
+# only these change during registration
+ENROLLMENT_FIELDS = ("enrolled", "limit", "waiting", "enrollment_status")
+
+
+@dataclass
+class PageFetch:
+    """The result of a conditional fetch of a search page.
+    """
+
+    # None if the page is unchanged since the validators were sent
+    html: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+@dataclass
+class RefreshResult:
+    # pages requested
+    pages: int = 0
+    # pages the server said hadn't changed (304)
+    not_modified: int = 0
+    # pages downloaded, but with the same content as last time
+    unchanged: int = 0
+    # pages parsed
+    parsed: int = 0
+    # courses whose enrollment fields changed
+    changed: int = 0
+    # courses we hadn't seen before
+    added: int = 0
+    # every change log entry written
+    entries: List[dict] = field(default_factory=list)
+
+    def dict(self):
+        ret = self.__dict__.copy()
+        del ret["entries"]
+        return ret
+
+
+def fetch_page(
+    pg: int,
+    year: int,
+    semester: str,
+    validators: Optional[dict] = None,
+    base_url: str = scrape_courses.SEARCH_URL,
+    limiter: Optional[TokenBucket] = None,
+    client: Optional[HTTPClient] = None,
+) -> PageFetch:
+    """Fetches a search page, unless it's unchanged since ``validators`` (a
+    page's saved state) were sent.
+    """
+    validators = validators or {}
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    if limiter is not None:
+        limiter.acquire()
+    client = client if client is not None else default_client()
+    resp = client.get(
+        base_url, params=scrape_courses.req_params(pg, year, semester), headers=headers,
+    )
+    if resp.status_code == 304:
+        return PageFetch(None, validators.get("etag"), validators.get("last_modified"))
+    return PageFetch(
+        resp.text, resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+    )
+
+
+def content_hash(html: str) -> str:
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+def enrollment(course: brandeis.Course) -> list:
+    return [getattr(course, f) for f in ENROLLMENT_FIELDS]
+
+
+class RefreshState:
+    """What the last refresh of a semester saw.
+    """
+
+    def __init__(self, year: int, semester: str, refresh_dir: str = REFRESH_DIR):
+        base = os.path.join(refresh_dir, f"{year}-{semester}")
+        self.path = base + ".json"
+        self.changes_path = base + ".changes.jsonl"
+        # page number -> {"etag", "last_modified", "hash"}
+        self.pages: Dict[int, dict] = {}
+        # class number -> ENROLLMENT_FIELDS values
+        self.enrollment: Dict[int, list] = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                state = json.load(f)
+            self.pages = {int(pg): v for pg, v in state["pages"].items()}
+            self.enrollment = {int(n): v for n, v in state["enrollment"].items()}
+
+    def seed(self, courses: Iterable[brandeis.Course]) -> None:
+        """Starts from a full scrape's courses.
+        """
+        for course in courses:
+            self.enrollment.setdefault(course.class_number, enrollment(course))
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with atomic_write(self.path) as f:
+            json.dump({"pages": self.pages, "enrollment": self.enrollment}, f)
+
+
+def semester_file(year: int, semester: str, outdir: str = "out") -> Optional[str]:
+    """The full scrape of a semester, if there is one.
+    """
+    for fmt in reversed(FORMATS):
+        path = os.path.join(outdir, f"{year}-{semester}.{fmt}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def stored_descriptions(
+    state: RefreshState, path: Optional[str]
+) -> Dict[int, Optional[str]]:
+    """Each known course's description, by class number: from the full scrape
+    at ``path``, and the courses the change log has added since.
+    """
+    found = {}
+    if path is not None:
+        with open(path, encoding="utf-8") as f:
+            for course in brandeis.load_courses(f):
+                found[course.class_number] = course.description
+    if os.path.exists(state.changes_path):
+        for entry in load_changes(state.changes_path):
+            if "added" in entry:
+                found[entry["class_number"]] = entry["added"]["description"]
+    return found
+
+
+def refresh(
+    year: int,
+    semester: str,
+    base_url: str = scrape_courses.SEARCH_URL,
+    limiter: Optional[TokenBucket] = None,
+    fetcher: Optional[DescriptionFetcher] = None,
+    client: Optional[HTTPClient] = None,
+    outdir: str = "out",
+    refresh_dir: str = REFRESH_DIR,
+    store: Optional[EnrollmentStore] = None,
+) -> RefreshResult:
+    """Refreshes a semester's enrollments, appending to its change log.
+
+    The first refresh of a semester starts from its full scrape in ``outdir``,
+    if there is one; otherwise every course is logged as added.
+
+    Only new courses' descriptions are fetched (through ``fetcher``, or else
+    one limited by ``limiter``); the rest are carried over from the full
+    scrape and the change log.
+
+    store: if given, the new enrollments are recorded in it too
+    """
+    state = RefreshState(year, semester, refresh_dir)
+    path = semester_file(year, semester, outdir)
+    if not state.enrollment:
+        if path is not None:
+            with open(path, encoding="utf-8") as f:
+                base = brandeis.load_courses(f)
+            state.seed(base)
+            if store is not None and not store.times:
+                store.append(base, os.stat(path).st_mtime)
+
+    result = RefreshResult()
+    started = time.time()
+    now = time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(started))
+    parsed = []
+    # read when a page is first parsed
+    known: Optional[Dict[int, Optional[str]]] = None
+    own_fetcher = fetcher is None
+    # pages we know about; parsing a page can turn up more
+    pending = set(state.pages) | {1}
+    done = set()
+    try:
+        while pending - done:
+            pg = min(pending - done)
+            done.add(pg)
+            saved = state.pages.get(pg, {})
+            fetched = fetch_page(
+                pg, year, semester, saved, base_url, limiter=limiter, client=client
+            )
+            result.pages += 1
+            if fetched.html is None:
+                result.not_modified += 1
+                continue
+            digest = content_hash(fetched.html)
+            state.pages[pg] = {
+                "etag": fetched.etag,
+                "last_modified": fetched.last_modified,
+                "hash": digest,
+            }
+            if saved.get("hash") == digest:
+                result.unchanged += 1
+                continue
+
+            result.parsed += 1
+            if known is None:
+                known = stored_descriptions(state, path)
+            courses, urls = brandeis.page_rows(fetched.html, pages=pending)
+            unseen = []
+            for course, url in zip(courses, urls):
+                course.year = year
+                course.semester = semester
+                if course.class_number in state.enrollment:
+                    course.description = known.get(course.class_number)
+                else:
+                    unseen.append((course, url))
+            if unseen:
+                if fetcher is None:
+                    fetcher = DescriptionFetcher(limiter=limiter)
+                descriptions.fill_descriptions(unseen, fetcher)
+
+            for course in courses:
+                parsed.append(course)
+                entry = {
+                    "time": now,
+                    "page": pg,
+                    "class_number": course.class_number,
+                    "course": course.friendly_number,
+                }
+                old = state.enrollment.get(course.class_number)
+                new = enrollment(course)
+                if old is None:
+                    entry["added"] = course.dict()
+                    result.added += 1
+                elif old != new:
+                    entry["changes"] = {
+                        f: [o, n]
+                        for f, o, n in zip(ENROLLMENT_FIELDS, old, new)
+                        if o != n
+                    }
+                    result.changed += 1
+                else:
+                    continue
+                state.enrollment[course.class_number] = new
+                result.entries.append(entry)
+    finally:
+        if own_fetcher and fetcher is not None:
+            fetcher.close()
+
+    if result.entries:
+        os.makedirs(os.path.dirname(state.changes_path) or ".", exist_ok=True)
+        with open(state.changes_path, "a") as f:
+            for entry in result.entries:
+                f.write(json.dumps(entry))
+                f.write("\n")
+    state.save()
+    if store is not None:
+        store.append(parsed, started)
+    return result
+
+
+def replay(courses: Sequence[brandeis.Course], changes: Iterable[dict]):
+    """Applies change log entries to a full scrape's courses (in place);
+    returns the courses, including any added.
+    """
+    courses = list(courses)
+    by_number = {c.class_number: c for c in courses}
+    for entry in changes:
+        if "added" in entry:
+            course = brandeis.Course.from_dict(entry["added"])
+            by_number[course.class_number] = course
+            courses.append(course)
+        else:
+            course = by_number[entry["class_number"]]
+            for f, (_, new) in entry["changes"].items():
+                setattr(course, f, new)
+    return courses
+
+
+def load_changes(path: str) -> List[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="""Re-scrapes a semester's enrollments, logging what changed
+        since the last scrape or refresh"""
+    )
+    parser.add_argument(
+        "-r",
+        "--rate",
+        type=float,
+        default=scrape_courses.DEFAULT_RATE,
+        help=f"""Maximum requests per second (default
+        {scrape_courses.DEFAULT_RATE})""",
+    )
+    parser.add_argument(
+        "--description-cache",
+        default=descriptions.DEFAULT_CACHE,
+        help=f"""Cache file for course descriptions, needed for new courses
+        (default {descriptions.DEFAULT_CACHE}); pass an empty string to disable""",
+    )
+    parser.add_argument("year", type=int)
+    parser.add_argument("semester", choices=constants.SEMESTERS)
+    args = parser.parse_args()
+
+    if args.rate <= 0:
+        parser.error("--rate must be positive")
+
+    limiter = TokenBucket(args.rate)
+    cache = (
+        descriptions.DescriptionCache(args.description_cache)
+        if args.description_cache
+        else None
+    )
+    store = EnrollmentStore(timeseries.store_path(args.year, args.semester))
+    with DescriptionFetcher(cache, limiter=limiter) as fetcher:
+        result = refresh(
+            args.year, args.semester, limiter=limiter, fetcher=fetcher, store=store
+        )
+    if cache is not None:
+        cache.close()
+
+    for entry in result.entries:
+        if "added" in entry:
+            print(colored("+", "green"), entry["course"])
+        else:
+            print(
+                colored("~", "yellow"),
+                entry["course"],
+                ", ".join(
+                    f"{f} {old} -> {new}" for f, (old, new) in entry["changes"].items()
+                ),
+            )
+    print(
+        colored(
+            f"{result.pages} pages: {result.not_modified} not modified, "
+            f"{result.unchanged} unchanged, {result.parsed} parsed; "
+            f"{result.changed} courses changed, {result.added} added",
+            attrs=["bold"],
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Structured meeting times, and an index for querying them.
+
+``CourseTime.times`` is a string like ``M,W,Th 11:00 AM–11:50 AM`` (or
+``TBD``). ``parse_meeting`` turns it into a ``Meeting``: a bitmask of days and
+a start and end in minutes since midnight. Times are measured in minutes of
+the week (Monday 00:00 is 0) so that meetings on different days never overlap.
+
+``IntervalIndex`` keeps every meeting of a semester sorted by start, so a
+query like "what meets Tuesday 2–4pm" is a binary search rather than a scan
+over every course.
+"""
+
+import functools
+import re
+from bisect import bisect_left
+from collections import namedtuple
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence, Set, Tuple
+
+if TYPE_CHECKING:
+    from .model import Course
+
+DAYS = ["M", "T", "W", "Th", "F", "Sa", "Su"]
+# bit i is DAYS[i]
+DAY_BITS = {day: 1 << i for i, day in enumerate(DAYS)}
+DAY_BITS.update({"Tu": DAY_BITS["T"], "S": DAY_BITS["Sa"]})
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+CLOCK_RE = re.compile(r"(\d{1,2}):(\d{2})\s*([AP]M)", re.IGNORECASE)
+TIMES_RE = re.compile(
+    r"^\s*([A-Za-z]+(?:\s*,\s*[A-Za-z]+)*)\s+"
+    r"(\d{1,2}:\d{2}\s*[AP]M)\s*[–—-]\s*(\d{1,2}:\d{2}\s*[AP]M)\s*$",
+    re.IGNORECASE,
+)
+
+# days: a bitmask of DAY_BITS; start and end: minutes since midnight
+Meeting = namedtuple("Meeting", ["days", "start", "end"])
+
+Interval = Tuple[int, int]
+
+
+def parse_clock(clock: str) -> int:
+    """``2:30 PM`` -> minutes since midnight (870).
+    """
+    match = CLOCK_RE.fullmatch(clock.strip())
+    if match is None:
+        raise ValueError(f"Can't parse time {clock!r}")
+    hour, minute, half = int(match[1]), int(match[2]), match[3].upper()
+    if not (1 <= hour <= 12 and minute < 60):
+        raise ValueError(f"Can't parse time {clock!r}")
+    return (hour % 12 + (12 if half == "PM" else 0)) * 60 + minute
+
+
+def day_mask(days: str) -> int:
+    """``M,W,Th`` -> a bitmask of DAY_BITS.
+    """
+    mask = 0
+    for day in days.split(","):
+        day = day.strip().capitalize()
+        if day not in DAY_BITS:
+            raise ValueError(f"Unknown day {day!r}")
+        mask |= DAY_BITS[day]
+    return mask
+
+
+# there are only a few hundred distinct schedule strings in a semester
+@functools.lru_cache(maxsize=4096)
+def parse_meeting(times: Optional[str]) -> Optional[Meeting]:
+    """Parses a ``CourseTime.times`` string.
+
+    Returns None for ``TBD``, missing times, and anything else that isn't a
+    set of days and a time range.
+    """
+    if not times:
+        return None
+    match = TIMES_RE.match(times)
+    if match is None:
+        return None
+    try:
+        return Meeting(
+            days=day_mask(match[1]),
+            start=parse_clock(match[2]),
+            end=parse_clock(match[3]),
+        )
+    except ValueError:
+        return None
+
+
+def meeting_days(days: int) -> List[int]:
+    """The day numbers (0 is Monday) in a bitmask.
+    """
+    return [i for i in range(len(DAYS)) if days & (1 << i)]
+
+
+def meeting_intervals(meeting: Optional[Meeting]) -> List[Interval]:
+    """A meeting's (start, end) minutes of the week, one per day.
+    """
+    if meeting is None:
+        return []
+    return [
+        (day * MINUTES_PER_DAY + meeting.start, day * MINUTES_PER_DAY + meeting.end)
+        for day in meeting_days(meeting.days)
+    ]
+
+
+def week_interval(day: str, start: str, end: str) -> Interval:
+    """``("T", "2:00 PM", "4:00 PM")`` -> minutes of the week.
+    """
+    offset = DAYS.index(day.capitalize()) * MINUTES_PER_DAY
+    return offset + parse_clock(start), offset + parse_clock(end)
+
+
+def overlaps(a: Iterable[Interval], b: Iterable[Interval]) -> bool:
+    """Whether any interval of ``a`` overlaps any interval of ``b``.
+
+    Intervals are half-open, so a class ending at 2:00 doesn't conflict with
+    one starting at 2:00.
+    """
+    b = list(b)
+    return any(s1 < e2 and s2 < e1 for s1, e1 in a for s2, e2 in b)
+
+
+class IntervalIndex:
+    """Every meeting of a set of courses, sorted by start.
+
+    A meeting [start, end) overlaps the query [qstart, qend) iff
+    ``start < qend`` and ``end > qstart``. No meeting is longer than
+    ``max_length``, so every overlapping meeting starts in
+    ``(qstart - max_length, qend)``; that range is found by bisection.
+    """
+
+    def __init__(self, courses: Sequence["Course"]):
+        self.courses = list(courses)
+        entries = sorted(
+            (start, end, i)
+            for i, course in enumerate(self.courses)
+            for start, end in course.intervals
+        )
+        self.starts = [start for start, _, _ in entries]
+        self.ends = [end for _, end, _ in entries]
+        self.course_idx = [i for _, _, i in entries]
+        self.max_length = max((end - start for start, end, _ in entries), default=0)
+
+    def __len__(self) -> int:
+        """The number of meetings (not courses) indexed.
+        """
+        return len(self.starts)
+
+    def _overlapping(self, start: int, end: int) -> Iterable[int]:
+        lo = bisect_left(self.starts, start - self.max_length + 1)
+        hi = bisect_left(self.starts, end)
+        for k in range(lo, hi):
+            if self.ends[k] > start:
+                yield self.course_idx[k]
+
+    def overlapping(self, start: int, end: int) -> List["Course"]:
+        """Courses meeting at any point in [start, end) minutes of the week,
+        in the order they were given.
+        """
+        found = sorted(set(self._overlapping(start, end)))
+        return [self.courses[i] for i in found]
+
+    def meets(self, day: str, start: str, end: str) -> List["Course"]:
+        """e.g. ``meets("T", "2:00 PM", "4:00 PM")``
+        """
+        return self.overlapping(*week_interval(day, start, end))
+
+    def conflicts(self, course: "Course") -> List["Course"]:
+        """Courses with a meeting overlapping one of ``course``'s, other than
+        ``course`` itself.
+        """
+        found: Set[int] = set()
+        for start, end in course.intervals:
+            found.update(self._overlapping(start, end))
+        return [self.courses[i] for i in sorted(found) if self.courses[i] is not course]
@@ -1,18 +1,21 @@
 import argparse
-import json
 import os
-import random
 import sys
-import time
-from typing import Iterable
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Collection, Deque, Iterable, Optional, Set, Tuple, Union
 
-import bs4
-import requests
 from termcolor import colored
 
-from . import brandeis, constants
+from . import brandeis, constants, descriptions, metrics, serialize
+from .client import HTTPClient, default_client
+from .descriptions import DescriptionFetcher
+from .output import FORMATS, SemesterOutput
+from .ratelimit import TokenBucket
 
 SEARCH_URL = "http://registrar-prod.unet.brandeis.edu/registrar/schedule/search"
+# requests per second to the search page
+DEFAULT_RATE = 0.5
 
 
 def req_params(page: int, year: int, semester: str) -> dict:
@@ -33,61 +36,307 @@ def req_params(page: int, year: int, semester: str) -> dict:
     }
 
 
-def courses(start_pg, end_pg, year: int, semester: str, base_url: str = SEARCH_URL):
-    for pg in range(start_pg, end_pg + 1):
-        print(colored(f"\r--- Page {pg} / {end_pg} ---", attrs=["bold"]), end="")
-        sys.stdout.flush()
-        req = requests.get(base_url, params=req_params(pg, year, semester))
-        if not req.ok:
-            raise requests.exceptions.HTTPError
-        print(" (Main req. fin.)")
-        courses = brandeis.page_to_courses(req.text)
-        for course in courses:
+def fetch_search_page(
+    pg: int,
+    year: int,
+    semester: str,
+    base_url: str = SEARCH_URL,
+    limiter: Optional[TokenBucket] = None,
+    client: Optional[HTTPClient] = None,
+) -> str:
+    if limiter is not None:
+        limiter.acquire()
+    client = client if client is not None else default_client()
+    with metrics.timer("search_page"):
+        html = client.get_text(base_url, params=req_params(pg, year, semester))
+    metrics.inc("search_pages")
+    return html
+
+
+def page_courses(
+    html: str,
+    year: int,
+    semester: str,
+    fetcher: Optional[DescriptionFetcher] = None,
+    pages: Optional[Set[int]] = None,
+) -> Iterable[brandeis.Course]:
+    """Yields the courses on a page, in order, each as soon as its description
+    arrives.
+
+    The page numbers in the page's pager are added to ``pages``.
+    """
+    courses, urls = brandeis.page_rows(html, pages=pages)
+    own_fetcher = fetcher is None
+    if own_fetcher:
+        fetcher = DescriptionFetcher()
+    try:
+        # ask for every description before waiting on the first
+        futures = [fetcher.submit(url) for url in urls]
+        for course, future in zip(courses, futures):
+            course.description = future.result()
             course.year = year
             course.semester = semester
-        yield courses
-        if pg != end_pg:
-            print("Sleeping...", end="")
-            sys.stdout.flush()
-            time.sleep(random.randint(1, 15))
-
-
-def high_page(year: int, semester: str) -> int:
-    req = requests.get(SEARCH_URL, params=req_params(1, year, semester))
-    if not req.ok:
-        raise requests.exceptions.HTTPError
-    soup = bs4.BeautifulSoup(req.text, "html.parser")
-    return max(
-        map(
-            int,
-            filter(
-                str.isdigit,
-                map(lambda t: t.text, soup.find_all("a", {"class": "pagenumber"})),
-            ),
-        )
-    )
+            yield course
+    finally:
+        if own_fetcher:
+            fetcher.close()
+
+
+def numbered_pages(
+    start_pg,
+    end_pg,
+    year: int,
+    semester: str,
+    base_url: str = SEARCH_URL,
+    jobs: int = 1,
+    limiter: Optional[TokenBucket] = None,
+    fetcher: Optional[DescriptionFetcher] = None,
+    lazy: bool = False,
+    on_page: Optional[Callable[[int, Optional[int]], None]] = None,
+    skip: Collection[int] = (),
+) -> Iterable[Tuple[int, Iterable[brandeis.Course]]]:
+    """Yields (page number, courses on the page), in page order.
+
+    Each page's courses are themselves yielded as they're parsed, so each
+    page should be consumed before moving on to the next.
+
+    If ``end_pg`` is None, the last page is found from the pager on the first
+    page we fetch (so no separate request is needed). If ``lazy`` is true, the
+    pager on *every* page is checked for further pages, and we keep going
+    until the first page without any courses. Pages in ``skip`` (e.g. ones
+    we've already saved) aren't fetched at all.
+
+    Up to ``jobs`` pages are fetched at once; ``limiter`` (by default, one
+    allowing ``DEFAULT_RATE`` requests per second) spaces the requests out.
+    Descriptions are fetched through ``fetcher``, which should be shared
+    between pages so each description is only fetched once; by default, one
+    is made for this call, limited by ``limiter`` too.
+
+    ``on_page(page, total_pages)`` is called as each page arrives (the total
+    is None while it's unknown); by default, progress is printed instead.
+    """
+    if limiter is None:
+        limiter = TokenBucket(DEFAULT_RATE)
+
+    discover = end_pg is None
+    next_pg = start_pg
+    if discover:
+        # start with the first page we actually need
+        high = start_pg
+        while high in skip:
+            high += 1
+    else:
+        high = end_pg
+    # (page number, future of its html), in page order
+    futures: Deque[Tuple[int, Future]] = deque()
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+
+        def submit_through(high):
+            nonlocal next_pg
+            while next_pg <= high:
+                if next_pg not in skip:
+                    futures.append(
+                        (
+                            next_pg,
+                            pool.submit(
+                                fetch_search_page,
+                                next_pg,
+                                year,
+                                semester,
+                                base_url,
+                                limiter,
+                            ),
+                        )
+                    )
+                next_pg += 1
+
+        submit_through(high)
+        own_fetcher = fetcher is None
+        if own_fetcher:
+            fetcher = DescriptionFetcher(limiter=limiter)
+        first = True
+        try:
+            while futures:
+                pg, future = futures.popleft()
+                total = None if discover and (lazy or first) else high
+                if on_page is None:
+                    print(
+                        colored(
+                            f"\r--- Page {pg} / {total or '?'} ---", attrs=["bold"]
+                        ),
+                        end="",
+                    )
+                    sys.stdout.flush()
+                html = future.result()
+                if on_page is None:
+                    print(" (Main req. fin.)")
+                else:
+                    on_page(pg, total)
 
+                pages: Set[int] = set()
+                rows = 0
 
-def scrape_courses(year: int, semester: str, start_page: int = 1) -> None:
+                def counted(crss):
+                    nonlocal rows
+                    for crs in crss:
+                        rows += 1
+                        yield crs
+
+                crss = counted(page_courses(html, year, semester, fetcher, pages))
+                yield pg, crss
+                # in case the caller didn't finish the page
+                for _ in crss:
+                    pass
+
+                if lazy and not rows:
+                    break
+                if discover and (lazy or first):
+                    high = max(pages, default=pg)
+                    submit_through(high)
+                if lazy and not futures:
+                    # the pager didn't show anything new (or only pages we're
+                    # skipping); try the next page anyways
+                    high = next_pg
+                    while high in skip:
+                        high += 1
+                    submit_through(high)
+                first = False
+        finally:
+            # if we're closed early, don't bother with the rest
+            for _, future in futures:
+                future.cancel()
+            if own_fetcher:
+                fetcher.close()
+
+
+def courses(
+    start_pg, end_pg, year: int, semester: str, base_url: str = SEARCH_URL, **kwargs
+) -> Iterable[Iterable[brandeis.Course]]:
+    """Yields the courses on each page, in page order.
+
+    See ``numbered_pages`` for the arguments.
+    """
+    for _, crss in numbered_pages(start_pg, end_pg, year, semester, base_url, **kwargs):
+        yield crss
+
+
+def scrape_courses(
+    year: int,
+    semester: str,
+    start_page: int = 1,
+    jobs: int = 1,
+    rate: float = DEFAULT_RATE,
+    description_cache: Union[
+        str, descriptions.DescriptionCache, None
+    ] = descriptions.DEFAULT_CACHE,
+    description_jobs: int = descriptions.DEFAULT_JOBS,
+    lazy: bool = False,
+    limiter: Optional[TokenBucket] = None,
+    progress: Optional[Callable[[int, Optional[int], int], None]] = None,
+    fmt: str = "json",
+    search_index: Optional[str] = None,
+    pretty: bool = False,
+    encoder: Optional[str] = None,
+) -> int:
+    """Scrapes a semester's courses into ``out/{year}-{semester}.{fmt}``.
+
+    Pages are saved as they're finished (see ``output.SemesterOutput``), so if
+    a previous scrape of the semester died partway through, only the missing
+    pages are fetched.
+
+    description_cache: a path, or an open ``DescriptionCache`` to share
+    limiter: shared with other scrapes instead of one allowing ``rate``
+    requests per second; search and description requests both go through it
+    progress: ``progress(page, total_pages, rows_so_far)`` is called after each
+    page instead of printing progress
+    fmt: ``json`` for one JSON array, or ``jsonl`` for JSON Lines
+    search_index: a directory of full-text search segments to add the
+    semester to (see ``search``), or None to leave it to
+    ``SearchIndex.update``, which ``brandeis_search`` runs
+    pretty: indent the JSON array, rather than a course per line
+    encoder: one of ``serialize.ENCODERS``; see ``serialize.encoder``
+
+    Returns the number of courses scraped.
+    """
     if semester not in constants.SEMESTERS:
         raise ValueError
 
     os.makedirs("out", exist_ok=True)
 
-    with open(f"out/{year}-{semester}.json", "a") as out:
-        out.write("[\n")
-        end_page = high_page(year, semester)
-        for crss in courses(start_page, end_page, year, semester):
-            for i, crs in enumerate(crss):
+    out = SemesterOutput(year, semester, fmt, pretty=pretty, encoder=encoder)
+    if out.done and progress is None:
+        print(colored(f"Resuming; {len(out.done)} pages already done", attrs=["bold"]))
+
+    if isinstance(description_cache, str):
+        # an empty path disables the cache
+        cache = (
+            descriptions.DescriptionCache(description_cache)
+            if description_cache
+            else None
+        )
+        own_cache = True
+    else:
+        cache = description_cache
+        own_cache = False
+    if limiter is None:
+        limiter = TokenBucket(rate)
+    fetcher = DescriptionFetcher(cache, description_jobs, limiter)
+
+    def on_page(pg, total):
+        out.set_high(total)
+        if progress is None:
+            print(
+                colored(f"--- Page {pg} / {total or '?'} ---", attrs=["bold"]),
+                "(Main req. fin.)",
+            )
+
+    def announced(crss):
+        for i, crs in enumerate(crss):
+            if progress is None:
                 if i % 5 == 0 and i > 0:
                     print()
                 print(crs.friendly_number, "\t", end="")
-                json.dump(crs.dict(), out, indent=2)
-                out.write(",\n")
-            print()
-        # truncate the trailing comma to prevent invalid json syntax
-        out.seek(out.tell() - 2)  # DANGEROUS!!!!
-        out.write("\n]\n")
+            yield crs
+
+    complete = (
+        not lazy
+        and out.high is not None
+        and out.done.issuperset(range(start_page, out.high + 1))
+    )
+    rows = 0
+    try:
+        if not complete:
+            with fetcher:
+                for pg, crss in numbered_pages(
+                    start_page,
+                    None if lazy else out.high,
+                    year,
+                    semester,
+                    jobs=jobs,
+                    limiter=limiter,
+                    fetcher=fetcher,
+                    lazy=lazy,
+                    on_page=on_page,
+                    skip=out.done,
+                ):
+                    rows += out.write_page(pg, announced(crss))
+                    if progress is None:
+                        print()
+                    else:
+                        progress(pg, out.high, rows)
+    finally:
+        if own_cache and cache is not None:
+            cache.close()
+
+    rows = out.finish()
+    if search_index:
+        from . import search
+
+        with open(out.path, encoding="utf-8") as f:
+            courses = brandeis.load_courses(f, encoder)
+        search.index_semester(f"{year}-{semester}", courses, out.path, search_index)
+    return rows
 
 
 def main():
@@ -96,7 +345,86 @@ def main():
     )
 
     parser.add_argument(
-        "-s", "--start-page", type=int, default=1, help="""Start page"""
+        "-s",
+        "--start-page",
+        type=int,
+        default=1,
+        help="""Start page; unneeded for resuming an interrupted scrape, which
+        skips the pages already saved""",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=FORMATS,
+        default="json",
+        help="""Output format; a JSON array, or JSON Lines (default json)""",
+    )
+    parser.add_argument(
+        "--pretty",
+        action="store_true",
+        help="""Indent the JSON array, instead of writing one compact course
+        per line (slower)""",
+    )
+    parser.add_argument(
+        "--encoder",
+        choices=list(serialize.ENCODERS),
+        help=f"""JSON encoder (default {serialize.encoder().name}, the fastest
+        installed)""",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="""Number of pages to fetch at once""",
+    )
+    parser.add_argument(
+        "-r",
+        "--rate",
+        type=float,
+        default=DEFAULT_RATE,
+        help=f"""Maximum requests per second, search pages and descriptions
+        together (default {DEFAULT_RATE})""",
+    )
+    parser.add_argument(
+        "--description-jobs",
+        type=int,
+        default=descriptions.DEFAULT_JOBS,
+        help="""Number of course descriptions to fetch at once""",
+    )
+    parser.add_argument(
+        "--description-cache",
+        default=descriptions.DEFAULT_CACHE,
+        help=f"""Cache file for course descriptions (default
+        {descriptions.DEFAULT_CACHE}); pass an empty string to disable""",
+    )
+    parser.add_argument(
+        "--lazy-pages",
+        action="store_true",
+        help="""Find pages from the pager on every page, stopping at the first
+        empty one, rather than trusting the first page's pager""",
+    )
+    parser.add_argument(
+        "--search-index",
+        metavar="DIR",
+        help="""Also add the semester to the full-text search segments in this
+        directory (e.g. out/search, where brandeis_search looks);
+        otherwise brandeis_search indexes it the next time it runs""",
+    )
+    parser.add_argument(
+        "--archive",
+        help="""Keep every search and description page downloaded in this
+        directory, zstd-compressed, for brandeis_reparse (e.g. out/archive)""",
+    )
+    parser.add_argument(
+        "--metrics",
+        help="""Write per-stage timings and counters to this file when done; as
+        Prometheus text if it ends in .prom, JSON otherwise""",
+    )
+    parser.add_argument(
+        "--profile",
+        help="""Run the scrape under cProfile, saving the stats to this file
+        (only the main thread's work; see --jobs)""",
     )
     parser.add_argument("year", type=int)
     parser.add_argument("semester", choices=brandeis.constants.SEMESTERS)
@@ -106,7 +434,38 @@ def main():
     if args.year is None or args.semester is None or args.year is None:
         parser.error("Mandatory argument not given")
 
-    scrape_courses(args.year, args.semester, args.start_page)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.rate <= 0:
+        parser.error("--rate must be positive")
+    if args.description_jobs < 1:
+        parser.error("--description-jobs must be at least 1")
+
+    if args.archive:
+        from . import archive
+
+        default_client().archive = archive.ResponseArchive(args.archive)
+
+    try:
+        with metrics.profile(args.profile):
+            scrape_courses(
+                args.year,
+                args.semester,
+                args.start_page,
+                jobs=args.jobs,
+                rate=args.rate,
+                description_cache=args.description_cache,
+                description_jobs=args.description_jobs,
+                lazy=args.lazy_pages,
+                search_index=args.search_index,
+                fmt=args.format,
+                pretty=args.pretty,
+                encoder=args.encoder,
+            )
+    finally:
+        # even (especially) if it failed
+        if args.metrics:
+            metrics.REGISTRY.write(args.metrics)
 
 
 if __name__ == "__main__":
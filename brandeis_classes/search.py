@@ -0,0 +1,290 @@
+"""Ranked full-text search over course titles, notes, and descriptions.
+
+Each semester's courses get their own index segment, a JSON file in
+``out/search/`` named after the semester's file. A segment maps each term to
+the courses (by position in the semester's file) containing it and how often,
+weighted by field; it's rebuilt whenever its semester's file changes, so
+scraping a new semester only indexes that semester.
+
+Results are ranked with BM25 across every segment searched. A query term
+ending in ``*`` matches every term starting with it, found by bisecting each
+segment's sorted vocabulary.
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import re
+from bisect import bisect_left
+from collections import Counter, namedtuple
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from termcolor import colored
+
+from .model import Course
+from .dataset import Dataset
+from .output import atomic_write
+
+FORMAT_VERSION = 1
+DEFAULT_DIR = os.path.join("out", "search")
+
+# how much a term counts for, depending on where it appears
+FIELD_WEIGHTS = {"name": 3, "notes": 1, "description": 1}
+# BM25 parameters, at the usual values
+K1 = 1.2
+B = 0.75
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or that the this to"
+    " with will".split()
+)
+
+Hit = namedtuple("Hit", ["score", "semester", "position", "course"])
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase words and numbers, without stopwords.
+    """
+    if not text:
+        return []
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def course_terms(course: Course) -> Counter:
+    """Weighted term frequencies for a course.
+    """
+    terms: Counter = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for term in tokenize(getattr(course, field)):
+            terms[term] += weight
+    return terms
+
+
+def segment_path(index_dir: str, key: str) -> str:
+    return os.path.join(index_dir, key + ".json")
+
+
+def source_stamp(path: str) -> List[int]:
+    """Identifies a version of a semester's file; segments are rebuilt when it
+    changes.
+    """
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+class Segment:
+    """The index of one semester.
+    """
+
+    def __init__(self, data: dict):
+        self.semester: str = data["semester"]
+        self.source: List[int] = data["source"]
+        self.subjects: List[str] = data["subjects"]
+        self.lengths: List[int] = data["lengths"]
+        # term -> (positions, frequencies)
+        self.postings: Dict[str, Tuple[List[int], List[int]]] = {
+            term: (docs, freqs) for term, (docs, freqs) in data["postings"].items()
+        }
+        self.vocabulary = sorted(self.postings)
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    @staticmethod
+    def build(semester: str, courses: Sequence[Course], source: List[int]) -> dict:
+        postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        lengths = []
+        for pos, course in enumerate(courses):
+            terms = course_terms(course)
+            lengths.append(sum(terms.values()))
+            for term, freq in terms.items():
+                docs, freqs = postings.setdefault(term, ([], []))
+                docs.append(pos)
+                freqs.append(freq)
+        return {
+            "version": FORMAT_VERSION,
+            "semester": semester,
+            "source": source,
+            "subjects": [c.subject for c in courses],
+            "lengths": lengths,
+            "postings": postings,
+        }
+
+    def expand(self, term: str) -> List[str]:
+        """``term``, or every term it's a prefix of if it ends in ``*``.
+        """
+        if not term.endswith("*"):
+            return [term] if term in self.postings else []
+        prefix = term[:-1]
+        i = bisect_left(self.vocabulary, prefix)
+        ret = []
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(prefix):
+            ret.append(self.vocabulary[i])
+            i += 1
+        return ret
+
+
+def write_segment(index_dir: str, data: dict) -> None:
+    os.makedirs(index_dir, exist_ok=True)
+    with atomic_write(segment_path(index_dir, data["semester"])) as f:
+        json.dump(data, f, separators=(",", ":"))
+
+
+def index_semester(
+    key: str, courses: Sequence[Course], source: str, index_dir: str = DEFAULT_DIR
+) -> None:
+    """Indexes (or reindexes) a semester's courses, read from ``source``.
+    """
+    write_segment(index_dir, Segment.build(key, courses, source_stamp(source)))
+
+
+def parse_query(query: str) -> List[str]:
+    """Query terms, tokenized like the text they're matched against; a
+    trailing ``*`` (prefix search) is kept.
+    """
+    terms = []
+    for word in query.split():
+        prefix = word.endswith("*")
+        tokens = tokenize(word)
+        if prefix and tokens:
+            tokens[-1] += "*"
+        terms.extend(tokens)
+    return terms
+
+
+class SearchIndex:
+    """The search segments of every semester in a ``Dataset``.
+
+    Segments are loaded once and kept; ``update`` (re)builds the ones that are
+    missing or out of date.
+    """
+
+    def __init__(self, data: Optional[Dataset] = None, index_dir: str = DEFAULT_DIR):
+        self.data = data if data is not None else Dataset()
+        self.index_dir = index_dir
+        self.segments: Dict[str, Segment] = {}
+        for key in self.data:
+            path = segment_path(index_dir, key)
+            if os.path.exists(path):
+                with open(path) as f:
+                    segment = json.load(f)
+                if segment["version"] == FORMAT_VERSION:
+                    self.segments[key] = Segment(segment)
+
+    def stale(self) -> List[str]:
+        """Semesters whose segments are missing or out of date.
+        """
+        return [
+            key
+            for key, path in self.data.index.items()
+            if key not in self.segments
+            or self.segments[key].source != source_stamp(path)
+        ]
+
+    def update(self) -> List[str]:
+        """Indexes every stale semester; returns them.
+        """
+        stale = self.stale()
+        for key in stale:
+            segment = Segment.build(
+                key, self.data.load(key), source_stamp(self.data.index[key])
+            )
+            write_segment(self.index_dir, segment)
+            self.segments[key] = Segment(segment)
+        return stale
+
+    def search(
+        self,
+        query: str,
+        subject: Optional[str] = None,
+        semesters: Optional[Iterable[str]] = None,
+        limit: Optional[int] = 10,
+    ) -> List[Hit]:
+        """The courses best matching ``query``, best first.
+
+        subject: only courses in this subject
+        semesters: only these semesters (keys of the dataset)
+        limit: at most this many hits, or None for all of them
+        """
+        terms = parse_query(query)
+        if semesters is None:
+            segments = list(self.segments.values())
+        else:
+            segments = [self.segments[s] for s in semesters if s in self.segments]
+        if not terms or not segments:
+            return []
+
+        # statistics are over every segment searched, so scores are comparable
+        # between semesters
+        n_docs = sum(len(seg) for seg in segments)
+        avg_length = sum(sum(seg.lengths) for seg in segments) / max(n_docs, 1) or 1
+        expanded = [[seg.expand(term) for term in terms] for seg in segments]
+        df: Counter = Counter()
+        for seg, seg_terms in zip(segments, expanded):
+            for matches in seg_terms:
+                for term in matches:
+                    df[term] += len(seg.postings[term][0])
+        idf = {
+            term: math.log(1 + (n_docs - n + 0.5) / (n + 0.5)) for term, n in df.items()
+        }
+
+        scored = []
+        for seg, seg_terms in zip(segments, expanded):
+            scores: Dict[int, float] = {}
+            for matches in seg_terms:
+                for term in matches:
+                    docs, freqs = seg.postings[term]
+                    for pos, freq in zip(docs, freqs):
+                        if subject is not None and seg.subjects[pos] != subject:
+                            continue
+                        norm = K1 * (1 - B + B * seg.lengths[pos] / avg_length)
+                        scores[pos] = scores.get(pos, 0.0) + idf[term] * freq * (
+                            K1 + 1
+                        ) / (freq + norm)
+            scored.extend((score, seg.semester, pos) for pos, score in scores.items())
+
+        if limit is None:
+            best = sorted(scored, key=lambda hit: hit[0], reverse=True)
+        else:
+            best = heapq.nlargest(limit, scored, key=lambda hit: hit[0])
+        return [Hit(score, sem, pos, self.data[sem][pos]) for score, sem, pos in best]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Searches scraped course titles, notes, and descriptions"
+    )
+    parser.add_argument(
+        "query", nargs="*", help="""Search terms; end one with * to match a prefix"""
+    )
+    parser.add_argument("--subject", help="""Only search this subject, e.g. COSI""")
+    parser.add_argument(
+        "--semester",
+        action="append",
+        help="""Only search this semester, e.g. 2019-Fall; may be repeated""",
+    )
+    parser.add_argument(
+        "-n", "--limit", type=int, default=10, help="""Number of results"""
+    )
+    parser.add_argument(
+        "-o", "--outdir", default="out", help="""Scraped data directory"""
+    )
+    args = parser.parse_args()
+
+    index = SearchIndex(Dataset(args.outdir), os.path.join(args.outdir, "search"))
+    for key in index.update():
+        print(colored(f"Indexed {key}", attrs=["bold"]))
+    if not args.query:
+        return
+
+    for hit in index.search(
+        " ".join(args.query), args.subject, args.semester, args.limit
+    ):
+        print(f"{hit.score:6.2f}", hit.semester, hit.course)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""JSON encoders for the scraper's output.
+
+The standard library's ``json`` always works; ``orjson`` and ``msgspec``, if
+installed, are several times faster and encode ``Course`` and friends directly
+(they're dataclasses) instead of going through ``Course.dict()``. Every
+encoder writes the same JSON, compact unless asked to be pretty, and any of
+them can read what the others wrote.
+
+``encoder()`` picks one: by name, else the ``BRANDEIS_ENCODER`` environment
+variable, else the fastest one installed.
+"""
+
+import json
+import os
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None  # type: ignore
+
+ENCODER_ENV = "BRANDEIS_ENCODER"
+
+
+def _default(obj: Any) -> Any:
+    # Course, CourseTime, Instructor
+    if hasattr(obj, "dict"):
+        return obj.dict()
+    raise TypeError(f"Can't encode {type(obj).__name__} as JSON")
+
+
+class Encoder:
+    """Encodes to and decodes from JSON text; see ``ENCODERS``.
+    """
+
+    name = "json"
+
+    def dumps(self, obj: Any, pretty: bool = False) -> str:
+        if pretty:
+            return json.dumps(obj, indent=2, ensure_ascii=False, default=_default)
+        return json.dumps(
+            obj, separators=(",", ":"), ensure_ascii=False, default=_default
+        )
+
+    def loads(self, text: str) -> Any:
+        return json.loads(text)
+
+
+class OrjsonEncoder(Encoder):
+    name = "orjson"
+
+    def dumps(self, obj: Any, pretty: bool = False) -> str:
+        option = orjson.OPT_INDENT_2 if pretty else 0
+        return orjson.dumps(obj, default=_default, option=option).decode("utf-8")
+
+    def loads(self, text: str) -> Any:
+        return orjson.loads(text)
+
+
+class MsgspecEncoder(Encoder):
+    name = "msgspec"
+
+    def __init__(self):
+        self._encoder = msgspec.json.Encoder(enc_hook=_default)
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj: Any, pretty: bool = False) -> str:
+        encoded = self._encoder.encode(obj)
+        if pretty:
+            encoded = msgspec.json.format(encoded, indent=2)
+        return encoded.decode("utf-8")
+
+    def loads(self, text: str) -> Any:
+        return self._decoder.decode(text)
+
+
+# the installed encoders, fastest first
+ENCODERS: Dict[str, Encoder] = {}
+if orjson is not None:
+    ENCODERS["orjson"] = OrjsonEncoder()
+if msgspec is not None:
+    ENCODERS["msgspec"] = MsgspecEncoder()
+ENCODERS["json"] = Encoder()
+
+
+def encoder(name: Optional[str] = None) -> Encoder:
+    """Picks an encoder.
+
+    ``name`` if given, else the ``BRANDEIS_ENCODER`` environment variable,
+    else the first of ``ENCODERS``.
+    """
+    name = name or os.environ.get(ENCODER_ENV) or next(iter(ENCODERS))
+    if name not in ENCODERS:
+        raise ValueError(
+            f"Unknown or uninstalled encoder {name!r}; expected one of "
+            + ", ".join(ENCODERS)
+        )
+    return ENCODERS[name]
@@ -0,0 +1,270 @@
+"""An append-only store of enrollment snapshots over time.
+
+Each semester gets one binary file, ``out/timeseries/{year}-{semester}.ts``.
+A snapshot only records the courses whose enrollment fields changed since the
+last one (so a five-minute refresh where nothing happened costs 13 bytes),
+and a course's history is a step function: its values at any time are the
+ones in the latest record at or before it.
+
+The file is a sequence of blocks after a short header:
+
+* ``S``: a snapshot; a timestamp and record count (``<qI``), then each record
+  (``<Iiiih``: class number, enrolled, limit, waiting, status code);
+* ``N``: names a status code (``<hH``, code and length, then UTF-8; a length
+  of ``NO_NAME`` is None).
+
+A block cut off by a crash is ignored, and overwritten by the next append.
+``compact`` downsamples old history and drops what's past retention.
+"""
+
+import os
+import struct
+import time
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .model import Course
+from .output import atomic_write
+
+DEFAULT_DIR = os.path.join("out", "timeseries")
+MAGIC = b"BCTS\x01"
+SNAPSHOT = struct.Struct("<qI")
+RECORD = struct.Struct("<Iiiih")
+NAME = struct.Struct("<hH")
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+# full resolution for this long; then one point per DOWNSAMPLE; then nothing
+RAW_WINDOW = 7 * DAY
+DOWNSAMPLE = HOUR
+RETENTION = 365 * DAY
+
+Point = namedtuple("Point", ["time", "enrolled", "limit", "waiting", "status"])
+
+# (enrolled, limit, waiting, status code)
+Values = Tuple[int, int, int, int]
+
+# a name length meaning None
+NO_NAME = 0xFFFF
+
+
+def name_block(code: int, name: Optional[str]) -> bytes:
+    if name is None:
+        return b"N" + NAME.pack(code, NO_NAME)
+    encoded = name.encode("utf-8")
+    return b"N" + NAME.pack(code, len(encoded)) + encoded
+
+
+def store_path(year: int, semester: str, store_dir: str = DEFAULT_DIR) -> str:
+    return os.path.join(store_dir, f"{year}-{semester}.ts")
+
+
+class EnrollmentStore:
+    """The enrollment history of a semester's courses.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._reset()
+        if os.path.exists(path):
+            self._load()
+
+    def _reset(self) -> None:
+        self.statuses: List[Optional[str]] = []
+        self._status_codes: Dict[Optional[str], int] = {}
+        # snapshot times, in order
+        self.times: List[int] = []
+        # class number -> (times, values), both in time order
+        self.history: Dict[int, Tuple[List[int], List[Values]]] = {}
+        # where the last complete block ends
+        self._end = len(MAGIC)
+
+    def _load(self) -> None:
+        with open(self.path, "rb") as f:
+            data = f.read()
+        if not data.startswith(MAGIC):
+            raise ValueError(f"{self.path} isn't an enrollment store")
+        pos = len(MAGIC)
+        while pos < len(data):
+            tag = data[pos : pos + 1]
+            if tag == b"N":
+                if pos + 1 + NAME.size > len(data):
+                    break
+                code, length = NAME.unpack_from(data, pos + 1)
+                if length == NO_NAME:
+                    end = pos + 1 + NAME.size
+                    self._name(code, None)
+                else:
+                    end = pos + 1 + NAME.size + length
+                    if end > len(data):
+                        break
+                    self._name(code, data[pos + 1 + NAME.size : end].decode("utf-8"))
+            elif tag == b"S":
+                if pos + 1 + SNAPSHOT.size > len(data):
+                    break
+                timestamp, count = SNAPSHOT.unpack_from(data, pos + 1)
+                start = pos + 1 + SNAPSHOT.size
+                end = start + count * RECORD.size
+                if end > len(data):
+                    break
+                records = [(r[0], r[1:]) for r in RECORD.iter_unpack(data[start:end])]
+                self._apply(timestamp, records)
+            else:
+                raise ValueError(f"{self.path}: bad block at byte {pos}")
+            pos = end
+            self._end = end
+
+    def _name(self, code: int, name: Optional[str]) -> None:
+        while len(self.statuses) <= code:
+            self.statuses.append(None)
+        self.statuses[code] = name
+        self._status_codes[name] = code
+
+    def _apply(self, timestamp: int, records: Iterable[Tuple[int, Values]]) -> None:
+        self.times.append(timestamp)
+        for class_number, values in records:
+            times, vals = self.history.setdefault(class_number, ([], []))
+            times.append(timestamp)
+            vals.append(tuple(values))
+
+    def latest(self, class_number: int) -> Optional[Values]:
+        entry = self.history.get(class_number)
+        return entry[1][-1] if entry else None
+
+    def _values(self, course: Course, new_names: List[Tuple[int, str]]) -> Values:
+        status = course.enrollment_status
+        code = self._status_codes.get(status)
+        if code is None:
+            code = len(self.statuses)
+            self._name(code, status)
+            new_names.append((code, status))
+        return (course.enrolled, course.limit, course.waiting, code)
+
+    def append(self, courses: Iterable[Course], timestamp: Optional[int] = None) -> int:
+        """Records a snapshot of ``courses``; returns how many of them changed.
+        """
+        timestamp = int(time.time()) if timestamp is None else int(timestamp)
+        if self.times and timestamp < self.times[-1]:
+            raise ValueError("Snapshots must be appended in time order")
+        new_names: List[Tuple[int, str]] = []
+        changed = []
+        for course in courses:
+            values = self._values(course, new_names)
+            if self.latest(course.class_number) != values:
+                changed.append((course.class_number, values))
+
+        block = bytearray()
+        for code, name in new_names:
+            block += name_block(code, name)
+        block += b"S" + SNAPSHOT.pack(timestamp, len(changed))
+        for class_number, values in changed:
+            block += RECORD.pack(class_number, *values)
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        mode = "r+b" if os.path.exists(self.path) else "wb"
+        with open(self.path, mode) as f:
+            if mode == "wb":
+                f.write(MAGIC)
+            # drop anything a crash left behind
+            f.seek(self._end)
+            f.truncate()
+            f.write(block)
+            self._end = f.tell()
+        self._apply(timestamp, changed)
+        return len(changed)
+
+    def _point(self, timestamp: int, values: Values) -> Point:
+        return Point(timestamp, *values[:3], self.statuses[values[3]])
+
+    def series(
+        self, class_number: int, start: Optional[int] = None, end: Optional[int] = None
+    ) -> List[Point]:
+        """A course's history from ``start`` to ``end`` (inclusive): its values
+        at ``start``, then each change.
+        """
+        entry = self.history.get(class_number)
+        if entry is None:
+            return []
+        times, values = entry
+        lo = 0 if start is None else bisect_right(times, start)
+        hi = len(times) if end is None else bisect_right(times, end)
+        ret = [self._point(times[i], values[i]) for i in range(lo, hi)]
+        if start is not None and lo > 0:
+            # the values in effect at start
+            ret.insert(0, self._point(start, values[lo - 1]))
+        return ret
+
+    def at(self, class_number: int, timestamp: int) -> Optional[Point]:
+        """A course's values as of ``timestamp``.
+        """
+        entry = self.history.get(class_number)
+        if entry is None:
+            return None
+        i = bisect_right(entry[0], timestamp)
+        return self._point(timestamp, entry[1][i - 1]) if i else None
+
+    def snapshots(self, start: Optional[int] = None, end: Optional[int] = None):
+        """Snapshot times from ``start`` to ``end``, inclusive.
+        """
+        lo = 0 if start is None else bisect_left(self.times, start)
+        hi = len(self.times) if end is None else bisect_right(self.times, end)
+        return self.times[lo:hi]
+
+    def compact(
+        self,
+        now: Optional[int] = None,
+        raw_window: int = RAW_WINDOW,
+        downsample: int = DOWNSAMPLE,
+        retention: int = RETENTION,
+    ) -> None:
+        """Rewrites the store smaller.
+
+        Snapshots from the last ``raw_window`` seconds are kept as they are;
+        older ones are merged into one per ``downsample`` seconds; and anything
+        older than ``retention`` is folded into one baseline snapshot, so every
+        course still has its values. A merged snapshot has the last values, and
+        the time, of the last snapshot merged into it, so it never shows values
+        from after its time.
+        """
+        now = int(time.time()) if now is None else int(now)
+        raw_from = now - raw_window
+        keep_from = now - retention
+
+        def bucket(t):
+            if t >= raw_from:
+                return t
+            if t < keep_from:
+                # the baseline
+                return 0
+            return t - (t - keep_from) % downsample
+
+        # bucket -> the time of the last snapshot in it
+        last_time = {bucket(t): t for t in self.times}
+        # bucket's time -> class number -> values
+        buckets: Dict[int, Dict[int, Values]] = {}
+        for class_number, (times, values) in self.history.items():
+            # the last values in each bucket
+            last: Dict[int, Values] = {}
+            for t, v in zip(times, values):
+                last[last_time[bucket(t)]] = v
+            previous = None
+            for t, v in last.items():
+                # it might've changed and changed back
+                if v != previous:
+                    buckets.setdefault(t, {})[class_number] = v
+                previous = v
+        snapshot_times = sorted(last_time.values())
+
+        with atomic_write(self.path, "wb") as f:
+            f.write(MAGIC)
+            for code, name in enumerate(self.statuses):
+                f.write(name_block(code, name))
+            for t in snapshot_times:
+                records = buckets.get(t, {})
+                f.write(b"S" + SNAPSHOT.pack(t, len(records)))
+                for class_number, values in sorted(records.items()):
+                    f.write(RECORD.pack(class_number, *values))
+
+        self._reset()
+        self._load()
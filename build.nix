@@ -37,6 +37,7 @@ in pypkgs.buildPythonApplication {
     python-ctags3
     pytest
     hypothesis
+    numpy
     rope
     ptpython
     poetry
@@ -1,54 +1,80 @@
 import itertools
-import os.path
 from collections import Counter
-from glob import glob
-from typing import List, Mapping
+from typing import List, Mapping, Optional
 
-import brandeis
+from brandeis_classes import constants, dataset, index, model
 
 COURSES = {}
+FRAME = None
+# roughly how many bytes of courses to keep loaded at once; None for no limit
+MEMORY_CAP = None
 
 
-def all_courses() -> Mapping[str, List[brandeis.Course]]:
+def all_courses() -> Mapping[str, List[model.Course]]:
+    """semesters are only loaded when they're first used; see
+    ``dataset.Dataset``"""
     global COURSES
     if COURSES:
         return COURSES
     else:
-        COURSES = read_all()
+        COURSES = dataset.Dataset("out", key=semester_key, max_bytes=MEMORY_CAP)
         return COURSES
 
 
-def read(fname: str) -> List[brandeis.Course]:
-    """for initializing COURSES"""
-    with open(fname, "r") as f:
-        return brandeis.load_courses(f)
+def all_frame() -> "analytics.CourseFrame":
+    """``all_courses()`` as columns; see ``analytics.CourseFrame``, whose
+    methods are vectorized versions of the functions below"""
+    # imported here, since numpy's slow to import and most runs don't need it
+    from brandeis_classes import analytics
+
+    global FRAME
+    if FRAME is None:
+        courses = all_courses()
+        if isinstance(courses, dataset.Dataset):
+            FRAME = courses.frame()
+        else:
+            FRAME = analytics.CourseFrame.from_courses(courses)
+    return FRAME
 
 
-def read_all(outdir: str = "out") -> List[brandeis.Course]:
+def semester_index(sem: str) -> index.CourseIndex:
+    """an index of one semester of ``all_courses()``, for looking courses up
+    by subject, instructor, etc. without a scan; see ``index.CourseIndex``"""
+    courses = all_courses()
+    if isinstance(courses, dataset.Dataset):
+        return courses.course_index(sem)
+    return index.CourseIndex(courses[sem])
+
+
+def read(fname: str) -> List[model.Course]:
     """for initializing COURSES"""
+    with open(fname, "r") as f:
+        return model.load_courses(f)
+
+
+def semester_key(base: str) -> Optional[str]:
+    """'2019-3' -> '2019-3'; None for semesters we skip"""
+    year, semester = base.split("-")
+    if semester == "1":
+        # january
+        # semester = '01'
+        pass
+    elif semester == "2":
+        # skip summer
+        return None
+    elif semester == "3":
+        # september
+        # semester = '09'
+        pass
+    else:
+        raise ValueError("Invalid semester number " + semester)
+    return f"{year}-{semester}"
 
-    pat = os.path.join(outdir, "*-*.json")
-    ret = {}
-    # theyre numbered so this works
-    for fname in sorted(glob(pat)):
-        base, *_ = os.path.basename(fname).split(os.path.extsep)
-        year, semester = base.split("-")
-        if semester == "1":
-            # january
-            # semester = '01'
-            pass
-        elif semester == "2":
-            # skip summer
-            continue
-        elif semester == "3":
-            # september
-            # semester = '09'
-            pass
-        else:
-            raise ValueError("Invalid semester number " + semester)
-        ret[f"{year}-{semester}"] = read(fname)
 
-    return ret
+def read_all(outdir: str = "out") -> List[model.Course]:
+    """for initializing COURSES, all at once"""
+    ret = dataset.Dataset(outdir, key=semester_key)
+    return {sem: ret.load(sem) for sem in ret}
 
 
 def display_semester(sem) -> str:
@@ -77,18 +103,15 @@ def courses_per_subject():
 
 def courses_per_semester(subj=None) -> List[int]:
     ret = {}
-    for sem, courses in all_courses().items():
-        if subj is not None:
-            courses = list(filter(lambda c: c.subject == subj, courses))
-        ret[sem] = len(courses)
+    for sem in all_courses():
+        ret[sem] = semester_index(sem).count(subject=subj)
     return ret
 
 
 def students_per_semester(subj=None) -> List[int]:
     ret = {}
-    for sem, courses in all_courses().items():
-        if subj is not None:
-            courses = list(filter(lambda c: c.subject == subj, courses))
+    for sem in all_courses():
+        courses = semester_index(sem).query(subject=subj)
         ret[sem] = sum(map(lambda c: c.enrolled, courses))
     return ret
 
@@ -98,7 +121,7 @@ def students_per_class():
     for sem, courses in all_courses().items():
         total_courses.extend(courses)
     ret = {}
-    for subj in brandeis.constants.SUBJECTS:
+    for subj in constants.SUBJECTS:
         subj_courses = list(
             filter(
                 lambda e: e > 0,
@@ -123,12 +146,11 @@ def students_per_class_total():
 
 def student_enrollments():
     ret = {}
-    for sem, courses in all_courses().items():
+    for sem in all_courses():
+        idx = semester_index(sem)
         ret[sem] = {}
-        for subj in brandeis.constants.SUBJECTS:
-            ret[sem][subj] = sum(
-                map(lambda c: c.enrolled, filter(lambda c: c.subject == subj, courses))
-            )
+        for subj in constants.SUBJECTS:
+            ret[sem][subj] = sum(map(lambda c: c.enrolled, idx.query(subject=subj)))
     return ret
 
 
@@ -151,7 +173,7 @@ def main():
     # for sem, dat in courses_per_semester('COSI').items():
     # corr[sem] = dat / corr[sem]
     # print(*map(lambda x: f'{x[0]} | {x[1]}],', students_per_class().items()), sep='\n')
-    printdict(student_enrollments())
+    printdict(all_frame().student_enrollments())
     # print(*sorted_dict(students_per_class()['2018-3']), sep='\n')
     # print(sorted(set(map(lambda c: c.subject, itertools.chain(*all_courses().values())))))
     # subjects = total_courses_per_subject()
@@ -0,0 +1,108 @@
+"""Fixtures shared by the tests, and by the benchmarks (see ``bench/conftest.py``).
+"""
+
+import dataclasses
+import functools
+import random
+import time
+from typing import Iterable
+
+import pytest
+
+from brandeis_classes import brandeis, scrape_courses
+
+# one row of search results each
+FIXTURES = [
+    "test-data/biol_160b_1.html",
+    "test-data/cosi_119a_1.html",
+    "test-data/ed_285_1dl.html",
+]
+
+
+def read(fname, mode="r", encoding="utf-8"):
+    with open(fname, mode, encoding=encoding) as f:
+        return f.read()
+
+
+# COSI 119A, class number 16905
+ROW = read("test-data/cosi_119a_1.html")
+
+
+def numbered_row(class_number: int) -> str:
+    """``ROW``, with another class number.
+    """
+    return ROW.replace("16905", str(class_number))
+
+
+def search_page(rows: str, links: Iterable[int] = ()) -> str:
+    """A page of search results, with a pager linking pages ``links`` above and
+    below the table, like the registrar's.
+    """
+    pager = "".join(f'<a class="pagenumber" href="#">{n}</a>' for n in links)
+    return pager + '<table id="classes-list">' + rows + "</table>" + pager
+
+
+def parse_fixture(fname: str = "cosi_119a_1.html") -> brandeis.Course:
+    """The course in one of the rows in ``test-data``.
+    """
+    [course] = brandeis.page_to_courses(
+        '<table id="classes-list">' + read("test-data/" + fname) + "</table>",
+        request_description=False,
+    )
+    return course
+
+
+def course_factory(template: brandeis.Course):
+    """``make(**changes)``: a copy of ``template`` with some fields changed.
+    """
+    return functools.partial(dataclasses.replace, template)
+
+
+@pytest.fixture
+def fixture_course():
+    """``fixture_course(fname)``: see ``parse_fixture``.
+    """
+    return parse_fixture
+
+
+@pytest.fixture
+def template():
+    """COSI 119A, to build synthetic courses from; a fresh copy for each test.
+    """
+    return parse_fixture()
+
+
+@pytest.fixture
+def make_course(template):
+    """See ``course_factory``.
+    """
+    return course_factory(template)
+
+
+@pytest.fixture
+def fake_search_pages(monkeypatch):
+    """``fake_search_pages(n)``: serve ``n`` pages of search results in place of
+    the registrar, each with one row, ``numbered_row(pg)``, and a pager linking
+    them all. Returns the page numbers fetched, in order.
+
+    Fetching a page in ``fail`` raises ``ConnectionError``, the first time; each
+    fetch takes up to ``jitter`` seconds, so that they finish out of order.
+    """
+
+    def fake(n, fail=(), jitter=0.0):
+        fetched = []
+        failing = set(fail)
+
+        def fetch_search_page(pg, year, semester, base_url, limiter):
+            limiter.acquire()
+            time.sleep(random.random() * jitter)
+            if pg in failing:
+                failing.remove(pg)
+                raise ConnectionError
+            fetched.append(pg)
+            return search_page(numbered_row(pg), range(1, n + 1))
+
+        monkeypatch.setattr(scrape_courses, "fetch_search_page", fetch_search_page)
+        return fetched
+
+    return fake
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+import course_science
+from brandeis_classes import constants
+
+np = pytest.importorskip("numpy")
+from brandeis_classes import analytics, columnar  # isort:skip
+
+
+def synthetic_semesters(make_course):
+    rng = random.Random(0)
+    # some subjects that aren't in constants.SUBJECTS, too
+    subjects = list(constants.SUBJECTS) + ["MATH", "PHYS"]
+    return {
+        f"{year}-{sem}": [
+            make_course(
+                subject=rng.choice(subjects),
+                number=rng.randrange(1, 300),
+                enrolled=rng.choice([0, rng.randrange(1, 200)]),
+            )
+            for _ in range(rng.randrange(0, 300))
+        ]
+        for year in range(2010, 2015)
+        for sem in ["1", "3"]
+    }
+
+
+@pytest.fixture
+def semesters(monkeypatch, make_course):
+    semesters = synthetic_semesters(make_course)
+    monkeypatch.setattr(course_science, "COURSES", semesters)
+    return semesters
+
+
+@pytest.mark.parametrize(
+    "name, args",
+    [
+        ("total_courses_per_subject", ()),
+        ("courses_per_subject", ()),
+        ("courses_per_semester", ()),
+        ("courses_per_semester", ("COSI",)),
+        ("courses_per_semester", ("NOPE",)),
+        ("students_per_semester", ()),
+        ("students_per_semester", ("BIOL",)),
+        ("students_per_class", ()),
+        ("students_per_class_total", ()),
+        ("student_enrollments", ()),
+    ],
+)
+def test_frame_matches_course_science(semesters, name, args):
+    frame = analytics.CourseFrame.from_courses(semesters)
+    assert getattr(frame, name)(*args) == getattr(course_science, name)(*args)
+
+
+def test_from_tables(semesters, tmp_path):
+    tables = {}
+    for sem, courses in semesters.items():
+        path = str(tmp_path / f"{sem}.columns")
+        columnar.save_courses(courses, path)
+        tables[sem] = columnar.load_table(path)
+    frame = analytics.CourseFrame.from_tables(tables)
+    assert frame.student_enrollments() == course_science.student_enrollments()
+    assert frame.students_per_class() == course_science.students_per_class()
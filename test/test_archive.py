@@ -0,0 +1,68 @@
+import json
+import os
+
+import pytest
+from conftest import ROW, numbered_row, search_page
+
+from brandeis_classes import brandeis, scrape_courses
+
+archive = pytest.importorskip("brandeis_classes.archive")
+pytest.importorskip("zstandard")
+
+
+def page(row):
+    return search_page(row, [1, 2])
+
+
+def description_url(row):
+    [tr] = brandeis.make_soup(row).find_all("tr")
+    return brandeis.description_url(brandeis.tr_is_course(tr)[1])
+
+
+def test_archive(tmp_path):
+    a = archive.ResponseArchive(str(tmp_path / "archive"))
+    digest = a.record("http://example.com/", None, "<p>hi</p>")
+    # stored once
+    assert a.record("http://example.com/", None, "<p>hi</p>") == digest
+    assert len(os.listdir(tmp_path / "archive" / "objects")) == 1
+    assert a.text(digest) == "<p>hi</p>"
+    assert os.path.getsize(a.object_path(digest)) > 0
+
+    # a crash halfway through a line
+    with open(a.index_path, "a") as f:
+        f.write('{"time": ')
+    reopened = archive.ResponseArchive(str(tmp_path / "archive"))
+    assert len(reopened.entries) == 2
+    assert reopened.descriptions() == {"http://example.com/": digest}
+
+
+def test_reparse(tmp_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("no network access while reparsing")
+
+    monkeypatch.setattr(brandeis, "fetch_description", fail)
+    monkeypatch.setattr(scrape_courses, "fetch_search_page", fail)
+
+    a = archive.ResponseArchive(str(tmp_path / "archive"))
+    search = scrape_courses.SEARCH_URL
+    other = numbered_row(20000)
+    # an older scrape, and then the one we want
+    a.record(search, scrape_courses.req_params(1, 2019, "Fall"), page(other))
+    a.record(search, scrape_courses.req_params(1, 2019, "Fall"), page(ROW))
+    a.record(search, scrape_courses.req_params(2, 2019, "Fall"), page(other))
+    a.record(search, scrape_courses.req_params(1, 2020, "Spring"), page(ROW))
+    a.record(description_url(ROW), None, "<p>Modal logic, parsed offline.</p>")
+    assert a.semesters() == [(2019, "Fall"), (2020, "Spring")]
+    assert len(a.search_pages(2019, "Fall")) == 2
+
+    outdir = str(tmp_path / "out")
+    os.makedirs(outdir)
+    assert archive.reparse(2019, "Fall", a, outdir=outdir) == (2, 0)
+    with open(os.path.join(outdir, "2019-Fall.json")) as f:
+        courses = json.load(f)
+    assert [c["class_number"] for c in courses] == [16905, 20000]
+    assert courses[0]["description"] == "Modal logic, parsed offline."
+    assert courses[0]["year"] == 2019
+
+    with pytest.raises(KeyError):
+        archive.reparse(2018, "Fall", a, outdir=outdir)
@@ -1,11 +1,22 @@
+import importlib.util
+import io
+
+import pytest
 from bs4 import BeautifulSoup
+from conftest import FIXTURES, read
 
 from brandeis_classes import brandeis
 
-
-def read(fname, mode="r", encoding="utf-8"):
-    with open(fname, mode, encoding=encoding) as f:
-        return f.read()
+PARSERS = [
+    pytest.param(
+        parser,
+        marks=pytest.mark.skipif(
+            parser == "lxml" and importlib.util.find_spec("lxml") is None,
+            reason="lxml not installed",
+        ),
+    )
+    for parser in brandeis.PARSERS
+]
 
 
 def tr_to_soup(html):
@@ -53,3 +64,136 @@ def test_tr_to_course():
     assert crs.uni_reqs == ["sn"]
     assert crs.semester == None
     assert crs.year == None
+
+
+def fixture_page(fname):
+    return '<table id="classes-list">' + read(fname) + "</table>"
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+@pytest.mark.parametrize("fname", FIXTURES)
+def test_parsers_agree(fname, parser):
+    html = fixture_page(fname)
+    expected = brandeis.page_to_courses(
+        html, request_description=False, parser="html.parser"
+    )
+    assert len(expected) == 1
+    assert (
+        brandeis.page_to_courses(html, request_description=False, parser=parser)
+        == expected
+    )
+
+
+def field_by_field(tds):
+    """A course from the single-field helpers, as ``tds_to_course`` used to.
+    """
+    class_number, course_id, title_reqs, time_location, enrollment, instructor = tds[:6]
+    subject, number, group, section = brandeis.course_ids(course_id)
+    enrolled, limit, waiting = brandeis.enrollment_info(enrollment)
+    return brandeis.Course(
+        name=title_reqs.find("strong").text.strip(),
+        class_number=int(class_number.text),
+        subject=subject,
+        number=number,
+        group=group,
+        section=section,
+        schedule=brandeis.parse_times(time_location),
+        enrollment_status=brandeis.enrollment_status(enrollment),
+        enrolled=enrolled,
+        limit=limit,
+        waiting=waiting,
+        syllabus=brandeis.syllabus(course_id),
+        instructors=brandeis.instructor_info(instructor),
+        description=None,
+        notes=brandeis.course_notes(title_reqs),
+        uni_reqs=brandeis.uni_reqs(title_reqs),
+        semester=None,
+        year=None,
+    )
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+@pytest.mark.parametrize("fname", FIXTURES)
+def test_decode_row(fname, parser):
+    tr = brandeis.make_soup(fixture_page(fname), parser).find("tr")
+    tds = brandeis.tr_is_course(tr)
+    course, url = brandeis.decode_row(tds)
+    assert course == field_by_field(tds)
+    assert url == brandeis.description_url(tds[1])
+
+
+def test_parser_env(monkeypatch):
+    monkeypatch.setenv(brandeis.PARSER_ENV, "html.parser")
+    assert brandeis.html_parser() == "html.parser"
+    assert brandeis.html_parser("lxml") == "lxml"
+    monkeypatch.setenv(brandeis.PARSER_ENV, "regex")
+    with pytest.raises(ValueError):
+        brandeis.html_parser()
+
+
+def test_no_syllabus():
+    [crs] = brandeis.page_to_courses(
+        fixture_page("test-data/ed_285_1dl.html"), request_description=False
+    )
+    assert crs.friendly_number == "ED 285_1DL"
+    assert crs.syllabus is None
+    assert crs.schedule == [
+        brandeis.CourseTime(block=None, times="TBD", location=None, info=None)
+    ]
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_iter_courses(parser, monkeypatch):
+    rows = "".join(map(read, FIXTURES))
+    html = (
+        '<table class="other"><tr><td>not a course</td></tr></table>'
+        '<table id="classes-list">' + rows * 4 + "</table>"
+    )
+    expected = brandeis.page_to_courses(html, request_description=False)
+    assert len(expected) == 12
+    # make sure rows split across chunks are put back together
+    monkeypatch.setattr(brandeis, "CHUNK_SIZE", 97)
+    assert (
+        list(brandeis.iter_courses(html, request_description=False, parser=parser))
+        == expected
+    )
+    # </tr> is optional
+    assert (
+        list(
+            brandeis.iter_courses(
+                html.replace("</tr>", ""), request_description=False, parser=parser
+            )
+        )
+        == expected
+    )
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_page_rows_pager(parser):
+    pager = "".join(
+        f'<a class="pagenumber" href="#">{n}</a>' for n in ["1", "2", " 3 ", "Next"]
+    )
+    html = pager + '<table id="classes-list">' + read(FIXTURES[0]) + "</table>"
+    pages = {7}
+    courses, urls = brandeis.page_rows(html, parser, pages=pages)
+    assert len(courses) == len(urls) == 1
+    assert pages == {1, 2, 3, 7} == brandeis.page_numbers(html) | {7}
+
+
+@pytest.mark.parametrize("chunk_size", [5, 50, 149])
+def test_iter_courses_bytes(chunk_size, monkeypatch):
+    html = '<table id="classes-list">' + read("test-data/cosi_119a_1.html") + "</table>"
+    data = html.encode("utf-8")
+    expected = brandeis.page_to_courses(html, request_description=False)
+    monkeypatch.setattr(brandeis, "CHUNK_SIZE", chunk_size)
+    chunks = [data[i : i + chunk_size] for i in range(0, len(data), chunk_size)]
+    # some chunk ends partway through a non-ASCII character (the en dash in
+    # the meeting times)
+    assert any(
+        chunk.decode("utf-8", "ignore") != chunk.decode("utf-8", "replace")
+        for chunk in chunks
+    )
+    for source in [io.BytesIO(data), iter(chunks)]:
+        assert (
+            list(brandeis.iter_courses(source, request_description=False)) == expected
+        )
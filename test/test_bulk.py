@@ -0,0 +1,60 @@
+import os
+
+import pytest
+from conftest import FIXTURES, read, search_page
+
+from brandeis_classes import brandeis, scrape_courses
+
+archive = pytest.importorskip("brandeis_classes.archive")
+pytest.importorskip("zstandard")
+from brandeis_classes import bulk  # noqa: E402
+
+ROWS = [read(fname) for fname in FIXTURES]
+
+
+@pytest.fixture
+def stored(tmp_path):
+    a = archive.ResponseArchive(str(tmp_path / "archive"))
+    for year, semester in [(2018, "Fall"), (2019, "Spring"), (2019, "Fall")]:
+        for pg in range(1, 4):
+            rows = ROWS[pg - 1 :] + ROWS[: pg - 1]
+            a.record(
+                scrape_courses.SEARCH_URL,
+                scrape_courses.req_params(pg, year, semester),
+                search_page("".join(rows), range(1, 4)),
+            )
+    [tr] = brandeis.make_soup(ROWS[1]).find_all("tr")
+    url = brandeis.description_url(brandeis.tr_is_course(tr)[1])
+    a.record(url, None, "<p>Modal logic.</p>")
+    return a
+
+
+def test_bulk_reparse(stored, tmp_path):
+    serial = str(tmp_path / "serial")
+    parallel = str(tmp_path / "parallel")
+    os.makedirs(serial)
+    os.makedirs(parallel)
+    expected = {
+        (year, semester): archive.reparse(year, semester, stored, outdir=serial)
+        for year, semester in stored.semesters()
+    }
+    assert bulk.bulk_reparse(stored, jobs=2, outdir=parallel, chunk_pages=2) == expected
+    # three semesters of three pages of three courses; two descriptions missing
+    assert set(expected.values()) == {(9, 2)}
+
+    assert sorted(os.listdir(parallel)) == sorted(os.listdir(serial))
+    for name in os.listdir(serial):
+        assert read(os.path.join(parallel, name)) == read(os.path.join(serial, name))
+    with open(os.path.join(parallel, "2019-Fall.json")) as f:
+        courses = brandeis.load_courses(f)
+    assert courses[1].friendly_number == "COSI 119A_1"
+    assert courses[3].friendly_number == "COSI 119A_1"
+    assert courses[1].description == "Modal logic."
+
+
+def test_only_linked_descriptions(stored, tmp_path):
+    # no search page links to this one, so it's never read
+    digest = stored.record("https://example.com/unlinked", None, "<p>Gone.</p>")
+    os.remove(stored.object_path(digest))
+    results = bulk.bulk_reparse(stored, jobs=2, outdir=str(tmp_path))
+    assert set(results.values()) == {(9, 2)}
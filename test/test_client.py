@@ -0,0 +1,145 @@
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+from conftest import ROW, search_page
+
+from brandeis_classes import brandeis, client, scrape_courses
+
+
+class StubRegistrar(BaseHTTPRequestHandler):
+    """Serves the search page and course descriptions from test-data.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # class attributes, reset by the fixture
+    failures = 0
+    connections = set()
+    requests = []
+    gzipped = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        type(self).requests.append((url.path, parse_qs(url.query)))
+        type(self).connections.add(self.client_address)
+        if type(self).failures:
+            type(self).failures -= 1
+            self.send(503, b"try again")
+        elif url.path == "/registrar/schedule/search":
+            self.send(200, search_page(ROW).encode("utf-8"))
+        elif url.path == "/registrar/schedule/course":
+            self.send(200, b"<p>A course about logic.</p>")
+        else:
+            self.send(404, b"not found")
+
+    def send(self, status, body):
+        gzipped = "gzip" in self.headers.get("Accept-Encoding", "")
+        type(self).gzipped.append(gzipped)
+        if gzipped:
+            body = gzip.compress(body)
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def registrar():
+    StubRegistrar.failures = 0
+    StubRegistrar.connections = set()
+    StubRegistrar.requests = []
+    StubRegistrar.gzipped = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubRegistrar)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def stub_client():
+    with client.HTTPClient(timeout=5, backoff=0) as c:
+        old = client.set_default_client(c)
+        yield c
+        client.set_default_client(old)
+
+
+def test_search_page(registrar, stub_client):
+    html = scrape_courses.fetch_search_page(
+        1, 2019, "Fall", base_url=registrar + "/registrar/schedule/search"
+    )
+    [course] = brandeis.page_to_courses(html, request_description=False)
+    assert course.friendly_number == "COSI 119A_1"
+    path, params = StubRegistrar.requests[0]
+    assert params["strm"] == [str(brandeis.strm(2019, "Fall"))]
+
+    # sent compressed
+    assert StubRegistrar.gzipped == [True]
+    [timing] = stub_client.recent()
+    assert timing.status == 200
+    assert timing.size == len(html.encode("utf-8"))
+    assert timing.seconds > 0
+
+
+def test_keep_alive(registrar, stub_client):
+    for _ in range(5):
+        assert (
+            brandeis.fetch_description(registrar + "/registrar/schedule/course?id=1")
+            == "A course about logic."
+        )
+    # every request went over the same connection
+    assert len(StubRegistrar.connections) == 1
+    assert stub_client.requests == 5
+
+
+def test_retry(registrar, stub_client):
+    StubRegistrar.failures = 2
+    assert stub_client.get_text(registrar + "/registrar/schedule/course").startswith(
+        "<p>"
+    )
+    assert len(StubRegistrar.requests) == 3
+
+    # the first try, and every retry
+    StubRegistrar.failures = 1 + client.DEFAULT_RETRIES
+    with pytest.raises(requests.HTTPError):
+        stub_client.get(registrar + "/registrar/schedule/course")
+    with pytest.raises(requests.HTTPError):
+        stub_client.get(registrar + "/nope")
+    assert [t.status for t in stub_client.recent()] == [200, 503, 404]
+
+
+def test_default_client():
+    old = client.set_default_client(None)
+    try:
+        c = client.default_client()
+        assert c is client.default_client()
+        assert client.set_default_client(None) is c
+    finally:
+        client.set_default_client(old)
+
+
+def test_archive(registrar, tmp_path):
+    archive = pytest.importorskip("brandeis_classes.archive")
+    pytest.importorskip("zstandard")
+    a = archive.ResponseArchive(str(tmp_path))
+    with client.HTTPClient(timeout=5, backoff=0, archive=a) as c:
+        html = scrape_courses.fetch_search_page(
+            1, 2019, "Fall", base_url=registrar + "/registrar/schedule/search", client=c
+        )
+        with pytest.raises(requests.HTTPError):
+            c.get(registrar + "/nope")
+    # only the successful response
+    [entry] = a.entries
+    assert entry["params"]["page"] == 1
+    assert a.text(entry["sha256"]) == html
+    assert a.search_pages(2019, "Fall") == {1: entry["sha256"]}
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+from conftest import FIXTURES, read
+
+from brandeis_classes import brandeis
+
+np = pytest.importorskip("numpy")
+from brandeis_classes import columnar  # isort:skip
+
+
+def fixture_courses():
+    rows = "".join(map(read, FIXTURES))
+    courses = brandeis.page_to_courses(
+        '<table id="classes-list">' + rows + "</table>", request_description=False
+    )
+    for course in courses:
+        course.year = 2019
+        course.semester = "Fall"
+    courses[0].description = "Descriptions can have ünïcödé in them"
+    courses[1].year = None
+    return courses
+
+
+def test_round_trip(tmp_path):
+    courses = fixture_courses()
+    path = str(tmp_path / "2019-Fall.columns")
+    columnar.save_courses(courses, path)
+    assert columnar.load_columns(path) == courses
+
+    table = columnar.load_table(path)
+    assert len(table) == 3
+    assert table.ints("enrolled").tolist() == [12, 4, 11]
+    codes, dictionary = table.categorical("subject")
+    assert [dictionary[c] for c in codes] == ["BIOL", "COSI", "ED"]
+
+    # saving again replaces the old table
+    columnar.save_courses(courses[:1], path)
+    assert columnar.load_columns(path) == courses[:1]
+
+
+def test_convert(tmp_path):
+    courses = fixture_courses()
+    path = tmp_path / "2019-Fall.json"
+    path.write_text(json.dumps([c.dict() for c in courses]))
+    out = columnar.convert(str(path))
+    assert out == str(tmp_path / "2019-Fall.columns")
+    assert columnar.load_columns(out) == courses
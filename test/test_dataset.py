@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from brandeis_classes import dataset
+
+
+@pytest.fixture
+def outdir(tmp_path, template):
+    for i, sem in enumerate(["2018-Fall", "2019-Spring", "2019-Fall"]):
+        template.class_number = i
+        (tmp_path / f"{sem}.json").write_text(json.dumps([template.dict()] * (i + 1)))
+    (tmp_path / "notes.txt").write_text("not a semester")
+    return tmp_path
+
+
+def test_lazy(outdir):
+    data = dataset.Dataset(str(outdir))
+    assert list(data) == ["2018-Fall", "2019-Fall", "2019-Spring"]
+    assert len(data) == 3
+    assert data.loaded() == []
+
+    assert [c.class_number for c in data["2019-Fall"]] == [2, 2, 2]
+    assert data.loaded() == ["2019-Fall"]
+    assert data["2019-Fall"] is data["2019-Fall"]
+    # no cap, so nothing is measured
+    assert data.loaded_bytes == 0
+
+
+def test_evict(outdir):
+    data = dataset.Dataset(str(outdir), max_bytes=1)
+    data["2018-Fall"]
+    data["2019-Fall"]
+    # over the cap; only the newest stays
+    assert data.loaded() == ["2019-Fall"]
+
+    # room for 4.5 courses
+    three = sum(map(dataset.course_bytes, data.load("2019-Fall")))
+    data = dataset.Dataset(str(outdir), max_bytes=three * 1.5)
+    data["2018-Fall"]
+    data["2019-Spring"]
+    data["2018-Fall"]
+    data["2019-Fall"]
+    assert data.loaded() == ["2018-Fall", "2019-Fall"]
+
+
+def test_prefers_columns(outdir):
+    columnar = pytest.importorskip("brandeis_classes.columnar")
+    courses = dataset.Dataset(str(outdir))["2019-Fall"]
+    columnar.convert(str(outdir / "2019-Fall.json"))
+    data = dataset.Dataset(str(outdir))
+    assert data.is_columnar("2019-Fall")
+    assert not data.is_columnar("2018-Fall")
+    assert data["2019-Fall"] == courses
+    assert data.frame().courses_per_semester() == {
+        "2018-Fall": 1,
+        "2019-Fall": 3,
+        "2019-Spring": 2,
+    }
@@ -0,0 +1,67 @@
+from conftest import ROW
+
+from brandeis_classes import brandeis, descriptions
+
+
+def test_page_descriptions_fetched_once(monkeypatch):
+    fetched = []
+
+    def fetch_description(url):
+        fetched.append(url)
+        return "Description of " + url
+
+    monkeypatch.setattr(brandeis, "fetch_description", fetch_description)
+    html = '<table id="classes-list">' + ROW * 3 + "</table>"
+    with descriptions.DescriptionFetcher() as fetcher:
+        courses = brandeis.page_to_courses(html, fetcher=fetcher)
+    url = (
+        "http://registrar-prod.unet.brandeis.edu/registrar/schedule/"
+        "course?acad_year=2019&crse_id=014120&strm=1183&class_section=1"
+    )
+    assert fetched == [url]
+    assert [c.description for c in courses] == ["Description of " + url] * 3
+
+
+def test_row_without_description_link(monkeypatch):
+    def fail(url):
+        raise AssertionError("there's nothing to fetch")
+
+    monkeypatch.setattr(brandeis, "fetch_description", fail)
+    html = (
+        '<table id="classes-list">'
+        + ROW.replace("popUp('course?", "popUp('closed?")
+        + ROW
+        + "</table>"
+    )
+    courses, urls = brandeis.page_rows(html)
+    assert urls[0] is None
+    assert courses[0].friendly_number == "COSI 119A_1"
+
+    monkeypatch.setattr(brandeis, "fetch_description", lambda url: "Description")
+    with descriptions.DescriptionFetcher() as fetcher:
+        for courses in [
+            brandeis.page_to_courses(html, fetcher=fetcher),
+            list(brandeis.iter_courses(html, fetcher=fetcher)),
+        ]:
+            assert [c.description for c in courses] == [None, "Description"]
+
+
+def test_cache(monkeypatch, tmp_path):
+    fetched = []
+
+    def fetch_description(url):
+        fetched.append(url)
+        return url.upper()
+
+    monkeypatch.setattr(brandeis, "fetch_description", fetch_description)
+    path = str(tmp_path / "descriptions.sqlite3")
+    with descriptions.DescriptionCache(path) as cache:
+        with descriptions.DescriptionFetcher(cache) as fetcher:
+            assert fetcher.fetch_all(["a", "b", "a"]) == {"a": "A", "b": "B"}
+
+    with descriptions.DescriptionCache(path) as cache:
+        assert len(cache) == 2
+        with descriptions.DescriptionFetcher(cache) as fetcher:
+            assert fetcher.fetch_all(["b", "c"]) == {"b": "B", "c": "C"}
+
+    assert sorted(fetched) == ["a", "b", "c"]
@@ -0,0 +1,67 @@
+import subprocess
+import sys
+
+import pytest
+
+# the HTML and HTTP stack, and numpy
+HEAVY = {"bs4", "requests", "urllib3", "numpy"}
+
+
+def imported(code):
+    """The modules that running ``code`` in a fresh interpreter imports, from
+    ``python -X importtime``, with their cumulative import times (µs).
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    ret = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        ret[name.strip()] = int(cumulative)
+    return ret
+
+
+def test_package_is_lazy():
+    modules = imported("import brandeis_classes")
+    assert "brandeis_classes" in modules
+    assert not any(m.startswith("brandeis_classes.") for m in modules)
+    assert not HEAVY & set(modules)
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "brandeis_classes.model",
+        "brandeis_classes.dataset",
+        "brandeis_classes.index",
+        "brandeis_classes.planner",
+        "brandeis_classes.timeseries",
+    ],
+)
+def test_model_without_html_stack(module):
+    modules = imported(f"import {module}")
+    assert module in modules
+    assert not HEAVY & {m.split(".")[0] for m in modules}
+
+
+def test_scrapers_without_archive_or_search():
+    modules = imported(
+        "import brandeis_classes.scrape_courses, brandeis_classes.meta_scrape"
+    )
+    assert "brandeis_classes.scrape_courses" in modules
+    # only needed with --archive and --search-index
+    assert not {"brandeis_classes.archive", "brandeis_classes.search"} & set(modules)
+
+
+def test_submodules_on_first_use():
+    import brandeis_classes
+
+    assert brandeis_classes.brandeis.Course is brandeis_classes.model.Course
+    assert "model" in dir(brandeis_classes)
+    with pytest.raises(AttributeError):
+        brandeis_classes.nope
@@ -0,0 +1,78 @@
+import json
+import random
+
+import pytest
+
+from brandeis_classes import dataset, index
+from brandeis_classes.brandeis import CourseTime, Instructor
+
+
+def synthetic_courses(make_course, n=400, seed=0):
+    rng = random.Random(seed)
+    instructors = [Instructor(f"Prof {i}", str(i)) for i in range(20)]
+    return [
+        make_course(
+            subject=rng.choice(["COSI", "BIOL", "ED", "MATH"]),
+            number=rng.randrange(1, 300),
+            instructors=rng.sample(instructors, rng.randrange(0, 3)),
+            uni_reqs=rng.sample(["sn", "qr", "wi", "oc", "hum"], rng.randrange(0, 3)),
+            schedule=[
+                CourseTime(rng.choice(["S1", "S2", "K", None]), "TBD", None, None)
+                for _ in range(rng.randrange(0, 3))
+            ],
+            enrollment_status=rng.choice(["Open", "Closed", "Consent Req."]),
+        )
+        for _ in range(n)
+    ]
+
+
+def matches(course, number=None, **fields):
+    values = index.course_values(course)
+    if number is not None:
+        low, high = (number, number) if isinstance(number, int) else number
+        if not low <= course.number <= high:
+            return False
+    return all(v is None or v in values[f] for f, v in fields.items())
+
+
+@pytest.mark.parametrize(
+    "criteria",
+    [
+        {},
+        {"subject": "COSI"},
+        {"subject": "NOPE"},
+        {"instructor": "3"},
+        {"uni_req": "sn", "subject": "BIOL"},
+        {"block": "S1", "enrollment_status": "Open"},
+        {"number": 119},
+        {"number": (100, 199), "subject": "COSI"},
+        {"number": (100, 199), "uni_req": "qr", "instructor": "7"},
+        {"subject": None, "block": "K"},
+    ],
+)
+def test_query_matches_scan(make_course, criteria):
+    courses = synthetic_courses(make_course)
+    idx = index.CourseIndex(courses)
+    expected = [c for c in courses if matches(c, **criteria)]
+    assert idx.query(**criteria) == expected
+    assert idx.count(**criteria) == len(expected)
+
+
+def test_fixture(template):
+    idx = index.CourseIndex([template])
+    assert idx.values("block") == ["S3", "X3"]
+    assert idx.query(subject="COSI", number=119) == [template]
+    with pytest.raises(TypeError):
+        idx.query(room="Shapiro")
+
+
+def test_dataset_course_index(tmp_path, template):
+    for sem in ["2018-Fall", "2019-Spring"]:
+        (tmp_path / f"{sem}.json").write_text(json.dumps([template.dict()]))
+    data = dataset.Dataset(str(tmp_path), max_bytes=1)
+    fall = data.course_index("2018-Fall")
+    assert fall is data.course_index("2018-Fall")
+    assert fall.courses is data["2018-Fall"]
+    # evicting a semester drops its index too
+    data.course_index("2019-Spring")
+    assert data.course_index("2018-Fall") is not fall
@@ -0,0 +1,36 @@
+import json
+
+from brandeis_classes import meta_scrape, scrape_courses
+
+
+def test_run_jobs(monkeypatch, tmp_path):
+    def fake_scrape(year, semester, limiter, progress, **kwargs):
+        if semester == "Summer":
+            raise RuntimeError("no courses in the summer")
+        limiter.acquire()
+        progress(1, 1, 10)
+        return year % 100
+
+    monkeypatch.setattr(scrape_courses, "scrape_courses", fake_scrape)
+    results = meta_scrape.run_jobs(
+        meta_scrape.year_semesters(2018, 2019),
+        jobs=4,
+        rate=1000,
+        description_cache="",
+    )
+    assert [(r.year, r.semester, r.rows, r.ok) for r in results] == [
+        (2018, "Spring", 18, True),
+        (2018, "Summer", 0, False),
+        (2018, "Fall", 18, True),
+        (2019, "Spring", 19, True),
+        (2019, "Summer", 0, False),
+        (2019, "Fall", 19, True),
+    ]
+    assert results[1].error == "RuntimeError: no courses in the summer"
+
+    path = tmp_path / "summary.json"
+    meta_scrape.write_summary(results, str(path))
+    summary = json.loads(path.read_text())
+    assert summary["rows"] == 74
+    assert summary["failed"] == 2
+    assert len(summary["jobs"]) == 6
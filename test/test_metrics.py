@@ -0,0 +1,52 @@
+import json
+
+import pytest
+from conftest import read
+
+from brandeis_classes import brandeis, metrics, scrape_courses
+
+
+def test_metrics(tmp_path):
+    m = metrics.Metrics()
+    m.inc("rows_parsed")
+    m.inc("rows_parsed", 2)
+    m.observe("parse_row", 0.5)
+    with pytest.raises(KeyError):
+        with m.timer("parse_row"):
+            raise KeyError
+    snapshot = m.dict()
+    assert snapshot["counters"] == {"rows_parsed": 3}
+    assert snapshot["timers"]["parse_row"]["count"] == 2
+    assert snapshot["timers"]["parse_row"]["max"] == 0.5
+
+    text = m.prometheus()
+    assert "# TYPE brandeis_rows_parsed_total counter" in text
+    assert "brandeis_rows_parsed_total 3\n" in text
+    assert 'brandeis_stage_seconds_count{stage="parse_row"} 2\n' in text
+
+    m.write(str(tmp_path / "metrics.json"))
+    assert json.loads(read(tmp_path / "metrics.json")) == snapshot
+    m.write(str(tmp_path / "metrics.prom"))
+    assert read(tmp_path / "metrics.prom") == text
+
+    m.reset()
+    assert m.dict() == {"counters": {}, "timers": {}}
+
+
+def test_scrape_metrics(monkeypatch, tmp_path, fake_search_pages):
+    fake_search_pages(3)
+    monkeypatch.setattr(brandeis, "fetch_description", lambda url: "Description")
+    monkeypatch.setattr(metrics, "REGISTRY", metrics.Metrics())
+    monkeypatch.chdir(tmp_path)
+
+    assert (
+        scrape_courses.scrape_courses(2019, "Fall", rate=1000, description_cache="")
+        == 3
+    )
+    snapshot = metrics.REGISTRY.dict()
+    assert snapshot["counters"]["rows_parsed"] == 3
+    assert snapshot["counters"]["courses_written"] == 3
+    assert snapshot["timers"]["write_page"]["count"] == 3
+    assert snapshot["timers"]["write_output"]["count"] == 1
+    # only indexed for search when asked to
+    assert not (tmp_path / "out" / "search").exists()
@@ -0,0 +1,54 @@
+import json
+import os
+
+import pytest
+
+from brandeis_classes import brandeis, output, scrape_courses
+
+
+@pytest.mark.parametrize("fmt", output.FORMATS)
+def test_resume(fmt, monkeypatch, tmp_path, fake_search_pages):
+    fetched = fake_search_pages(5, fail={3})
+    monkeypatch.setattr(brandeis, "fetch_description", lambda url: "Description")
+    monkeypatch.chdir(tmp_path)
+
+    def scrape():
+        return scrape_courses.scrape_courses(
+            2019,
+            "Fall",
+            rate=1000,
+            description_cache="",
+            progress=print,
+            fmt=fmt,
+            search_index="out/search",
+        )
+
+    with pytest.raises(ConnectionError):
+        scrape()
+    # pages after 3 might have been fetched already, but weren't saved
+    assert fetched[:2] == [1, 2]
+    assert not os.path.exists(f"out/2019-Fall.{fmt}")
+    out = output.SemesterOutput(2019, "Fall", fmt)
+    assert out.done == {1, 2}
+    assert out.high == 5
+
+    fetched.clear()
+    assert scrape() == 5
+    assert fetched == [3, 4, 5]
+    assert not os.path.exists("out/2019-Fall.pages")
+    with open(f"out/2019-Fall.{fmt}") as f:
+        courses = brandeis.load_courses(f)
+    assert [c.class_number for c in courses] == [1, 2, 3, 4, 5]
+    assert courses[0].year == 2019
+    assert courses[0].description == "Description"
+    # and it's searchable
+    assert os.path.exists("out/search/2019-Fall.json")
+
+    if fmt == "json":
+        with open("out/2019-Fall.json") as f:
+            assert len(json.load(f)) == 5
+
+    # scraping again replaces the file instead of appending to it
+    assert scrape() == 5
+    with open(f"out/2019-Fall.{fmt}") as f:
+        assert len(brandeis.load_courses(f)) == 5
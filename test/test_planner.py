@@ -0,0 +1,91 @@
+import itertools
+import random
+
+from brandeis_classes import planner, schedule
+from brandeis_classes.brandeis import CourseTime
+
+
+def section(make_course, number, section, *times):
+    return make_course(
+        number=number,
+        section=str(section),
+        schedule=[CourseTime(None, t, None, None) for t in times],
+    )
+
+
+def brute_force(courses, wanted):
+    groups = planner.group_sections(courses)
+    return [
+        list(combo)
+        for combo in itertools.product(*(groups.get(key, []) for key in wanted))
+        if not any(
+            schedule.overlaps(a.intervals, b.intervals)
+            for a, b in itertools.combinations(combo, 2)
+        )
+    ]
+
+
+def test_group_sections(make_course):
+    courses = [
+        section(make_course, 10, 1),
+        section(make_course, 11, 1),
+        section(make_course, 10, 2),
+    ]
+    assert planner.course_key(courses[0]) == "COSI 10A"
+    assert planner.group_sections(courses) == {
+        "COSI 10A": [courses[0], courses[2]],
+        "COSI 11A": [courses[1]],
+    }
+
+
+def test_schedules(make_course):
+    a1 = section(make_course, 10, 1, "M,W 9:00 AM–9:50 AM")
+    a2 = section(make_course, 10, 2, "T,Th 9:00 AM–9:50 AM")
+    b1 = section(make_course, 11, 1, "M 9:30 AM–10:20 AM")
+    b2 = section(make_course, 11, 2, "F 9:00 AM–9:50 AM")
+    c1 = section(make_course, 12, 1, "TBD")
+    courses = [a1, a2, b1, b2, c1]
+
+    builder = planner.ScheduleBuilder(courses)
+    assert builder.keys == ["COSI 10A", "COSI 11A", "COSI 12A"]
+    assert sorted(map(id_list, builder.schedules())) == sorted(
+        map(id_list, [[a1, b2, c1], [a2, b1, c1], [a2, b2, c1]])
+    )
+    assert builder.count() == 3
+
+    assert sorted(map(id_list, planner.schedules(courses, ["COSI 11A"]))) == sorted(
+        [[id(b1)], [id(b2)]]
+    )
+    assert list(planner.schedules(courses, ["COSI 10A", "COSI 99A"])) == []
+
+
+def id_list(courses):
+    return [id(c) for c in courses]
+
+
+def test_matches_brute_force(make_course):
+    rng = random.Random(0)
+    days = ["M,W", "T,Th", "M,W,Th", "F", "T"]
+    courses = []
+    for number in range(6):
+        for sec in range(rng.randrange(1, 5)):
+            start = rng.randrange(8 * 60, 17 * 60, 30)
+            hour, minute = divmod(start, 60)
+            end_hour, end_minute = divmod(start + 80, 60)
+            courses.append(
+                section(
+                    make_course,
+                    number,
+                    sec,
+                    f"{rng.choice(days)} {(hour - 1) % 12 + 1}:{minute:02} "
+                    f"{'PM' if hour >= 12 else 'AM'}–{(end_hour - 1) % 12 + 1}:"
+                    f"{end_minute:02} {'PM' if end_hour >= 12 else 'AM'}",
+                )
+            )
+    rng.shuffle(courses)
+    wanted = [f"COSI {n}A" for n in range(6)]
+    expected = sorted(map(id_list, brute_force(courses, wanted)))
+    assert expected
+    found = sorted(map(id_list, planner.schedules(courses, wanted)))
+    assert found == expected
+    assert planner.ScheduleBuilder(courses, wanted).count() == len(expected)
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from conftest import ROW, numbered_row, search_page
+
+from brandeis_classes import brandeis, client, refresh, timeseries
+
+
+class StubRegistrar(BaseHTTPRequestHandler):
+    """Two pages of courses; page 1 has an ETag, page 2 doesn't.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # page number -> HTML
+    pages = {}
+    statuses = []
+    # description URLs requested
+    descriptions = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        pg = int(parse_qs(urlparse(self.path).query)["page"][0])
+        body = type(self).pages[pg].encode("utf-8")
+        headers = {}
+        if pg == 1:
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            headers["ETag"] = etag
+            if self.headers.get("If-None-Match") == etag:
+                type(self).statuses.append(304)
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+        type(self).statuses.append(200)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def page(row):
+    return search_page(row, [1, 2])
+
+
+@pytest.fixture
+def registrar(monkeypatch, tmp_path):
+    StubRegistrar.pages = {
+        1: page(ROW),
+        2: page(numbered_row(20000)),
+    }
+    StubRegistrar.statuses = []
+    StubRegistrar.descriptions = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubRegistrar)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def fetch_description(url):
+        StubRegistrar.descriptions.append(url)
+        return "Description"
+
+    monkeypatch.setattr(brandeis, "fetch_description", fetch_description)
+    monkeypatch.chdir(tmp_path)
+    with client.HTTPClient(timeout=5, backoff=0) as c:
+        old = client.set_default_client(c)
+        yield f"http://127.0.0.1:{server.server_port}/search"
+        client.set_default_client(old)
+    server.shutdown()
+    server.server_close()
+
+
+def test_refresh(registrar, tmp_path):
+    # a full scrape that only saw page 1
+    [base] = brandeis.page_to_courses(page(ROW), request_description=False)
+    (tmp_path / "out").mkdir()
+    (tmp_path / "out" / "2019-Fall.json").write_text(json.dumps([base.dict()]))
+
+    store = timeseries.EnrollmentStore(str(tmp_path / "2019-Fall.ts"))
+    result = refresh.refresh(2019, "Fall", base_url=registrar, store=store)
+    assert (result.pages, result.parsed, result.changed, result.added) == (2, 2, 0, 1)
+    [added] = result.entries
+    assert added["class_number"] == 20000
+    assert added["added"]["description"] == "Description"
+    assert len(StubRegistrar.descriptions) == 1
+    assert added["added"]["year"] == 2019
+
+    # nothing changed: page 1 isn't even sent, page 2 isn't parsed
+    StubRegistrar.statuses.clear()
+    result = refresh.refresh(2019, "Fall", base_url=registrar, store=store)
+    assert StubRegistrar.statuses == [304, 200]
+    assert (result.not_modified, result.unchanged, result.parsed) == (1, 1, 0)
+    assert result.entries == []
+
+    StubRegistrar.pages[1] = page(ROW.replace("4 /", "5 /").replace("Open", "Closed"))
+    result = refresh.refresh(2019, "Fall", base_url=registrar, store=store)
+    assert (result.parsed, result.unchanged, result.changed) == (1, 1, 1)
+    [changed] = result.entries
+    assert changed["course"] == "COSI 119A_1"
+    assert changed["changes"] == {
+        "enrolled": [4, 5],
+        "enrollment_status": ["Open Consent Req.", "Closed Consent Req."],
+    }
+
+    # the full scrape's untouched; the change log brings it up to date
+    with open("out/2019-Fall.json") as f:
+        courses = brandeis.load_courses(f)
+    assert courses[0].enrolled == 4
+    courses = refresh.replay(
+        courses, refresh.load_changes("out/refresh/2019-Fall.changes.jsonl")
+    )
+    assert [(c.class_number, c.enrolled) for c in courses] == [(16905, 5), (20000, 4)]
+
+    # the full scrape, then each refresh
+    assert len(store.snapshots()) == 4
+    assert [p.enrolled for p in store.series(16905)] == [4, 5]
+    assert [p.enrolled for p in store.series(20000)] == [4]
+
+
+def test_refresh_enrollment_only(registrar, tmp_path):
+    # a full scrape that saw both pages
+    courses = [
+        brandeis.page_to_courses(html, request_description=False)[0]
+        for html in StubRegistrar.pages.values()
+    ]
+    for course in courses:
+        course.description = f"Scraped {course.class_number}"
+    (tmp_path / "out").mkdir()
+    (tmp_path / "out" / "2019-Fall.json").write_text(
+        json.dumps([c.dict() for c in courses])
+    )
+
+    store = timeseries.EnrollmentStore(str(tmp_path / "2019-Fall.ts"))
+    for enrolled in [5, 6, 7]:
+        StubRegistrar.pages[2] = StubRegistrar.pages[2].replace(
+            f"{enrolled - 1} /", f"{enrolled} /"
+        )
+        result = refresh.refresh(2019, "Fall", base_url=registrar, store=store)
+        assert result.entries[-1]["changes"] == {"enrolled": [enrolled - 1, enrolled]}
+    # every snapshot's recorded without fetching a single description
+    assert StubRegistrar.descriptions == []
+    assert [p.enrolled for p in store.series(20000)] == [4, 5, 6, 7]
+    assert len(store.snapshots()) == 4
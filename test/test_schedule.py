@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+from brandeis_classes import schedule
+from brandeis_classes.brandeis import CourseTime
+
+
+def test_parse_meeting():
+    assert schedule.parse_meeting("M,W,Th 11:00 AM–11:50 AM") == schedule.Meeting(
+        days=0b1101, start=11 * 60, end=11 * 60 + 50
+    )
+    assert schedule.parse_meeting("T 12:30 PM-1:20 PM") == (0b10, 750, 800)
+    assert schedule.parse_meeting("F 12:00 AM–1:00 AM") == (0b10000, 0, 60)
+    assert schedule.parse_meeting("TBD") is None
+    assert schedule.parse_meeting(None) is None
+    assert schedule.parse_meeting("Xy 1:00 PM–2:00 PM") is None
+
+
+def test_fixture_intervals(fixture_course):
+    biol = fixture_course("biol_160b_1.html")
+    [ct] = biol.schedule
+    assert ct.days == schedule.DAY_BITS["M"] | schedule.DAY_BITS["W"]
+    assert ct.intervals == [(13 * 60, 17 * 60 + 20), (2 * 1440 + 780, 2 * 1440 + 1040)]
+    assert biol.intervals == ct.intervals
+
+    cosi = fixture_course("cosi_119a_1.html")
+    assert cosi.intervals == [
+        schedule.week_interval("W", "2:00 PM", "4:50 PM"),
+        schedule.week_interval("W", "6:30 PM", "9:20 PM"),
+    ]
+
+    ed = fixture_course("ed_285_1dl.html")
+    assert ed.schedule[0].meeting is None
+    assert ed.schedule[0].days == 0
+    assert ed.intervals == []
+
+
+def with_times(make_course, *times):
+    return make_course(schedule=[CourseTime(None, t, None, None) for t in times])
+
+
+def test_index_matches_scan(make_course):
+    rng = random.Random(0)
+    days = ["M", "T", "W", "Th", "F", "M,W", "T,Th", "M,W,Th"]
+    courses = []
+    for _ in range(500):
+        times = []
+        for _ in range(rng.randrange(0, 3)):
+            start = rng.randrange(8 * 60, 20 * 60, 10)
+            end = start + rng.choice([50, 80, 170])
+            times.append(
+                f"{rng.choice(days)} {clock(start)}–{clock(end)}"
+                if rng.random() > 0.05
+                else "TBD"
+            )
+        courses.append(with_times(make_course, *times))
+    index = schedule.IntervalIndex(courses)
+
+    for _ in range(200):
+        start = rng.randrange(0, schedule.MINUTES_PER_WEEK)
+        end = start + rng.randrange(1, 300)
+        expected = [
+            c for c in courses if schedule.overlaps(c.intervals, [(start, end)])
+        ]
+        assert index.overlapping(start, end) == expected
+
+    for course in courses[:50]:
+        expected = [
+            c
+            for c in courses
+            if c is not course and schedule.overlaps(c.intervals, course.intervals)
+        ]
+        assert index.conflicts(course) == expected
+
+
+def clock(minutes):
+    hour, minute = divmod(minutes, 60)
+    return f"{(hour - 1) % 12 + 1}:{minute:02} {'PM' if hour >= 12 else 'AM'}"
+
+
+def test_meets(make_course):
+    tue = with_times(make_course, "T,Th 2:00 PM–3:20 PM")
+    wed = with_times(make_course, "W 2:00 PM–3:20 PM")
+    late = with_times(make_course, "T 4:00 PM–5:00 PM")
+    index = schedule.IntervalIndex([tue, wed, late])
+    assert index.meets("T", "2:00 PM", "4:00 PM") == [tue]
+    assert index.meets("Th", "3:00 PM", "3:01 PM") == [tue]
+    assert index.conflicts(tue) == []
+    assert len(index) == 4
+
+    with pytest.raises(ValueError):
+        schedule.week_interval("T", "14:00 PM", "4:00 PM")
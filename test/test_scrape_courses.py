@@ -0,0 +1,114 @@
+import time
+from concurrent.futures import Future
+
+import pytest
+from conftest import numbered_row, search_page
+
+from brandeis_classes import brandeis, scrape_courses
+from brandeis_classes.ratelimit import TokenBucket
+
+
+class NoDescriptions:
+    def submit(self, url):
+        future = Future()
+        future.set_result(None)
+        return future
+
+
+def test_courses_in_page_order(monkeypatch, fake_search_pages):
+    fake_search_pages(20, jitter=0.01)
+    monkeypatch.setattr(brandeis, "fetch_description", lambda url: "Description")
+    pages = scrape_courses.courses(
+        1, 20, 2019, "Fall", jobs=8, limiter=TokenBucket(1000, burst=20)
+    )
+    courses = [list(page) for page in pages]
+    assert [[c.class_number for c in page] for page in courses] == [
+        [pg] for pg in range(1, 21)
+    ]
+    for [course] in courses:
+        assert course.year == 2019
+        assert course.semester == "Fall"
+        assert course.description == "Description"
+
+
+class CountingBucket(TokenBucket):
+    def __init__(self):
+        super().__init__(1000, burst=20)
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+        super().acquire()
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_shared_fetcher(monkeypatch, fake_search_pages, jobs):
+    # every page has the same course, so the same description URL
+    fake_search_pages(8)
+    fetched = []
+
+    def fetch_description(url):
+        fetched.append(url)
+        time.sleep(0.01)
+        return "Description"
+
+    monkeypatch.setattr(brandeis, "fetch_description", fetch_description)
+    limiter = CountingBucket()
+    pages = scrape_courses.courses(1, 8, 2019, "Fall", jobs=jobs, limiter=limiter)
+    for page in pages:
+        assert [c.description for c in page] == ["Description"]
+    assert len(fetched) == 1
+    # 8 search pages and the description
+    assert limiter.acquired == 9
+
+
+def test_pages_from_first_page(fake_search_pages):
+    fetched = fake_search_pages(5)
+    pages = scrape_courses.courses(
+        1,
+        None,
+        2019,
+        "Fall",
+        jobs=3,
+        limiter=TokenBucket(1000, burst=5),
+        fetcher=NoDescriptions(),
+    )
+    assert [[c.class_number for c in page] for page in pages] == [
+        [1],
+        [2],
+        [3],
+        [4],
+        [5],
+    ]
+    assert sorted(fetched) == [1, 2, 3, 4, 5]
+
+
+def test_lazy_pages(monkeypatch):
+    fetched = []
+
+    def fetch_search_page(pg, year, semester, base_url, limiter):
+        fetched.append(pg)
+        # a pager that only shows the next page; page 5 is empty
+        return search_page(numbered_row(pg) if pg < 5 else "", [pg + 1])
+
+    monkeypatch.setattr(scrape_courses, "fetch_search_page", fetch_search_page)
+    pages = scrape_courses.courses(
+        2,
+        None,
+        2019,
+        "Fall",
+        limiter=TokenBucket(1000, burst=5),
+        fetcher=NoDescriptions(),
+        lazy=True,
+    )
+    assert [[c.class_number for c in page] for page in pages] == [[2], [3], [4], []]
+    assert fetched == [2, 3, 4, 5]
+
+
+def test_token_bucket_rate():
+    bucket = TokenBucket(100, burst=1)
+    start = time.monotonic()
+    for _ in range(11):
+        bucket.acquire()
+    # first token is free, the other 10 take 1/100th of a second each
+    assert time.monotonic() - start >= 0.09
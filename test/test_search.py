@@ -0,0 +1,93 @@
+import json
+import os
+
+import pytest
+
+from brandeis_classes import dataset, search
+
+
+SEMESTERS = {
+    "2018-Fall": [
+        ("COSI", "Modal Logic", "Logic of necessity and possibility."),
+        ("BIOL", "Neurobiology", "Neurons, synapses, and the nervous system."),
+        ("COSI", "Compilers", "Parsing and code generation."),
+    ],
+    "2019-Spring": [
+        (
+            "COSI",
+            "Logic and Computation",
+            "Proofs, programs, and logic in computer science.",
+        ),
+        ("BIOL", "Neuroscience Lab", "Hands-on work with neural tissue."),
+        ("ED", "Teaching Science", "How to teach biology and chemistry."),
+    ],
+}
+
+
+@pytest.fixture
+def index(tmp_path, make_course):
+    for sem, courses in SEMESTERS.items():
+        (tmp_path / f"{sem}.json").write_text(
+            json.dumps(
+                [
+                    make_course(
+                        subject=subj, name=name, description=desc, notes=None
+                    ).dict()
+                    for subj, name, desc in courses
+                ]
+            )
+        )
+    ret = search.SearchIndex(dataset.Dataset(str(tmp_path)), str(tmp_path / "search"))
+    assert ret.update() == ["2018-Fall", "2019-Spring"]
+    return ret
+
+
+def names(hits):
+    return [hit.course.name for hit in hits]
+
+
+def test_tokenize():
+    assert search.tokenize("The Logic of COSI-119a!") == ["logic", "cosi", "119a"]
+    assert search.tokenize(None) == []
+    assert search.parse_query("Neuro* and LOGIC") == ["neuro*", "logic"]
+
+
+def test_search(index):
+    hits = index.search("logic")
+    # the shorter document first
+    assert names(hits) == ["Modal Logic", "Logic and Computation"]
+    assert hits[0].semester == "2018-Fall"
+    assert hits[0].position == 0
+    assert hits[0].score > hits[1].score > 0
+
+    assert sorted(names(index.search("neuro*"))) == ["Neurobiology", "Neuroscience Lab"]
+    assert names(index.search("biology teach*")) == ["Teaching Science"]
+    assert index.search("quantum") == []
+    assert index.search("") == []
+
+
+def test_filters(index):
+    assert names(index.search("logic", semesters=["2019-Spring"])) == [
+        "Logic and Computation"
+    ]
+    assert names(index.search("neuro* logic", subject="BIOL", limit=None)) == names(
+        index.search("neuro*", limit=None)
+    )
+    assert len(index.search("neuro* logic", limit=1)) == 1
+
+
+def test_incremental(index, tmp_path):
+    # segments are reused from disk
+    reopened = search.SearchIndex(index.data, index.index_dir)
+    assert reopened.stale() == []
+    assert names(reopened.search("compilers")) == ["Compilers"]
+
+    # only the semester that changed is reindexed
+    path = tmp_path / "2019-Spring.json"
+    courses = json.loads(path.read_text())
+    courses[0]["name"] = "Compilers II"
+    path.write_text(json.dumps(courses))
+    os.utime(path, ns=(0, 0))
+    reopened = search.SearchIndex(dataset.Dataset(str(tmp_path)), index.index_dir)
+    assert reopened.update() == ["2019-Spring"]
+    assert sorted(names(reopened.search("compilers"))) == ["Compilers", "Compilers II"]
@@ -0,0 +1,62 @@
+import io
+import json
+
+import pytest
+from conftest import read
+
+from brandeis_classes import brandeis, output, serialize
+
+
+@pytest.fixture
+def courses():
+    courses = brandeis.page_to_courses(
+        '<table id="classes-list">'
+        + read("test-data/cosi_119a_1.html")
+        + read("test-data/ed_285_1dl.html")
+        + "</table>",
+        request_description=False,
+    )
+    courses[0].description = "Café “quoted”"
+    return courses
+
+
+@pytest.mark.parametrize("name", list(serialize.ENCODERS))
+def test_encoders(name, courses):
+    encoder = serialize.encoder(name)
+    for course in courses:
+        d = course.dict()
+        compact = encoder.dumps(course)
+        assert compact == json.dumps(d, separators=(",", ":"), ensure_ascii=False)
+        assert encoder.dumps(d) == compact
+        assert encoder.dumps(course, pretty=True) == json.dumps(
+            d, indent=2, ensure_ascii=False
+        )
+        assert brandeis.Course.from_dict(encoder.loads(compact)) == course
+
+    text = encoder.dumps(courses)
+    assert brandeis.load_courses(io.StringIO(text), name) == courses
+    lines = "".join(encoder.dumps(c) + "\n" for c in courses)
+    assert brandeis.load_courses(io.StringIO(lines), name) == courses
+
+
+def test_choose_encoder(monkeypatch):
+    assert serialize.encoder().name == next(iter(serialize.ENCODERS))
+    monkeypatch.setenv(serialize.ENCODER_ENV, "json")
+    assert serialize.encoder().name == "json"
+    with pytest.raises(ValueError):
+        serialize.encoder("pickle")
+
+
+@pytest.mark.parametrize("pretty", [False, True])
+def test_output(pretty, courses, tmp_path):
+    out = output.SemesterOutput(2019, "Fall", outdir=str(tmp_path), pretty=pretty)
+    out.write_page(1, courses[:1])
+    out.write_page(2, [c.dict() for c in courses[1:]])
+    assert out.finish() == 2
+
+    text = read(out.path)
+    assert json.loads(text) == [c.dict() for c in courses]
+    # a course per line, unless it's pretty
+    assert (len(text.splitlines()) == 4) != pretty
+    with open(out.path, encoding="utf-8") as f:
+        assert brandeis.load_courses(f) == courses
@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+from brandeis_classes import timeseries
+
+
+def test_append_and_query(template, make_course, tmp_path):
+    path = str(tmp_path / "2019-Fall.ts")
+    store = timeseries.EnrollmentStore(path)
+    other = make_course(class_number=1)
+    assert store.append([template, other], 100) == 2
+    # nothing changed; only the snapshot's header is written
+    size = os.path.getsize(path)
+    assert store.append([template, other], 200) == 0
+    assert os.path.getsize(path) == size + 1 + timeseries.SNAPSHOT.size
+    assert store.append([make_course(waiting=3), other], 300) == 1
+    assert (
+        store.append([make_course(waiting=5, enrollment_status="Closed"), other], 400)
+        == 1
+    )
+    with pytest.raises(ValueError):
+        store.append([template], 399)
+
+    for s in [store, timeseries.EnrollmentStore(path)]:
+        assert s.snapshots() == [100, 200, 300, 400]
+        assert s.snapshots(150, 300) == [200, 300]
+        assert [(p.time, p.waiting) for p in s.series(16905)] == [
+            (100, 0),
+            (300, 3),
+            (400, 5),
+        ]
+        assert [(p.time, p.waiting) for p in s.series(16905, 250, 350)] == [
+            (250, 0),
+            (300, 3),
+        ]
+        assert s.at(16905, 399) == (399, 4, 10, 3, "Open Consent Req.")
+        assert s.at(16905, 400).status == "Closed"
+        assert s.at(16905, 50) is None
+        assert [p.time for p in s.series(1)] == [100]
+        assert s.series(2) == []
+
+
+def test_torn_write(template, make_course, tmp_path):
+    path = str(tmp_path / "2019-Fall.ts")
+    store = timeseries.EnrollmentStore(path)
+    store.append([template], 100)
+    store.append([make_course(enrolled=5)], 200)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 3)
+
+    store = timeseries.EnrollmentStore(path)
+    assert store.snapshots() == [100]
+    store.append([make_course(enrolled=6, enrollment_status=None)], 300)
+    store = timeseries.EnrollmentStore(path)
+    assert [(p.enrolled, p.status) for p in store.series(16905)] == [
+        (4, "Open Consent Req."),
+        (6, None),
+    ]
+
+
+def test_compact(make_course, tmp_path):
+    path = str(tmp_path / "2019-Fall.ts")
+    store = timeseries.EnrollmentStore(path)
+    day = timeseries.DAY
+    now = 400 * day
+    start = now - 30 * day
+
+    def enrolled(t):
+        return (t - start) // 300 // 100
+
+    # every five minutes for 30 days, with enrollment creeping up
+    for i in range(30 * 24 * 12):
+        t = start + i * 300
+        store.append([make_course(enrolled=enrolled(t))], t)
+    before = os.path.getsize(path)
+
+    store.compact(now=now, raw_window=7 * day, retention=20 * day)
+    assert os.path.getsize(path) < before / 3
+    reopened = timeseries.EnrollmentStore(path)
+    for s in [store, reopened]:
+        # full resolution for the last week
+        assert len(s.snapshots(now - 7 * day)) == 7 * 24 * 12
+        # hourly before that
+        old = s.snapshots(now - 20 * day, now - 7 * day - 1)
+        assert len(old) == 13 * 24
+        # and the rest folded into one
+        assert s.snapshots(end=now - 20 * day) == [now - 20 * day - 300]
+        assert s.at(16905, now - 20 * day).enrolled == (10 * 24 * 12 - 1) // 100
+        assert s.at(16905, now).enrolled == (30 * 24 * 12 - 1) // 100
+        # merged snapshots have the values as of their time, not from later on
+        # in the hour
+        for t in s.snapshots():
+            assert s.at(16905, t).enrolled == enrolled(t)